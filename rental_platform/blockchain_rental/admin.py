@@ -1,6 +1,41 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Property, Booking, Review, BlockchainTransaction
+from django.db import connections
+import re
+from .models import (
+    User, Property, Booking, Review, BlockchainTransaction, ContractEvent, IndexerCheckpoint,
+    PropertyRatingAggregate, ReconcileCheckpoint, UserRatingAggregate,
+)
+from .pagination import EstimatedCountPaginator
+
+TRANSACTION_HASH_PATTERN = re.compile(r'^0x[0-9a-fA-F]{64}$')
+TRANSACTION_HASH_PREFIX_PATTERN = re.compile(r'^0x[0-9a-fA-F]+$')
+
+class LargeTableAdminMixin:
+    """大表 changelist: 使用 pg_class 估算总数，过滤后不再额外统计全表行数。"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+class TransactionHashSearchMixin:
+    """
+    大表的搜索全部走索引，不做 UPPER(...) LIKE 扫描 (search_fields 只用于显示搜索框):
+    - 完整的交易哈希按 transaction_hash 精确匹配，哈希前缀按前缀匹配 (统一为小写)；
+    - 设置了 username_search_field 时，其他搜索词按用户名前缀匹配 (区分大小写)。
+    PostgreSQL 上前缀匹配由索引列自带的 varchar_pattern_ops (*_like) 索引支持。
+    """
+    username_search_field = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if TRANSACTION_HASH_PATTERN.match(term):
+            return queryset.filter(transaction_hash=term.lower()), False
+        if TRANSACTION_HASH_PREFIX_PATTERN.match(term):
+            return queryset.filter(transaction_hash__startswith=term.lower()), False
+        if self.username_search_field:
+            return queryset.filter(**{f'{self.username_search_field}__startswith': term}), False
+        return queryset.none(), False
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -14,22 +49,75 @@ class CustomUserAdmin(UserAdmin):
 class PropertyAdmin(admin.ModelAdmin):
     list_display = ('title', 'owner', 'location', 'price_per_night', 'is_verified')
     list_filter = ('is_verified', 'created_at')
+    list_select_related = ('owner',)
+    raw_id_fields = ('owner',)
     search_fields = ('title', 'description', 'location')
 
+    def get_search_results(self, request, queryset, search_term):
+        # PostgreSQL 上使用 Property.objects.search: 全文匹配 + 三元组索引支持的子串匹配，避免对 description 做无索引的 ILIKE 全表扫描
+        if search_term and connections[queryset.db].vendor == 'postgresql':
+            return queryset.search(search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('property', 'renter', 'check_in_date', 'check_out_date', 'total_price', 'status')
     list_filter = ('status', 'check_in_date')
+    list_select_related = ('property', 'renter')
+    raw_id_fields = ('property', 'renter')
     search_fields = ('property__title', 'renter__username')
+    date_hierarchy = 'check_in_date'  # booking_check_in_idx
+    ordering = ('-created_at', '-id')  # booking_created_idx
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('reviewer', 'receiver', 'rating', 'blockchain_verification', 'created_at')
     list_filter = ('rating', 'blockchain_verification')
+    list_select_related = ('reviewer', 'receiver')
+    raw_id_fields = ('booking', 'reviewer', 'receiver')
+    ordering = ('-created_at', '-id')  # review_created_idx
     search_fields = ('reviewer__username', 'receiver__username', 'comment')
 
 @admin.register(BlockchainTransaction)
-class BlockchainTransactionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'transaction_type', 'transaction_hash', 'status', 'created_at')
+class BlockchainTransactionAdmin(LargeTableAdminMixin, TransactionHashSearchMixin, admin.ModelAdmin):
+    list_display = ('user', 'transaction_type', 'transaction_hash', 'status', 'block_number', 'created_at', 'confirmed_at')
     list_filter = ('transaction_type', 'status', 'created_at')
-    search_fields = ('user__username', 'transaction_hash')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    readonly_fields = (
+        'block_number', 'check_attempts', 'next_check_at',
+        # 代发字段由 run_relayer 维护
+        'sender_address', 'nonce', 'to_address', 'calldata', 'value_wei', 'gas_limit',
+        'max_fee_per_gas', 'max_priority_fee_per_gas', 'submitted_at', 'replaced_hashes', 'last_error',
+    )
+    # 搜索由 TransactionHashSearchMixin 处理: 交易哈希 (或前缀) 与用户名前缀，均走索引
+    search_fields = ('transaction_hash', 'user__username')
+    username_search_field = 'user__username'
+    date_hierarchy = 'created_at'  # blockchain_tx_created_idx
+    ordering = ('-created_at', '-id')  # blockchain_tx_created_idx
+
+@admin.register(ContractEvent)
+class ContractEventAdmin(LargeTableAdminMixin, TransactionHashSearchMixin, admin.ModelAdmin):
+    list_display = ('event_type', 'block_number', 'log_index', 'transaction_hash', 'block_timestamp')
+    list_filter = ('event_type',)
+    search_fields = ('transaction_hash',)
+
+@admin.register(IndexerCheckpoint)
+class IndexerCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'block_number', 'updated_at')
+
+@admin.register(ReconcileCheckpoint)
+class ReconcileCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_pk', 'updated_at')
+
+@admin.register(PropertyRatingAggregate)
+class PropertyRatingAggregateAdmin(admin.ModelAdmin):
+    list_display = ('property', 'review_count', 'average_rating', 'updated_at')
+    list_select_related = ('property',)
+    readonly_fields = ('review_count', 'rating_sum', 'star_1', 'star_2', 'star_3', 'star_4', 'star_5')
+
+@admin.register(UserRatingAggregate)
+class UserRatingAggregateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'review_count', 'average_rating', 'updated_at')
+    list_select_related = ('user',)
+    readonly_fields = ('review_count', 'rating_sum', 'star_1', 'star_2', 'star_3', 'star_4', 'star_5')
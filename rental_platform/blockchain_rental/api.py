@@ -0,0 +1,81 @@
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+
+from .models import BlockchainTransaction, Booking, Property, Review
+from .pagination import CreatedAtIdCursorPagination
+from .serializers import BlockchainTransactionSerializer, BookingSerializer, PropertySerializer, ReviewSerializer
+
+
+class LocalModelViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    本地数据库模型的只读 API 基类。
+
+    列表接口使用 (created_at, id) 键集游标分页，关联对象全部通过 select_related 在同一条查询中取回，
+    因此每个列表请求的 SQL 查询数固定，与页大小无关。
+    filter_params 声明允许的精确匹配过滤参数: {查询参数名: (模型字段, 类型转换函数)}。
+    """
+    pagination_class = CreatedAtIdCursorPagination
+    filter_params = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        filters = {}
+        for param, (field, convert) in self.filter_params.items():
+            value = self.request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                filters[field] = convert(value)
+            except ValueError:
+                raise ValidationError({param: '无效的过滤参数。'})
+        return queryset.filter(**filters)
+
+
+def _bool_param(value: str) -> bool:
+    if value.lower() in ('1', 'true'):
+        return True
+    if value.lower() in ('0', 'false'):
+        return False
+    raise ValueError(value)
+
+
+class PropertyViewSet(LocalModelViewSet):
+    queryset = Property.objects.select_related('owner', 'rating_aggregate').defer('search_vector')
+    serializer_class = PropertySerializer
+    filter_params = {
+        'owner': ('owner_id', int),
+        'is_verified': ('is_verified', _bool_param),
+    }
+
+
+class BookingViewSet(LocalModelViewSet):
+    queryset = Booking.objects.select_related('property', 'renter')
+    serializer_class = BookingSerializer
+    filter_params = {
+        'property': ('property_id', int),
+        'renter': ('renter_id', int),
+        'status': ('status', str),
+    }
+
+    def get_queryset(self):
+        return super().get_queryset().defer('property__description', 'property__search_vector')
+
+
+class ReviewViewSet(LocalModelViewSet):
+    queryset = Review.objects.select_related('booking', 'reviewer', 'receiver')
+    serializer_class = ReviewSerializer
+    filter_params = {
+        'property': ('booking__property_id', int),
+        'reviewer': ('reviewer_id', int),
+        'receiver': ('receiver_id', int),
+    }
+
+
+class BlockchainTransactionViewSet(LocalModelViewSet):
+    queryset = BlockchainTransaction.objects.select_related('user')
+    serializer_class = BlockchainTransactionSerializer
+    filter_params = {
+        'user': ('user_id', int),
+        'status': ('status', str),
+        'transaction_type': ('transaction_type', str),
+    }
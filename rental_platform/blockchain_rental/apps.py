@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BlockchainRentalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blockchain_rental'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import request_profile
+        # SQL 计时包装器按连接安装 (由 RequestTimingMiddleware 激活的请求统计对象决定是否记录)
+        connection_created.connect(request_profile.install_query_wrapper, dispatch_uid='blockchain_rental.query_wrapper')
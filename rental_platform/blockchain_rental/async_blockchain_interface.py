@@ -0,0 +1,184 @@
+from web3 import AsyncWeb3
+from asgiref.sync import sync_to_async
+import logging
+
+from .blockchain_interface import BlockchainInterface
+from .calldata import encode_call
+from .chain_cache import ChainReadCache
+from .contract_abi import get_contract_abi
+from .gas_estimator import GasEstimateCache
+from .metrics import observe_rpc
+from .rpc_transport import AsyncFailoverHTTPProvider, AsyncPooledHTTPProvider, FailoverHTTPProvider
+
+logger = logging.getLogger(__name__)
+
+class AsyncBlockchainInterface:
+    """
+    异步区块链接口 - BlockchainInterface 的 AsyncWeb3 版本。
+    在 ASGI (config/asgi.py) 下运行时，等待节点响应期间不会占用 worker 线程，
+    单个进程即可同时保持大量进行中的 RPC 请求。
+    参数校验、返回值格式与同步版本完全一致 (直接复用 BlockchainInterface 的辅助方法)。
+    连接状态与同步版本共用: 节点可用性取自 BlockchainInterface 的后台健康探测线程，请求中不执行初始化或重连；
+    异步传输按同步传输创建: 单节点时使用相同的超时和重试参数 (rpc_transport.AsyncPooledHTTPProvider)，
+    多节点时共用同步传输的节点路由、熔断和链头滞后排除 (rpc_transport.AsyncFailoverHTTPProvider)。
+    """
+    w3 = None
+    contract = None
+    _transport = None  # 创建 w3 时对应的同步传输，同步接口重新初始化后随之重建
+
+    @classmethod
+    def _initialize_web3(cls) -> bool:
+        """ (辅助方法) 基于 BlockchainInterface 已建立的同步传输创建 AsyncWeb3 (不访问节点，也没有 await，无需加锁) """
+        transport = BlockchainInterface.w3.provider
+        if cls.w3 is not None and cls._transport is transport:
+            return True
+        if isinstance(transport, FailoverHTTPProvider):
+            provider = AsyncFailoverHTTPProvider(transport)
+        else:
+            provider = AsyncPooledHTTPProvider.from_sync(transport)
+        w3 = AsyncWeb3(provider)
+        cls.contract = w3.eth.contract(address=BlockchainInterface.contract.address, abi=get_contract_abi())
+        cls.w3 = w3
+        cls._transport = transport
+        logger.info(f"异步区块链接口已创建: {provider}")
+        return True
+
+    @classmethod
+    def get_error_message(cls):
+        return BlockchainInterface.get_error_message()
+
+    @classmethod
+    async def is_ready(cls):
+        # 进程内第一次调用时在线程中等待同步接口的首次健康探测，不阻塞事件循环；之后只读取探测结果
+        if not BlockchainInterface._get_health_monitor().first_probe_done.is_set():
+            await sync_to_async(BlockchainInterface.is_ready, thread_sensitive=False)()
+        return BlockchainInterface.is_ready() and cls._initialize_web3()
+
+    # --- 合约读取方法 ---
+    @classmethod
+    async def get_user_info(cls, user_address: str) -> dict:
+        if not await cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。"}
+        try:
+            checksum_user_address = cls.w3.to_checksum_address(user_address)
+        except Exception as e:
+            logger.error(f"获取用户信息失败 ({user_address}): {e}")
+            return {"error": str(e)}
+
+        async def fetch():
+            try:
+                with observe_rpc('getUserInfo'):
+                    user_data_tuple = await cls.contract.functions.getUserInfo(checksum_user_address).call()
+                return BlockchainInterface._format_user_info(user_data_tuple)
+            except Exception as e:
+                logger.error(f"获取用户信息失败 ({checksum_user_address}): {e}")
+                return {"error": str(e)}
+
+        return await ChainReadCache.aget_or_fetch(
+            'getUserInfo', [checksum_user_address], ChainReadCache.user_scopes(checksum_user_address), cls.w3, fetch
+        )
+
+    @classmethod
+    async def get_property_info(cls, property_id: int) -> dict:
+        if not await cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。"}
+
+        async def fetch():
+            try:
+                with observe_rpc('getPropertyInfo'):
+                    prop_data_tuple = await cls.contract.functions.getPropertyInfo(property_id).call()
+                return BlockchainInterface._format_property_info(prop_data_tuple)
+            except Exception as e:
+                logger.error(f"获取房源信息失败 (ID: {property_id}): {e}")
+                return {"error": str(e)}
+
+        return await ChainReadCache.aget_or_fetch(
+            'getPropertyInfo', [property_id], ChainReadCache.property_scopes(property_id), cls.w3, fetch
+        )
+
+    @classmethod
+    async def get_property_count(cls) -> dict:
+        if not await cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "count": None}
+
+        async def fetch():
+            try:
+                with observe_rpc('propertyCount'):
+                    count = await cls.contract.functions.propertyCount().call()
+                return {"count": count, "error": None}
+            except Exception as e:
+                logger.error(f"获取房源总数失败: {e}")
+                return {"error": str(e), "count": None}
+
+        return await ChainReadCache.aget_or_fetch('propertyCount', [], ChainReadCache.PROPERTY_COUNT_SCOPES, cls.w3, fetch)
+
+    # --- 交易数据准备方法 (用于前端签名和发送) ---
+    @classmethod
+    async def _prepare_transaction_data(cls, fn_name: str, args: tuple, from_address_for_gas_estimation=None, value_in_wei=0) -> dict:
+        """ (辅助方法) 准备调用合约函数所需的交易数据 """
+        if not await cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。"}
+
+        try:
+            from_addr = cls.w3.to_checksum_address(
+                from_address_for_gas_estimation or BlockchainInterface.DUMMY_FROM_ADDRESS_FOR_GAS_ESTIMATION
+            )
+            calldata = encode_call(fn_name, *args)
+            tx_params_for_gas = {'from': from_addr, 'to': cls.contract.address, 'data': calldata}
+            if value_in_wei > 0:
+                tx_params_for_gas['value'] = value_in_wei
+            # 与同步接口共用估算入口: 两种来源的估算值都带安全余量
+            estimated_gas, gas_source = await GasEstimateCache.aestimate(
+                calldata, lambda: cls.w3.eth.estimate_gas(tx_params_for_gas),
+            )
+            return {
+                'to': cls.contract.address,
+                'data': calldata,
+                'estimated_gas': estimated_gas,
+                'gas_estimate_source': gas_source,
+                'value': value_in_wei,
+                'error': None
+            }
+        except Exception as e:
+            logger.error(f"准备交易数据失败 for {fn_name}: {e}")
+            return {"error": BlockchainInterface._format_prepare_error(e)}
+
+    @classmethod
+    async def _prepare(cls, fn_name: str, args_and_error: tuple, from_address: str = None, value_in_wei: int = 0) -> dict:
+        """ (辅助方法) 参数校验通过后准备交易数据 """
+        if not await cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。"}
+        args, error = args_and_error
+        if error:
+            return {"error": error}
+        return await cls._prepare_transaction_data(fn_name, args, from_address_for_gas_estimation=from_address, value_in_wei=value_in_wei)
+
+    @classmethod
+    async def prepare_register_user_tx(cls, name: str, email: str, from_address: str = None) -> dict:
+        """准备注册用户的交易数据"""
+        return await cls._prepare('registerUser', BlockchainInterface._register_user_args(name, email), from_address)
+
+    @classmethod
+    async def prepare_register_property_tx(cls, title: str, description: str, price: int, from_address: str = None) -> dict:
+        """准备注册房源的交易数据"""
+        return await cls._prepare('registerProperty', BlockchainInterface._register_property_args(title, description, price), from_address)
+
+    @classmethod
+    async def prepare_create_booking_tx(cls, property_id: int, start_date: int, end_date: int, from_address: str = None, value_in_wei: int = 0) -> dict:
+        """准备创建预订的交易数据"""
+        return await cls._prepare('createBooking', BlockchainInterface._create_booking_args(property_id, start_date, end_date), from_address, value_in_wei)
+
+    @classmethod
+    async def prepare_confirm_booking_tx(cls, booking_id: int, from_address: str = None) -> dict:
+        """准备确认预订的交易数据"""
+        return await cls._prepare('confirmBooking', BlockchainInterface._booking_id_args(booking_id), from_address)
+
+    @classmethod
+    async def prepare_complete_booking_tx(cls, booking_id: int, from_address: str = None) -> dict:
+        """准备完成预订的交易数据"""
+        return await cls._prepare('completeBooking', BlockchainInterface._booking_id_args(booking_id), from_address)
+
+    @classmethod
+    async def prepare_submit_review_tx(cls, property_id: int, rating: int, comment: str, from_address: str = None) -> dict:
+        """准备提交评价的交易数据"""
+        return await cls._prepare('submitReview', BlockchainInterface._submit_review_args(property_id, rating, comment), from_address)
@@ -0,0 +1,270 @@
+"""
+基准测试与压测的公共部分: 在本地 Hardhat 节点上部署 RentalPlatform 合约并填充数据、
+把 BlockchainInterface 指向该合约，以及延迟分位数统计。
+供 run_benchmarks 和 loadtest 管理命令使用，只能连接本地开发链 (依赖 hardhat_* 调试 RPC 方法)。
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from eth_account import Account
+from web3 import Web3
+import json
+import math
+import os
+
+from .async_blockchain_interface import AsyncBlockchainInterface
+from .blockchain_interface import BlockchainInterface
+from .contract_abi import get_contract_abi
+
+DAY = 86400
+# 本地链上每个测试账户的初始余额 (1000 ETH)
+ACCOUNT_BALANCE_WEI = 1000 * 10 ** 18
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """最近秩 (nearest-rank) 分位数，sorted_values 须已升序排列。"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    """把一组请求耗时 (秒) 汇总为吞吐量、错误率和毫秒级延迟分位数。"""
+    values = sorted(latencies)
+    count = len(values)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else None,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": ms(sum(values) / count) if count else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p90_ms": ms(percentile(values, 90)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else None,
+    }
+
+
+def load_contract_bytecode() -> str:
+    """从 Hardhat 编译产物 (npx hardhat compile) 读取合约部署字节码。"""
+    artifact_path = getattr(settings, 'RENTAL_PLATFORM_CONTRACT_ARTIFACT', None)
+    if not artifact_path or not os.path.exists(artifact_path):
+        raise RuntimeError(f"找不到合约编译产物: {artifact_path}，请先在项目根目录执行 npx hardhat compile。")
+    with open(artifact_path, encoding='utf-8') as f:
+        bytecode = json.load(f).get('bytecode')
+    if not bytecode or bytecode == '0x':
+        raise RuntimeError(f"合约编译产物中没有部署字节码: {artifact_path}")
+    return bytecode
+
+
+class LocalChain:
+    """
+    本地 Hardhat 节点 (npx hardhat node) 上的 RentalPlatform 测试部署。
+
+    测试账户由固定种子派生，通过 hardhat_setBalance 注资、hardhat_impersonateAccount 解锁，
+    因此账户数量不受节点内置账户个数限制；预订结束时间通过 evm_increaseTime 快进。
+    """
+    def __init__(self, rpc_url: str):
+        self.rpc_url = rpc_url
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 60}))
+        if not self.w3.is_connected():
+            raise RuntimeError(f"无法连接到本地区块链节点: {rpc_url}")
+        self.contract = None
+
+    def deploy(self) -> str:
+        """用节点的第一个内置账户部署合约，返回合约地址。"""
+        deployer = self.w3.eth.accounts[0]
+        factory = self.w3.eth.contract(abi=get_contract_abi(), bytecode=load_contract_bytecode())
+        receipt = self.w3.eth.wait_for_transaction_receipt(factory.constructor().transact({'from': deployer}))
+        self.contract = self.w3.eth.contract(address=receipt.contractAddress, abi=get_contract_abi())
+        return receipt.contractAddress
+
+    def create_account(self, label: str) -> str:
+        """派生一个固定的测试账户地址并解锁、注资。"""
+        address = Account.from_key(Web3.keccak(text=f'rental-platform-benchmark:{label}')).address
+        self.w3.provider.make_request('hardhat_setBalance', [address, hex(ACCOUNT_BALANCE_WEI)])
+        self.w3.provider.make_request('hardhat_impersonateAccount', [address])
+        return address
+
+    def transact(self, sender: str, fn_name: str, *args) -> str:
+        tx_hash = self.contract.functions[fn_name](*args).transact({'from': sender})
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            raise RuntimeError(f"填充数据时交易失败: {fn_name}{args}")
+        return tx_hash.hex()
+
+    def latest_timestamp(self) -> int:
+        return self.w3.eth.get_block('latest')['timestamp']
+
+    def increase_time(self, seconds: int):
+        self.w3.provider.make_request('evm_increaseTime', [seconds])
+        self.w3.provider.make_request('evm_mine', [])
+
+    def seed(self, users: int, properties: int, bookings: int, reviews: int) -> dict:
+        """
+        填充测试数据，返回各对象的链上ID、参与账户和交易哈希:
+        - users 个已注册用户，properties 个房源 (所有者轮流分配)；
+        - bookings 个已确认并完成的预订 (租客与房源所有者不同)，其中前 reviews 个带有评价；
+        - 另外两个备用房源: spare_available 仍可预订且带有一个待确认预订 (pending_booking)，
+          spare_occupied 带有一个已确认、已到期但未完成的预订 (ended_booking)，
+          用于基准测试 createBooking/confirmBooking/completeBooking 的交易准备。
+        """
+        if users < 2:
+            raise ValueError("至少需要 2 个用户 (房东与租客)。")
+        reviews = min(reviews, bookings)
+        seeded = {"users": [], "properties": [], "bookings": [], "reviews": [], "transactions": []}
+
+        for index in range(users):
+            address = self.create_account(f'user-{index}')
+            seeded["transactions"].append(('identity', self.transact(address, 'registerUser', f'测试用户{index}', f'user{index}@example.com')))
+            seeded["users"].append(address)
+
+        def register_property(owner, title):
+            seeded["transactions"].append(('property', self.transact(owner, 'registerProperty', title, f'{title}，基准测试数据。', 100)))
+            property_id = self.contract.functions.propertyCount().call()
+            seeded["properties"].append({"id": property_id, "owner": owner, "title": title})
+            return property_id
+
+        for index in range(properties):
+            register_property(seeded["users"][index % users], f'测试房源{index}')
+        spare_available = register_property(seeded["users"][0], '备用房源A')
+        spare_occupied = register_property(seeded["users"][0], '备用房源B')
+
+        def create_booking(property_id, owner_index, tenant, start, end):
+            seeded["transactions"].append(('booking', self.transact(tenant, 'createBooking', property_id, start, end)))
+            booking = {
+                "id": self.contract.functions.bookingCount().call(), "property_id": property_id,
+                "owner": seeded["users"][owner_index], "tenant": tenant, "start": start, "end": end,
+            }
+            seeded["bookings"].append(booking)
+            return booking
+
+        start = self.latest_timestamp() + DAY
+        completed = []
+        for index in range(bookings):
+            property_index = index % properties
+            owner_index = property_index % users
+            tenant = seeded["users"][(owner_index + 1 + index // properties) % users]
+            if tenant == seeded["users"][owner_index]:
+                tenant = seeded["users"][(owner_index + 1) % users]
+            completed.append(create_booking(property_index + 1, owner_index, tenant, start + index * DAY, start + index * DAY + 2 * DAY))
+        ended = create_booking(spare_occupied, 0, seeded["users"][1], start, start + DAY)
+
+        for booking in completed + [ended]:
+            self.transact(booking["owner"], 'confirmBooking', booking["id"])
+        self.increase_time((bookings + 3) * DAY)
+        for booking in completed:
+            self.transact(booking["tenant"], 'completeBooking', booking["id"])
+            booking["status"] = 'completed'
+        ended["status"] = 'confirmed'
+
+        for index, booking in enumerate(completed[:reviews]):
+            rating = index % 5 + 1
+            seeded["transactions"].append(('review', self.transact(booking["tenant"], 'submitReview', booking["property_id"], rating, '基准测试评价')))
+            seeded["reviews"].append({"booking_id": booking["id"], "rating": rating})
+
+        now = self.latest_timestamp()
+        pending = create_booking(spare_available, 0, seeded["users"][1], now + DAY, now + 3 * DAY)
+        pending["status"] = 'pending'
+        seeded.update({
+            "spare_available": spare_available, "spare_occupied": spare_occupied,
+            "pending_booking": pending["id"], "ended_booking": ended["id"],
+        })
+        return seeded
+
+
+def point_interfaces_at_local_chain():
+    """
+    让 BlockchainInterface / AsyncBlockchainInterface 在下次调用时按当前 settings
+    (调用方已通过 override_settings 指向本地节点和新部署的合约) 重新初始化。
+    """
+    BlockchainInterface.w3 = None
+    BlockchainInterface.contract = None
+    BlockchainInterface.initialized = False
+    AsyncBlockchainInterface.w3 = None
+    AsyncBlockchainInterface.contract = None
+    AsyncBlockchainInterface._transport = None
+
+
+def mirror_to_database(seeded: dict) -> dict:
+    """
+    把链上测试数据镜像到本地数据库 (调用方负责使用测试数据库)，
+    使读取本地模型的接口也有数据可测。返回样本对象的主键。
+    """
+    from .models import BlockchainTransaction, Booking, Property, Review, User
+
+    users = {}
+    for index, address in enumerate(seeded["users"]):
+        users[address] = User.objects.create(
+            username=f'bench_user_{index}', email=f'user{index}@example.com',
+            blockchain_address=address, is_identity_verified=True,
+        )
+    properties = {}
+    for prop in seeded["properties"]:
+        properties[prop["id"]] = Property.objects.create(
+            owner=users[prop["owner"]], title=prop["title"], description=f'{prop["title"]}，基准测试数据。',
+            location='厦门', price_per_night=Decimal('100.00'), blockchain_property_id=str(prop["id"]), is_verified=True,
+        )
+    bookings = {}
+    for booking in seeded["bookings"]:
+        bookings[booking["id"]] = Booking.objects.create(
+            property=properties[booking["property_id"]], renter=users[booking["tenant"]],
+            check_in_date=datetime.fromtimestamp(booking["start"], timezone.utc).date(),
+            check_out_date=datetime.fromtimestamp(booking["end"], timezone.utc).date(),
+            total_price=Decimal('200.00'), status=booking["status"], blockchain_contract_id=str(booking["id"]),
+            contract_status=booking["status"],
+        )
+    for review in seeded["reviews"]:
+        booking = bookings[review["booking_id"]]
+        Review.objects.create(
+            booking=booking, reviewer=booking.renter, receiver=booking.property.owner,
+            rating=review["rating"], comment='基准测试评价', blockchain_verification=True,
+        )
+    first_user = users[seeded["users"][0]]
+    BlockchainTransaction.objects.bulk_create([
+        BlockchainTransaction(user=first_user, transaction_type=tx_type, transaction_hash=tx_hash, status='confirmed')
+        for tx_type, tx_hash in seeded["transactions"]
+    ])
+    first_property = properties[seeded["properties"][0]["id"]]
+    return {
+        "user": first_user.pk,
+        "owner": first_property.owner_id,
+        "property": first_property.pk,
+        "available_property": properties[seeded["spare_available"]].pk,
+    }
+
+
+@contextmanager
+def local_chain_environment(rpc_url: str, contract_address: str, cache_enabled: bool = True):
+    """
+    在测试数据库和指向本地链的配置下运行基准测试/压测，退出时销毁测试数据库。
+    链上只读缓存改用独立的进程内缓存，避免与共享缓存 (Redis 等) 中的真实数据混用。
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(
+            SEPOLIA_RPC_URL=rpc_url,
+            SEPOLIA_RPC_URLS=[],
+            RENTAL_PLATFORM_CONTRACT_ADDRESS=contract_address,
+            CACHES={**settings.CACHES, 'chain_benchmark': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+            BLOCKCHAIN_CACHE_ALIAS='chain_benchmark',
+            BLOCKCHAIN_CACHE_ENABLED=cache_enabled,
+        ):
+            point_interfaces_at_local_chain()
+            try:
+                yield
+            finally:
+                point_interfaces_at_local_chain()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -1,9 +1,20 @@
-from web3 import Web3, HTTPProvider
-# from web3.providers.http import HTTPProvider
+from web3 import Web3
 # from web3.middleware import geth_poa_middleware # 如果连接到 PoA 网络如 Sepolia, 可能需要
+from web3._utils.abi import get_abi_output_types
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from django.conf import settings
-# from hexbytes import HexBytes # HexBytes 可能不再直接需要，除非处理返回的字节数据
+from hexbytes import HexBytes
 import logging
+import math
+import threading
+
+from .calldata import encode_call
+from .chain_cache import ChainReadCache
+from .contract_abi import get_contract_abi
+from .gas_estimator import GasEstimateCache
+from .metrics import observe_rpc
+from .rpc_transport import FailoverHTTPProvider, NoHealthyEndpointError, PooledHTTPProvider, RPCHealthMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +28,9 @@ class BlockchainInterface:
     contract = None
     initialized = False
     error_message = None 
+    _health_monitor = None
+    _fetch_pool = None
+    _fetch_pool_lock = threading.Lock()
 
     DUMMY_FROM_ADDRESS_FOR_GAS_ESTIMATION = '0x0000000000000000000000000000000000000001' # 用于估算gas的虚拟地址
 
@@ -26,21 +40,42 @@ class BlockchainInterface:
             return True
         cls.error_message = None
         try:
-            if not settings.SEPOLIA_RPC_URL:
+            rpc_urls = cls.rpc_urls()
+            if not rpc_urls:
                 cls.error_message = "SEPOLIA_RPC_URL 未在 settings.py 中配置。"
                 logger.error(cls.error_message)
                 cls.initialized = False
                 return False
-            cls.w3 = Web3(HTTPProvider(settings.SEPOLIA_RPC_URL))
+            transport_options = dict(
+                pool_size=getattr(settings, 'BLOCKCHAIN_RPC_POOL_SIZE', 20),
+                timeout=getattr(settings, 'BLOCKCHAIN_RPC_TIMEOUT', 10),
+                max_retries=getattr(settings, 'BLOCKCHAIN_RPC_MAX_RETRIES', 2),
+                backoff_base=getattr(settings, 'BLOCKCHAIN_RPC_BACKOFF_BASE', 0.2),
+                backoff_max=getattr(settings, 'BLOCKCHAIN_RPC_BACKOFF_MAX', 2.0),
+            )
+            if len(rpc_urls) == 1:
+                provider = PooledHTTPProvider(rpc_urls[0], **transport_options)
+            else:
+                # 配置了多个节点: 按滚动延迟路由，失败切换节点，故障节点熔断
+                provider = FailoverHTTPProvider(
+                    rpc_urls,
+                    ewma_alpha=getattr(settings, 'BLOCKCHAIN_RPC_EWMA_ALPHA', 0.2),
+                    failure_threshold=getattr(settings, 'BLOCKCHAIN_RPC_CIRCUIT_FAILURES', 3),
+                    error_rate_threshold=getattr(settings, 'BLOCKCHAIN_RPC_CIRCUIT_ERROR_RATE', 0.5),
+                    cooldown=getattr(settings, 'BLOCKCHAIN_RPC_CIRCUIT_COOLDOWN', 30),
+                    max_block_lag=getattr(settings, 'BLOCKCHAIN_RPC_MAX_BLOCK_LAG', 5),
+                    **transport_options,
+                )
+            cls.w3 = Web3(provider)
             # 对于 POA 网络, 如 Sepolia, 如果遇到连接或 'extraData' 错误, 可能需要以下中间件:
             # from web3.middleware import geth_poa_middleware
             # cls.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
             if not cls.w3.is_connected():
-                cls.error_message = f"无法连接到区块链节点: {settings.SEPOLIA_RPC_URL}"
+                cls.error_message = f"无法连接到区块链节点: {cls.w3.provider}"
                 logger.error(cls.error_message)
                 cls.initialized = False
                 return False
-            if not settings.RENTAL_PLATFORM_CONTRACT_ADDRESS or not settings.RENTAL_PLATFORM_CONTRACT_ABI:
+            if not settings.RENTAL_PLATFORM_CONTRACT_ADDRESS or not get_contract_abi():
                 cls.error_message = "合约地址或 ABI 未在 settings.py 中正确配置。"
                 logger.error(cls.error_message)
                 cls.initialized = False
@@ -54,7 +89,7 @@ class BlockchainInterface:
                 return False
             cls.contract = cls.w3.eth.contract(
                 address=contract_address,
-                abi=settings.RENTAL_PLATFORM_CONTRACT_ABI
+                abi=get_contract_abi()
             )
             cls.initialized = True
             logger.info("区块链接口初始化成功。")
@@ -69,48 +104,114 @@ class BlockchainInterface:
     def get_error_message(cls):
         return cls.error_message
 
+    @staticmethod
+    def rpc_urls() -> list:
+        """配置的 RPC 节点列表: SEPOLIA_RPC_URLS (多个节点) 优先，否则为 SEPOLIA_RPC_URL"""
+        return list(getattr(settings, 'SEPOLIA_RPC_URLS', None) or ([settings.SEPOLIA_RPC_URL] if settings.SEPOLIA_RPC_URL else []))
+
     @classmethod
-    def is_ready(cls):
+    def _probe_health(cls) -> bool:
+        """ (辅助方法) 由后台健康探测线程调用：未初始化时执行初始化，否则探测节点是否可用 """
         if not cls.initialized:
-            cls._initialize_web3()
-        return cls.initialized and cls.w3 is not None and cls.contract is not None
+            return cls._initialize_web3()
+        try:
+            if isinstance(cls.w3.provider, FailoverHTTPProvider):
+                # 逐个探测所有节点: 刷新延迟统计，并让冷却结束的熔断节点试探恢复
+                if not cls.w3.provider.probe_endpoints():
+                    raise NoHealthyEndpointError("所有 RPC 节点均不可用 (熔断中)。")
+            else:
+                cls.w3.eth.block_number
+        except Exception as e:
+            cls.error_message = f"区块链节点暂不可用: {e}"
+            raise
+        cls.error_message = None
+        return True
+
+    @classmethod
+    def _get_health_monitor(cls) -> RPCHealthMonitor:
+        if cls._health_monitor is None:
+            cls._health_monitor = RPCHealthMonitor(
+                cls._probe_health,
+                getattr(settings, 'BLOCKCHAIN_RPC_HEALTH_INTERVAL', 15),
+                failure_threshold=getattr(settings, 'BLOCKCHAIN_RPC_HEALTH_FAILURES', 2),
+                retry_interval=getattr(settings, 'BLOCKCHAIN_RPC_HEALTH_RETRY_INTERVAL', 2),
+            )
+            cls._health_monitor.start()
+        return cls._health_monitor
+
+    @classmethod
+    def is_ready(cls):
+        # 初始化与重连都由后台健康探测线程完成，请求线程只读取探测结果；
+        # 仅在进程内第一次调用时等待首次探测结束 (最多一个 RPC 超时时长)
+        monitor = cls._get_health_monitor()
+        if not monitor.first_probe_done.is_set():
+            monitor.first_probe_done.wait(getattr(settings, 'BLOCKCHAIN_RPC_TIMEOUT', 10))
+        return cls.initialized and monitor.healthy and cls.w3 is not None and cls.contract is not None
 
     # --- 合约读取方法 (保持不变) ---
+    @staticmethod
+    def _format_user_info(user_data_tuple) -> dict:
+        return {
+            "name": user_data_tuple[0],
+            "email": user_data_tuple[1],
+            "isVerified": user_data_tuple[2],
+            "reputation": user_data_tuple[3],
+            "joinDate": user_data_tuple[4],
+            "error": None
+        }
+
+    @staticmethod
+    def _format_property_info(prop_data_tuple) -> dict:
+        return {
+            "owner": prop_data_tuple[0],
+            "title": prop_data_tuple[1],
+            "description": prop_data_tuple[2],
+            "price": prop_data_tuple[3],
+            "isAvailable": prop_data_tuple[4],
+            "bookingIds": list(prop_data_tuple[5]),
+            "reputation": prop_data_tuple[6],
+            "error": None
+        }
+
     @classmethod
     def get_user_info(cls, user_address: str) -> dict:
         if not cls.is_ready():
             return {"error": cls.get_error_message() or "区块链接口未初始化。"}
         try:
             checksum_user_address = cls.w3.to_checksum_address(user_address)
-            user_data_tuple = cls.contract.functions.getUserInfo(checksum_user_address).call()
-            return {
-                "name": user_data_tuple[0],
-                "email": user_data_tuple[1],
-                "isVerified": user_data_tuple[2],
-                "reputation": user_data_tuple[3],
-                "joinDate": user_data_tuple[4],
-                "error": None
-            }
         except Exception as e:
             logger.error(f"获取用户信息失败 ({user_address}): {e}")
             return {"error": str(e)}
+        return ChainReadCache.get_or_fetch(
+            'getUserInfo', [checksum_user_address], ChainReadCache.user_scopes(checksum_user_address),
+            cls.w3, lambda: cls._fetch_user_info(checksum_user_address)
+        )
+
+    @classmethod
+    def _fetch_user_info(cls, checksum_user_address: str) -> dict:
+        try:
+            with observe_rpc('getUserInfo'):
+                user_data_tuple = cls.contract.functions.getUserInfo(checksum_user_address).call()
+            return cls._format_user_info(user_data_tuple)
+        except Exception as e:
+            logger.error(f"获取用户信息失败 ({checksum_user_address}): {e}")
+            return {"error": str(e)}
 
     @classmethod
     def get_property_info(cls, property_id: int) -> dict:
         if not cls.is_ready():
             return {"error": cls.get_error_message() or "区块链接口未初始化。"}
+        return ChainReadCache.get_or_fetch(
+            'getPropertyInfo', [property_id], ChainReadCache.property_scopes(property_id),
+            cls.w3, lambda: cls._fetch_property_info(property_id)
+        )
+
+    @classmethod
+    def _fetch_property_info(cls, property_id: int) -> dict:
         try:
-            prop_data_tuple = cls.contract.functions.getPropertyInfo(property_id).call()
-            return {
-                "owner": prop_data_tuple[0],
-                "title": prop_data_tuple[1],
-                "description": prop_data_tuple[2],
-                "price": prop_data_tuple[3],
-                "isAvailable": prop_data_tuple[4],
-                "bookingIds": prop_data_tuple[5],
-                "reputation": prop_data_tuple[6],
-                "error": None
-            }
+            with observe_rpc('getPropertyInfo'):
+                prop_data_tuple = cls.contract.functions.getPropertyInfo(property_id).call()
+            return cls._format_property_info(prop_data_tuple)
         except Exception as e:
             logger.error(f"获取房源信息失败 (ID: {property_id}): {e}")
             return {"error": str(e)}
@@ -119,139 +220,412 @@ class BlockchainInterface:
     def get_property_count(cls) -> dict:
         if not cls.is_ready():
             return {"error": cls.get_error_message() or "区块链接口未初始化。", "count": None}
+        return ChainReadCache.get_or_fetch('propertyCount', [], ChainReadCache.PROPERTY_COUNT_SCOPES, cls.w3, cls._fetch_property_count)
+
+    @classmethod
+    def _fetch_property_count(cls) -> dict:
         try:
-            count = cls.contract.functions.propertyCount().call()
+            with observe_rpc('propertyCount'):
+                count = cls.contract.functions.propertyCount().call()
             return {"count": count, "error": None}
         except Exception as e:
             logger.error(f"获取房源总数失败: {e}")
             return {"error": str(e), "count": None}
 
+    # --- 批量读取方法 (JSON-RPC 批处理，多个 eth_call 合并为一次 HTTP 往返) ---
+    @classmethod
+    def _batch_call(cls, contract_function_calls: list) -> list:
+        """
+        (辅助方法) 将多个只读合约调用打包成 JSON-RPC 批量请求。
+        返回与输入顺序一致的 (解码结果, 错误信息) 列表，单个调用 revert 不影响其他调用。
+        """
+        batch_size = getattr(settings, 'BLOCKCHAIN_RPC_BATCH_SIZE', 100)
+        results = []
+        for start in range(0, len(contract_function_calls), batch_size):
+            chunk = contract_function_calls[start:start + batch_size]
+            payload = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "eth_call",
+                    "params": [{"to": cls.contract.address, "data": call._encode_transaction_data()}, "latest"],
+                }
+                for request_id, call in enumerate(chunk)
+            ]
+            # 同一批中的调用通常是同一个合约函数，按首个调用的函数名记录 (如 batch:getPropertyInfo)
+            with observe_rpc(f"batch:{chunk[0].fn_name}"):
+                responses = cls.w3.provider.make_batch_request(payload)
+            if isinstance(responses, dict):
+                # 节点拒绝了整个批量请求 (例如不支持批处理或触发限流)
+                message = responses.get("error", {}).get("message", str(responses))
+                results.extend((None, message) for _ in chunk)
+                continue
+            responses_by_id = {response.get("id"): response for response in responses}
+            for request_id, call in enumerate(chunk):
+                response = responses_by_id.get(request_id)
+                if response is None:
+                    results.append((None, "节点未返回该调用的结果。"))
+                elif response.get("error"):
+                    results.append((None, response["error"].get("message", str(response["error"]))))
+                else:
+                    try:
+                        output_types = get_abi_output_types(call.abi)
+                        decoded = cls.w3.codec.decode(output_types, HexBytes(response["result"]))
+                        results.append((decoded[0] if len(decoded) == 1 else decoded, None))
+                    except Exception as e:
+                        results.append((None, f"解码返回数据失败: {e}"))
+        return results
+
+    @classmethod
+    def get_properties_batch(cls, property_ids: list) -> dict:
+        """批量获取房源信息。items 与 property_ids 顺序一致，每项单独携带 error。"""
+        if not cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "items": []}
+        try:
+            calls = [cls.contract.functions.getPropertyInfo(property_id) for property_id in property_ids]
+            items = []
+            for property_id, (prop_data_tuple, error) in zip(property_ids, cls._batch_call(calls)):
+                item = {"error": error} if error else cls._format_property_info(prop_data_tuple)
+                items.append({"id": property_id, **item})
+            return {"items": items, "error": None}
+        except Exception as e:
+            logger.error(f"批量获取房源信息失败 ({len(property_ids)} 个): {e}")
+            return {"error": str(e), "items": []}
+
+    @classmethod
+    def _get_fetch_pool(cls) -> ThreadPoolExecutor:
+        """ (辅助方法) 进程内共享的有界线程池，限制同时进行的批量读取数量 """
+        if cls._fetch_pool is None:
+            with cls._fetch_pool_lock:
+                if cls._fetch_pool is None:
+                    cls._fetch_pool = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'BLOCKCHAIN_FETCH_WORKERS', 4),
+                        thread_name_prefix='chain-fetch',
+                    )
+        return cls._fetch_pool
+
+    @classmethod
+    def fetch_batches_concurrently(cls, batch_fn, keys: list) -> dict:
+        """
+        把 keys 切分成若干批，由共享线程池并发调用 batch_fn (如 get_properties_batch)，
+        按 keys 原顺序合并各批的 items。任一批整体失败时返回该批的 error。
+        """
+        workers = getattr(settings, 'BLOCKCHAIN_FETCH_WORKERS', 4)
+        chunk_size = max(1, min(getattr(settings, 'BLOCKCHAIN_RPC_BATCH_SIZE', 100), math.ceil(len(keys) / workers)))
+        chunks = [keys[start:start + chunk_size] for start in range(0, len(keys), chunk_size)]
+        # 每个任务在调用方上下文的副本中运行，使线程池中的 RPC 调用也计入当前请求的统计
+        futures = [cls._get_fetch_pool().submit(contextvars.copy_context().run, batch_fn, chunk) for chunk in chunks]
+        items = []
+        for batch_info in (future.result() for future in futures):
+            if batch_info.get('error'):
+                return {"error": batch_info['error'], "items": []}
+            items.extend(batch_info['items'])
+        return {"items": items, "error": None}
+
+    @classmethod
+    def get_properties_range(cls, offset: int, limit: int, include_booking_ids: bool = False) -> dict:
+        """
+        分页获取房源目录 (房源ID从 1 开始连续编号)。
+        先读取一次 propertyCount，再把 [offset+1, offset+limit] 范围内的ID切分成若干批，
+        由共享线程池并发发送 JSON-RPC 批量请求。
+        默认只返回 bookingCount，include_booking_ids 为 True 时才返回完整的 bookingIds 列表。
+        """
+        if not cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "total": None, "items": []}
+        count_info = cls.get_property_count()
+        if count_info.get('error'):
+            return {"error": count_info['error'], "total": None, "items": []}
+        total = count_info['count']
+        property_ids = list(range(offset + 1, min(total, offset + limit) + 1))
+        if not property_ids:
+            return {"total": total, "items": [], "error": None}
+
+        batch_info = cls.fetch_batches_concurrently(cls.get_properties_batch, property_ids)
+        if batch_info.get('error'):
+            return {"error": batch_info['error'], "total": total, "items": []}
+        items = batch_info['items']
+
+        if not include_booking_ids:
+            for item in items:
+                if item.get('error') is None:
+                    item['bookingCount'] = len(item.pop('bookingIds'))
+        return {"total": total, "items": items, "error": None}
+
+    @classmethod
+    def get_users_batch(cls, user_addresses: list) -> dict:
+        """批量获取用户信息。items 与 user_addresses 顺序一致，每项单独携带 error。"""
+        if not cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "items": []}
+        try:
+            items = []
+            calls = []
+            valid_addresses = []
+            for user_address in user_addresses:
+                if not Web3.is_address(user_address):
+                    continue
+                valid_addresses.append(user_address)
+                calls.append(cls.contract.functions.getUserInfo(cls.w3.to_checksum_address(user_address)))
+            fetched = dict(zip(valid_addresses, cls._batch_call(calls)))
+            for user_address in user_addresses:
+                if user_address not in fetched:
+                    items.append({"address": user_address, "error": "无效的用户地址格式。"})
+                    continue
+                user_data_tuple, error = fetched[user_address]
+                item = {"error": error} if error else cls._format_user_info(user_data_tuple)
+                items.append({"address": user_address, **item})
+            return {"items": items, "error": None}
+        except Exception as e:
+            logger.error(f"批量获取用户信息失败 ({len(user_addresses)} 个): {e}")
+            return {"error": str(e), "items": []}
+
+    @staticmethod
+    def _format_booking_info(booking_data_tuple) -> dict:
+        return {
+            "tenant": booking_data_tuple[0],
+            "propertyId": booking_data_tuple[1],
+            "startDate": booking_data_tuple[2],
+            "endDate": booking_data_tuple[3],
+            "totalPrice": booking_data_tuple[4],
+            "isConfirmed": booking_data_tuple[5],
+            "isCompleted": booking_data_tuple[6],
+            "error": None
+        }
+
+    @classmethod
+    def get_bookings_batch(cls, booking_ids: list) -> dict:
+        """批量获取预订信息。items 与 booking_ids 顺序一致，每项单独携带 error。"""
+        if not cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "items": []}
+        try:
+            calls = [cls.contract.functions.getBookingInfo(booking_id) for booking_id in booking_ids]
+            items = []
+            for booking_id, (booking_data_tuple, error) in zip(booking_ids, cls._batch_call(calls)):
+                item = {"error": error} if error else cls._format_booking_info(booking_data_tuple)
+                items.append({"id": booking_id, **item})
+            return {"items": items, "error": None}
+        except Exception as e:
+            logger.error(f"批量获取预订信息失败 ({len(booking_ids)} 个): {e}")
+            return {"error": str(e), "items": []}
+
     # --- 交易数据准备方法 (用于前端签名和发送) ---
+    @staticmethod
+    def _format_prepare_error(e: Exception) -> str:
+        """ (辅助方法) 从异常中提取尽量具体的错误信息，例如合约 revert 原因 """
+        error_reason = str(e)
+        if hasattr(e, 'message') and e.message:
+             if isinstance(e.message, str) and "revert" in e.message.lower():
+                try:
+                    # 尝试从错误消息中提取 revert 原因（这部分可能需要根据具体错误格式调整）
+                    # 示例: "execution reverted: User already registered"
+                    reason_start = e.message.lower().find("revert")
+                    if reason_start != -1:
+                        error_reason = e.message[reason_start + len("revert"):].strip()
+                        if error_reason.startswith(":"):
+                            error_reason = error_reason[1:].strip()
+                except Exception as parse_err:
+                    logger.debug(f"解析 revert 原因失败: {parse_err}")
+        return f"准备交易时出错: {error_reason}"
+
+    @classmethod
+    def _estimate_gas(cls, tx_params_for_gas: dict, simulate: bool = False):
+        """
+        (辅助方法) 返回 (带安全余量的 gas 估算值, 来源)，见 GasEstimateCache.estimate。
+        """
+        return GasEstimateCache.estimate(
+            tx_params_for_gas['data'], lambda: cls.w3.eth.estimate_gas(tx_params_for_gas), simulate=simulate,
+        )
+
     @classmethod
-    def _prepare_transaction_data(cls, contract_function_call, from_address_for_gas_estimation=None, value_in_wei=0) -> dict:
+    def _prepare_transaction_data(cls, fn_name: str, args: tuple, from_address_for_gas_estimation=None, value_in_wei=0) -> dict:
         """ (辅助方法) 准备调用合约函数所需的交易数据 """
         if not cls.is_ready():
             return {"error": cls.get_error_message() or "区块链接口未初始化。"}
         
-        from_addr = cls.w3.to_checksum_address(from_address_for_gas_estimation or cls.DUMMY_FROM_ADDRESS_FOR_GAS_ESTIMATION)
-
         try:
+            # 无效地址会在此抛出 ValueError，与其他准备错误一样以 error 返回，而不是冒泡成 500
+            from_addr = cls.w3.to_checksum_address(from_address_for_gas_estimation or cls.DUMMY_FROM_ADDRESS_FOR_GAS_ESTIMATION)
+
+            # calldata 由离线编码器根据预计算的函数选择器直接编码，不经过 web3 合约对象，也不访问节点
+            calldata = encode_call(fn_name, *args)
+
             # 准备基础交易参数以估算 gas
             tx_params_for_gas = {
                 'from': from_addr,
-                # 'to': cls.contract.address, # build_transaction 会自动填充 to
+                'to': cls.contract.address,
+                'data': calldata,
             }
             if value_in_wei > 0:
                 tx_params_for_gas['value'] = value_in_wei
 
-            estimated_gas = contract_function_call.estimate_gas(tx_params_for_gas)
+            estimated_gas, gas_source = cls._estimate_gas(tx_params_for_gas)
             
             # 构建交易数据 (不包含 nonce, gasPrice, from - 这些由前端钱包处理)
             # 我们主要提供 to 和 data, 以及 value 和 estimated_gas 作为建议
             transaction_data = {
                 'to': cls.contract.address,
-                'data': contract_function_call.build_transaction(tx_params_for_gas)['data'], # 只取data字段
+                'data': calldata,
                 'estimated_gas': estimated_gas,
+                'gas_estimate_source': gas_source, # 'cache' 或 'live'
                 'value': value_in_wei, # 如果函数是 payable
                 'error': None
             }
             return transaction_data
         except Exception as e:
-            logger.error(f"准备交易数据失败 for {contract_function_call.fn_name}: {e}")
-            # 尝试获取更具体的错误信息，例如合约 revert 原因
-            error_reason = str(e)
-            if hasattr(e, 'message') and e.message:
-                 if isinstance(e.message, str) and "revert" in e.message.lower():
-                    try:
-                        # 尝试从错误消息中提取 revert 原因（这部分可能需要根据具体错误格式调整）
-                        # 示例: "execution reverted: User already registered"
-                        reason_start = e.message.lower().find("revert")
-                        if reason_start != -1:
-                            error_reason = e.message[reason_start + len("revert"):].strip()
-                            if error_reason.startswith(":"):
-                                error_reason = error_reason[1:].strip()
-                    except Exception as parse_err:
-                        logger.debug(f"解析 revert 原因失败: {parse_err}")
-            return {"error": f"准备交易时出错: {error_reason}"}
+            logger.error(f"准备交易数据失败 for {fn_name}: {e}")
+            return {"error": cls._format_prepare_error(e)}
+
+    # 以下 _*_args 方法只做参数校验和类型转换，返回 (合约函数参数元组, 错误信息)，
+    # 由同步和异步 (AsyncBlockchainInterface) 两套 prepare_* 方法共用。
+    @staticmethod
+    def _register_user_args(name: str, email: str):
+        if not name or not email:
+            return None, "用户名和邮箱不能为空。"
+        return (name, email), None
+
+    @staticmethod
+    def _register_property_args(title: str, description: str, price: int):
+        if not all([title, description, price is not None]):
+            return None, "房源标题、描述和价格不能为空。"
+        try:
+            price = int(price)
+        except (TypeError, ValueError):
+            return None, "价格必须是有效的数字。"
+        return (title, description, price), None
+
+    @staticmethod
+    def _create_booking_args(property_id: int, start_date: int, end_date: int):
+        if not all([property_id is not None, start_date is not None, end_date is not None]):
+            return None, "property_id, start_date, 和 end_date 不能为空。"
+        try:
+            property_id = int(property_id)
+            start_date = int(start_date)
+            end_date = int(end_date)
+        except (TypeError, ValueError):
+            return None, "property_id, start_date, end_date 必须是有效数字。"
+        return (property_id, start_date, end_date), None
+
+    @staticmethod
+    def _booking_id_args(booking_id: int):
+        try:
+            booking_id = int(booking_id)
+        except (TypeError, ValueError):
+            return None, "booking_id 必须是有效数字。"
+        return (booking_id,), None
+
+    @staticmethod
+    def _submit_review_args(property_id: int, rating: int, comment: str):
+        if not all([property_id is not None, rating is not None]):
+            return None, "property_id 和 rating 不能为空。"
+        try:
+            property_id = int(property_id)
+            rating = int(rating)
+            if not (1 <= rating <= 5):
+                 return None, "评级必须在1到5之间。"
+        except (TypeError, ValueError):
+            return None, "property_id 和 rating 必须是有效数字。"
+        return (property_id, rating, comment), None
 
     @classmethod
     def prepare_register_user_tx(cls, name: str, email: str, from_address: str = None) -> dict:
         """准备注册用户的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        if not name or not email:
-            return {"error": "用户名和邮箱不能为空。"}
-        contract_function = cls.contract.functions.registerUser(name, email)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address)
+        args, error = cls._register_user_args(name, email)
+        if error:
+            return {"error": error}
+        return cls._prepare_transaction_data('registerUser', args, from_address_for_gas_estimation=from_address)
 
     @classmethod
     def prepare_register_property_tx(cls, title: str, description: str, price: int, from_address: str = None) -> dict:
         """准备注册房源的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        if not all([title, description, price is not None]):
-            return {"error": "房源标题、描述和价格不能为空。"}
-        try:
-            price = int(price)
-        except ValueError:
-            return {"error": "价格必须是有效的数字。"}
-        contract_function = cls.contract.functions.registerProperty(title, description, price)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address)
+        args, error = cls._register_property_args(title, description, price)
+        if error:
+            return {"error": error}
+        return cls._prepare_transaction_data('registerProperty', args, from_address_for_gas_estimation=from_address)
 
     @classmethod
     def prepare_create_booking_tx(cls, property_id: int, start_date: int, end_date: int, from_address: str = None, value_in_wei: int = 0) -> dict:
         """准备创建预订的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        if not all([property_id is not None, start_date is not None, end_date is not None]):
-            return {"error": "property_id, start_date, 和 end_date 不能为空。"}
-        try:
-            property_id = int(property_id)
-            start_date = int(start_date)
-            end_date = int(end_date)
-        except ValueError:
-            return {"error": "property_id, start_date, end_date 必须是有效数字。"}
+        args, error = cls._create_booking_args(property_id, start_date, end_date)
+        if error:
+            return {"error": error}
         
         # 假设 createBooking 合约函数不需要 msg.value (ETH支付)
         # 如果需要，前端在发送交易时应包含 value
         # 后端可以在这里也包含 value_in_wei (如果已知)
-        contract_function = cls.contract.functions.createBooking(property_id, start_date, end_date)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address, value_in_wei=value_in_wei)
+        return cls._prepare_transaction_data('createBooking', args, from_address_for_gas_estimation=from_address, value_in_wei=value_in_wei)
 
     @classmethod
     def prepare_confirm_booking_tx(cls, booking_id: int, from_address: str = None) -> dict:
         """准备确认预订的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        try:
-            booking_id = int(booking_id)
-        except ValueError:
-            return {"error": "booking_id 必须是有效数字。"}
-        contract_function = cls.contract.functions.confirmBooking(booking_id)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address)
+        args, error = cls._booking_id_args(booking_id)
+        if error:
+            return {"error": error}
+        return cls._prepare_transaction_data('confirmBooking', args, from_address_for_gas_estimation=from_address)
 
     @classmethod
     def prepare_complete_booking_tx(cls, booking_id: int, from_address: str = None) -> dict:
         """准备完成预订的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        try:
-            booking_id = int(booking_id)
-        except ValueError:
-            return {"error": "booking_id 必须是有效数字。"}
-        contract_function = cls.contract.functions.completeBooking(booking_id)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address)
+        args, error = cls._booking_id_args(booking_id)
+        if error:
+            return {"error": error}
+        return cls._prepare_transaction_data('completeBooking', args, from_address_for_gas_estimation=from_address)
 
     @classmethod
     def prepare_submit_review_tx(cls, property_id: int, rating: int, comment: str, from_address: str = None) -> dict:
         """准备提交评价的交易数据"""
         if not cls.is_ready(): return {"error": cls.get_error_message() or "区块链接口未初始化。"}
-        if not all([property_id is not None, rating is not None]):
-            return {"error": "property_id 和 rating 不能为空。"}
-        try:
-            property_id = int(property_id)
-            rating = int(rating)
-            if not (1 <= rating <= 5):
-                 return {"error": "评级必须在1到5之间。"}
-        except ValueError:
-            return {"error": "property_id 和 rating 必须是有效数字。"}
-        contract_function = cls.contract.functions.submitReview(property_id, rating, comment)
-        return cls._prepare_transaction_data(contract_function, from_address_for_gas_estimation=from_address)
+        args, error = cls._submit_review_args(property_id, rating, comment)
+        if error:
+            return {"error": error}
+        return cls._prepare_transaction_data('submitReview', args, from_address_for_gas_estimation=from_address)
+
+    # 批量准备支持的合约写入函数 -> (参数校验方法, {请求 JSON 字段名: 校验方法参数名})。
+    # 视图层的字段解析和这里的参数校验都由这一张表派生。
+    PREPARE_FUNCTIONS = {
+        'registerUser': ('_register_user_args', {'name': 'name', 'email': 'email'}),
+        'registerProperty': ('_register_property_args', {'title': 'title', 'description': 'description', 'price': 'price'}),
+        'createBooking': ('_create_booking_args', {'propertyId': 'property_id', 'startDate': 'start_date', 'endDate': 'end_date'}),
+        'confirmBooking': ('_booking_id_args', {'bookingId': 'booking_id'}),
+        'completeBooking': ('_booking_id_args', {'bookingId': 'booking_id'}),
+        'submitReview': ('_submit_review_args', {'propertyId': 'property_id', 'rating': 'rating', 'comment': 'comment'}),
+    }
+
+    @classmethod
+    def prepare_transactions_batch(cls, operations: list) -> dict:
+        """
+        批量准备多笔 (可不同函数的) 交易数据。operations 为 (函数名, 参数 dict, from_address, value_in_wei) 列表。
+        先逐项校验参数，校验失败的项不访问节点；其余项由共享的有界线程池并发估算 gas。
+        返回 {"items": [...], "error": None}，items 与输入顺序一致，每项为 _prepare_transaction_data 的结果 (失败时含 error)。
+        """
+        if not cls.is_ready():
+            return {"error": cls.get_error_message() or "区块链接口未初始化。", "items": []}
+
+        items = [None] * len(operations)
+        futures = {}
+        for index, (fn_name, params, from_address, value_in_wei) in enumerate(operations):
+            if fn_name not in cls.PREPARE_FUNCTIONS:
+                items[index] = {"error": f"不支持的合约函数: {fn_name}"}
+                continue
+            validator_name, fields = cls.PREPARE_FUNCTIONS[fn_name]
+            expected = set(fields.values())
+            if set(params) != expected:
+                items[index] = {"error": f"{fn_name} 的参数必须为: {', '.join(sorted(expected))}"}
+                continue
+            args, error = getattr(cls, validator_name)(**params)
+            if error:
+                items[index] = {"error": error}
+                continue
+            # 每个任务在调用方上下文的副本中运行，使线程池中的 RPC 调用也计入当前请求的统计
+            futures[index] = cls._get_fetch_pool().submit(
+                contextvars.copy_context().run, cls._prepare_transaction_data, fn_name, args, from_address, value_in_wei,
+            )
+        for index, future in futures.items():
+            items[index] = future.result()
+        return {"items": items, "error": None}
 
     # --- 映射旧的接口方法到新的准备方法 (如果Django视图还在使用旧名称) ---
     # 这些方法现在只准备交易数据，实际交易由前端处理。
@@ -0,0 +1,48 @@
+from eth_abi import encode
+from functools import lru_cache
+
+from .contract_abi import function_selectors
+
+# 需要由后端准备交易数据的合约写入函数
+WRITE_FUNCTIONS = (
+    'registerUser',
+    'registerProperty',
+    'createBooking',
+    'confirmBooking',
+    'completeBooking',
+    'submitReview',
+)
+
+class CalldataEncoder:
+    """
+    离线 calldata 编码器。
+
+    根据预计算的函数选择器表 (contract_abi.function_selectors) 取得各写入函数的 4 字节选择器和参数类型列表，
+    之后每次编码只需一次 eth_abi.encode，不经过 web3 合约对象的 ABI 查找、地址规范化等流程，
+    也不访问节点。输出与 contract.functions.X(...)._encode_transaction_data() 逐字节一致。
+    """
+    def __init__(self, selectors: dict, function_names=WRITE_FUNCTIONS):
+        self.functions = {}
+        for selector, abi_entry in selectors.items():
+            if abi_entry['name'] not in function_names:
+                continue
+            input_types = [abi_input['type'] for abi_input in abi_entry['inputs']]
+            self.functions[abi_entry['name']] = (bytes.fromhex(selector[2:]), input_types)
+        missing = set(function_names) - set(self.functions)
+        if missing:
+            raise ValueError(f"合约 ABI 中缺少函数: {', '.join(sorted(missing))}")
+
+    def selector(self, fn_name: str) -> str:
+        return '0x' + self.functions[fn_name][0].hex()
+
+    def encode(self, fn_name: str, *args) -> str:
+        selector, input_types = self.functions[fn_name]
+        return '0x' + (selector + encode(input_types, args)).hex()
+
+@lru_cache(maxsize=1)
+def get_encoder() -> CalldataEncoder:
+    """进程内只构建一次编码器。"""
+    return CalldataEncoder(function_selectors())
+
+def encode_call(fn_name: str, *args) -> str:
+    return get_encoder().encode(fn_name, *args)
@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.core.cache import caches
+import hashlib
+import json
+import logging
+
+from .metrics import observe_rpc, record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+class ChainReadCache:
+    """
+    链上只读调用缓存 - 基于 Django 缓存框架的读穿透缓存。
+
+    缓存键由 函数名 + 参数 + 相关作用域版本号 + 链头区块号 组成:
+    - 链头区块号本身缓存 BLOCKCHAIN_CACHE_HEAD_SECONDS 秒，同一区块内的重复读取直接命中缓存；
+    - 事件索引器观察到 PropertyRegistered/Booking*/ReviewSubmitted/UserRegistered 事件时，
+      递增对应作用域的版本号，使受影响的条目立即失效。
+    使用 Redis/Memcached 等共享缓存后端时，所有 gunicorn worker 共享同一份缓存。
+    命中统计只在进程内计数 (metrics.CACHE_LOOKUPS，由 /metrics 汇总各 worker)，读取路径上不写共享缓存。
+    """
+    KEY_PREFIX = 'chain_read'
+    PROPERTY_COUNT_SCOPES = ['property_count']
+    # 各作用域 (按 ":" 前的前缀) 可能被哪些链上事件改变，与 invalidate_for_event 保持一致
+    SCOPE_EVENT_TYPES = {
+        'user': ('UserRegistered',),
+        'property': ('PropertyRegistered', 'BookingCreated', 'BookingConfirmed', 'BookingCompleted', 'ReviewSubmitted'),
+        'property_count': ('PropertyRegistered',),
+    }
+
+    # --- 各只读调用受哪些作用域影响 (缓存键和条件请求共用) ---
+    @staticmethod
+    def user_scopes(checksum_user_address: str) -> list:
+        return [f"user:{checksum_user_address.lower()}"]
+
+    @staticmethod
+    def property_scopes(property_id: int) -> list:
+        return ['property', f"property:{property_id}"]
+
+    @classmethod
+    def scope_event_types(cls, scopes: list) -> list:
+        """可能改变这些作用域数据的事件类型 (有序、去重)。"""
+        event_types = []
+        for scope in scopes:
+            for event_type in cls.SCOPE_EVENT_TYPES[scope.split(':')[0]]:
+                if event_type not in event_types:
+                    event_types.append(event_type)
+        return event_types
+
+    @classmethod
+    def _cache(cls):
+        return caches[getattr(settings, 'BLOCKCHAIN_CACHE_ALIAS', 'default')]
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return getattr(settings, 'BLOCKCHAIN_CACHE_ENABLED', True)
+
+    @classmethod
+    def _version_key(cls, scope: str) -> str:
+        return f'{cls.KEY_PREFIX}:version:{scope}'
+
+    @classmethod
+    def current_head(cls, w3) -> int:
+        """返回缓存的链头区块号，过期后才向节点查询一次 eth_blockNumber。"""
+        head_key = f'{cls.KEY_PREFIX}:head'
+        head = cls._cache().get(head_key)
+        if head is None:
+            with observe_rpc('eth_blockNumber'):
+                head = w3.eth.block_number
+            cls._cache().set(head_key, head, getattr(settings, 'BLOCKCHAIN_CACHE_HEAD_SECONDS', 12))
+        return head
+
+    @classmethod
+    def _incr(cls, key: str):
+        cache = cls._cache()
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 键在 add 与 incr 之间被淘汰，重新计数即可
+            cache.set(key, 1, None)
+
+    @classmethod
+    def _entry_key(cls, fn_name: str, args: list, head: int, version_keys: list, versions: dict) -> str:
+        version_part = '.'.join(str(versions.get(key, 0)) for key in version_keys)
+        args_digest = hashlib.sha1(json.dumps(args, default=str).encode()).hexdigest()
+        return f'{cls.KEY_PREFIX}:{fn_name}:{head}:{version_part}:{args_digest}'
+
+    @classmethod
+    def get_or_fetch(cls, fn_name: str, args: list, scopes: list, w3, fetch) -> dict:
+        """
+        读穿透: 命中则直接返回缓存结果，否则调用 fetch() 并缓存成功的结果 (带 error 的结果不缓存)。
+        """
+        if not cls.is_enabled():
+            return fetch()
+        cache = cls._cache()
+        try:
+            head = cls.current_head(w3)
+        except Exception as e:
+            logger.warning(f"获取链头区块号失败，跳过缓存: {e}")
+            return fetch()
+
+        version_keys = [cls._version_key(scope) for scope in scopes]
+        key = cls._entry_key(fn_name, args, head, version_keys, cache.get_many(version_keys))
+
+        cached = cache.get(key)
+        record_cache_lookup(fn_name, cached is not None)
+        if cached is not None:
+            return cached
+        result = fetch()
+        if not result.get('error'):
+            cache.set(key, result, getattr(settings, 'BLOCKCHAIN_CACHE_TTL', 300))
+        return result
+
+    # --- 异步版本 (供 AsyncBlockchainInterface 使用，键格式与同步版本一致，两者共享缓存条目) ---
+    @classmethod
+    async def acurrent_head(cls, w3) -> int:
+        head_key = f'{cls.KEY_PREFIX}:head'
+        head = await cls._cache().aget(head_key)
+        if head is None:
+            with observe_rpc('eth_blockNumber'):
+                head = await w3.eth.block_number
+            await cls._cache().aset(head_key, head, getattr(settings, 'BLOCKCHAIN_CACHE_HEAD_SECONDS', 12))
+        return head
+
+    @classmethod
+    async def aget_or_fetch(cls, fn_name: str, args: list, scopes: list, w3, fetch) -> dict:
+        """get_or_fetch 的异步版本，fetch 为返回协程的可调用对象。"""
+        if not cls.is_enabled():
+            return await fetch()
+        cache = cls._cache()
+        try:
+            head = await cls.acurrent_head(w3)
+        except Exception as e:
+            logger.warning(f"获取链头区块号失败，跳过缓存: {e}")
+            return await fetch()
+
+        version_keys = [cls._version_key(scope) for scope in scopes]
+        key = cls._entry_key(fn_name, args, head, version_keys, await cache.aget_many(version_keys))
+
+        cached = await cache.aget(key)
+        record_cache_lookup(fn_name, cached is not None)
+        if cached is not None:
+            return cached
+        result = await fetch()
+        if not result.get('error'):
+            await cache.aset(key, result, getattr(settings, 'BLOCKCHAIN_CACHE_TTL', 300))
+        return result
+
+    @classmethod
+    def invalidate(cls, *scopes: str):
+        for scope in scopes:
+            cls._incr(cls._version_key(scope))
+
+    @classmethod
+    def invalidate_for_event(cls, event_type: str, args: dict):
+        """根据链上事件使相关缓存条目失效。"""
+        if event_type == 'UserRegistered':
+            cls.invalidate(*cls.user_scopes(str(args.get('user', ''))))
+        elif event_type == 'PropertyRegistered':
+            cls.invalidate(f"property:{args.get('propertyId')}", *cls.PROPERTY_COUNT_SCOPES)
+        elif event_type in ('BookingCreated', 'ReviewSubmitted'):
+            cls.invalidate(f"property:{args.get('propertyId')}")
+        elif event_type in ('BookingConfirmed', 'BookingCompleted'):
+            # 这两个事件只包含 bookingId，通过已索引的 BookingCreated 事件找到所属房源 (由 contract_event_booking_id_idx 定位)
+            from .models import ContractEvent
+            created = ContractEvent.objects.filter(
+                event_type='BookingCreated', args__bookingId=args.get('bookingId')
+            ).first()
+            if created is not None:
+                cls.invalidate(f"property:{created.args.get('propertyId')}")
+            else:
+                cls.invalidate('property')
@@ -0,0 +1,188 @@
+from abc import ABC, abstractmethod
+from django.db import transaction
+from django.utils import timezone
+from itertools import islice
+from web3 import Web3
+import logging
+
+from .blockchain_interface import BlockchainInterface
+from .models import Booking, Property, ReconcileCheckpoint, User
+
+logger = logging.getLogger(__name__)
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+class ChainReconciler(ABC):
+    """
+    数据库 ↔ 链上数据对账的基类。
+
+    按主键顺序用 .iterator(chunk_size) 流式读取本地记录，每 chunk_size 行:
+    1. 通过 BlockchainInterface.fetch_batches_concurrently 并发发送 JSON-RPC 批量请求读取对应链上记录；
+    2. 计算需要修正的字段，用一次 bulk_update 写回；
+    3. 在同一事务中把已处理的最大主键写入检查点 (ReconcileCheckpoint)。
+    中断后再次运行从检查点继续；完整跑完一遍后检查点复位，下次从头开始。
+    内存占用只与 chunk_size 有关，与表的总行数无关。
+    """
+    name = None
+    model = None
+    update_fields = []
+
+    def __init__(self, chunk_size: int = 500, dry_run: bool = False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+
+    @property
+    def checkpoint_name(self) -> str:
+        return f'reconcile_chain:{self.name}'
+
+    def get_checkpoint(self) -> ReconcileCheckpoint:
+        checkpoint, _ = ReconcileCheckpoint.objects.get_or_create(name=self.checkpoint_name)
+        return checkpoint
+
+    def reset_checkpoint(self):
+        ReconcileCheckpoint.objects.filter(name=self.checkpoint_name).update(last_pk=0, updated_at=timezone.now())
+
+    @abstractmethod
+    def queryset(self):
+        """需要对账的本地记录 (只取对账用到的字段)。"""
+
+    @abstractmethod
+    def chain_key(self, obj):
+        """返回用于链上查询的键 (房源/预订ID 或地址)；无法查询时返回 None。"""
+
+    @abstractmethod
+    def fetch(self, keys: list) -> dict:
+        """批量读取链上记录，返回 {"items": [...], "error": ...}，items 与 keys 顺序一致。"""
+
+    @abstractmethod
+    def apply(self, obj, chain_item: dict) -> bool:
+        """根据链上记录修正 obj 的字段，返回是否有修改。"""
+
+    def run(self) -> dict:
+        stats = {'checked': 0, 'corrected': 0, 'skipped': 0, 'errors': 0}
+        if self.dry_run:
+            # 演练不写数据库，也不创建检查点行
+            checkpoint = ReconcileCheckpoint.objects.filter(name=self.checkpoint_name).first()
+            start_after = checkpoint.last_pk if checkpoint else 0
+        else:
+            start_after = self.get_checkpoint().last_pk
+        rows = self.queryset().filter(pk__gt=start_after).order_by('pk').iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._reconcile_chunk(chunk, stats)
+        if not self.dry_run:
+            self.reset_checkpoint()
+        return stats
+
+    def _reconcile_chunk(self, chunk: list, stats: dict):
+        """ (辅助方法) 对账一批记录并推进检查点 """
+        keyed = [(obj, self.chain_key(obj)) for obj in chunk]
+        queryable = [(obj, key) for obj, key in keyed if key is not None]
+        stats['skipped'] += len(keyed) - len(queryable)
+
+        batch_info = self.fetch([key for _, key in queryable]) if queryable else {"items": [], "error": None}
+        if batch_info.get('error'):
+            # 整批失败时不推进检查点，下次运行从这一批重新开始
+            raise RuntimeError(f"批量读取链上{self.name}数据失败: {batch_info['error']}")
+
+        changed = []
+        for (obj, _), chain_item in zip(queryable, batch_info['items']):
+            stats['checked'] += 1
+            if chain_item.get('error'):
+                stats['errors'] += 1
+                logger.warning(f"读取链上{self.name}失败 (pk={obj.pk}): {chain_item['error']}")
+                continue
+            if self.apply(obj, chain_item):
+                changed.append(obj)
+        stats['corrected'] += len(changed)
+
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            if changed:
+                self.model.objects.bulk_update(changed, self.update_fields)
+            ReconcileCheckpoint.objects.filter(name=self.checkpoint_name).update(last_pk=chunk[-1].pk, updated_at=timezone.now())
+
+class PropertyReconciler(ChainReconciler):
+    """
+    房源: 链上存在该 blockchain_property_id 且所有者与本地所有者的钱包地址一致
+    (本地未记录地址时只要求存在) 时 is_verified 为 True，否则为 False。
+    """
+    name = 'property'
+    model = Property
+    update_fields = ['is_verified']
+
+    def queryset(self):
+        return Property.objects.exclude(blockchain_property_id__isnull=True).select_related('owner').only(
+            'pk', 'blockchain_property_id', 'is_verified', 'owner', 'owner__blockchain_address'
+        )
+
+    def chain_key(self, obj):
+        return int(obj.blockchain_property_id) if obj.blockchain_property_id.isdigit() else None
+
+    def fetch(self, keys):
+        return BlockchainInterface.fetch_batches_concurrently(BlockchainInterface.get_properties_batch, keys)
+
+    def apply(self, obj, chain_item):
+        chain_owner = chain_item['owner']
+        local_owner = obj.owner.blockchain_address
+        verified = chain_owner != ZERO_ADDRESS and (not local_owner or local_owner.lower() == chain_owner.lower())
+        if obj.is_verified == verified:
+            return False
+        obj.is_verified = verified
+        return True
+
+class UserReconciler(ChainReconciler):
+    """用户: 钱包地址已在合约中注册 (joinDate > 0) 时 is_identity_verified 为 True，否则为 False。"""
+    name = 'user'
+    model = User
+    update_fields = ['is_identity_verified']
+
+    def queryset(self):
+        return User.objects.exclude(blockchain_address__isnull=True).only('pk', 'blockchain_address', 'is_identity_verified')
+
+    def chain_key(self, obj):
+        return obj.blockchain_address if Web3.is_address(obj.blockchain_address) else None
+
+    def fetch(self, keys):
+        return BlockchainInterface.fetch_batches_concurrently(BlockchainInterface.get_users_batch, keys)
+
+    def apply(self, obj, chain_item):
+        verified = chain_item['joinDate'] > 0
+        if obj.is_identity_verified == verified:
+            return False
+        obj.is_identity_verified = verified
+        return True
+
+class BookingReconciler(ChainReconciler):
+    """预订: 按链上 isConfirmed / isCompleted 标志更新 contract_status (链上不存在时为 not_found)。"""
+    name = 'booking'
+    model = Booking
+    update_fields = ['contract_status']
+
+    def queryset(self):
+        return Booking.objects.exclude(blockchain_contract_id__isnull=True).only('pk', 'blockchain_contract_id', 'contract_status')
+
+    def chain_key(self, obj):
+        return int(obj.blockchain_contract_id) if obj.blockchain_contract_id.isdigit() else None
+
+    def fetch(self, keys):
+        return BlockchainInterface.fetch_batches_concurrently(BlockchainInterface.get_bookings_batch, keys)
+
+    def apply(self, obj, chain_item):
+        if chain_item['tenant'] == ZERO_ADDRESS:
+            status = 'not_found'
+        elif chain_item['isCompleted']:
+            status = 'completed'
+        elif chain_item['isConfirmed']:
+            status = 'confirmed'
+        else:
+            status = 'pending'
+        if obj.contract_status == status:
+            return False
+        obj.contract_status = status
+        return True
+
+RECONCILERS = {reconciler.name: reconciler for reconciler in (PropertyReconciler, UserReconciler, BookingReconciler)}
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from functools import wraps
+import hashlib
+import json
+
+from .chain_cache import ChainReadCache
+from .event_indexer import EventIndexer
+from .models import ContractEvent, IndexerCheckpoint
+
+
+def _indexer_is_current() -> bool:
+    """
+    事件索引器最近仍在推进检查点时，已索引的事件才能反映链上变化。
+    索引器未部署或已停止超过 BLOCKCHAIN_CONDITIONAL_MAX_INDEXER_LAG 秒时不使用条件请求，照常读取链上数据。
+    """
+    updated_at = IndexerCheckpoint.objects.filter(name=EventIndexer.CHECKPOINT_NAME).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return False
+    max_lag = getattr(settings, 'BLOCKCHAIN_CONDITIONAL_MAX_INDEXER_LAG', 120)
+    return timezone.now() - updated_at <= timedelta(seconds=max_lag)
+
+
+def _latest_event(event_types: list):
+    """ (辅助函数) 这些类型中最新的已索引事件 (区块号, 日志序号, 区块时间戳)，没有时返回 None """
+    latest = None
+    for event_type in event_types:
+        # 每种类型各取一条，由 contract_event_type_pos_idx 直接定位
+        row = ContractEvent.objects.filter(event_type=event_type).order_by('-block_number', '-log_index').values_list(
+            'block_number', 'log_index', 'block_timestamp',
+        ).first()
+        if row is not None and (latest is None or row[:2] > latest[:2]):
+            latest = row
+    return latest
+
+
+def chain_read_conditional(scopes_fn):
+    """
+    链上只读接口的条件 GET 装饰器。
+
+    scopes_fn 接收视图的 URL 参数，返回作用域列表 (参数无效时返回 None)。
+    ETag 由 视图名 + 合约地址 + URL 参数 + 可能改变这些作用域的事件类型中最新已索引事件的位置 计算，
+    Last-Modified 为该事件的区块时间。验证器只来自数据库中的事件表，所有 worker 看到的值一致，
+    不受进程内缓存或缓存淘汰影响；判断 If-None-Match / If-Modified-Since 只需几次索引查询，不访问节点，命中时直接返回 304。
+    验证器按事件类型而不是具体房源/用户计算，相关类型的任何新事件都会使 ETag 变化 (多返回一次 200，但不会返回过期数据)。
+    只有 200 响应才携带 ETag / Last-Modified，错误响应不会被客户端或 CDN 当作可复用的结果。
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            scopes = scopes_fn(**kwargs)
+            if scopes is None or not _indexer_is_current():
+                return view_func(request, *args, **kwargs)
+
+            latest = _latest_event(ChainReadCache.scope_event_types(scopes))
+            etag = '"%s"' % hashlib.sha1(json.dumps(
+                [view_func.__name__, settings.RENTAL_PLATFORM_CONTRACT_ADDRESS, kwargs, latest and latest[:2]], default=str,
+            ).encode()).hexdigest()
+            last_modified = latest[2] if latest is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            if last_modified is not None:
+                response.headers.setdefault('Last-Modified', http_date(last_modified))
+            # 允许缓存，但每次使用前都必须重新验证
+            response.headers.setdefault('Cache-Control', 'no-cache')
+            return response
+        return inner
+    return decorator
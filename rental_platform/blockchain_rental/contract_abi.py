@@ -0,0 +1,71 @@
+from django.conf import settings
+from eth_utils import keccak
+from functools import lru_cache
+from pathlib import Path
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 随应用一起发布的精简 ABI (由 Hardhat artifact 中的 "abi" 键导出)
+BUNDLED_ABI_PATH = Path(__file__).resolve().parent / 'abi' / 'RentalPlatform.json'
+
+@lru_cache(maxsize=1)
+def get_contract_abi() -> list:
+    """
+    首次使用时加载合约 ABI，并在进程内缓存。加载顺序:
+    1. settings.RENTAL_PLATFORM_CONTRACT_ABI (显式配置的列表或 JSON 字符串，兼容旧配置)；
+    2. settings.RENTAL_PLATFORM_CONTRACT_ARTIFACT 指向的 Hardhat artifact 文件；
+    3. 应用内置的 abi/RentalPlatform.json。
+    """
+    configured_abi = getattr(settings, 'RENTAL_PLATFORM_CONTRACT_ABI', None)
+    if configured_abi:
+        return json.loads(configured_abi) if isinstance(configured_abi, str) else configured_abi
+
+    artifact_path = getattr(settings, 'RENTAL_PLATFORM_CONTRACT_ARTIFACT', None)
+    if artifact_path and Path(artifact_path).is_file():
+        with open(artifact_path, encoding='utf-8') as artifact_file:
+            return json.load(artifact_file)['abi']
+    if artifact_path:
+        logger.info(f"未找到 Hardhat artifact ({artifact_path})，使用内置 ABI。")
+
+    with open(BUNDLED_ABI_PATH, encoding='utf-8') as abi_file:
+        return json.load(abi_file)
+
+def _signature(abi_entry: dict) -> str:
+    return f"{abi_entry['name']}({','.join(_canonical_type(i) for i in abi_entry['inputs'])})"
+
+def _canonical_type(abi_input: dict) -> str:
+    """tuple 类型展开为 (t1,t2,...) 形式，与 Solidity 签名规则一致。"""
+    abi_type = abi_input['type']
+    if abi_type.startswith('tuple'):
+        return f"({','.join(_canonical_type(c) for c in abi_input['components'])}){abi_type[len('tuple'):]}"
+    return abi_type
+
+@lru_cache(maxsize=1)
+def function_selectors() -> dict:
+    """函数选择器表: {'0x1234abcd': 函数 ABI}。"""
+    return {
+        '0x' + keccak(text=_signature(entry))[:4].hex(): entry
+        for entry in get_contract_abi() if entry.get('type') == 'function'
+    }
+
+@lru_cache(maxsize=1)
+def event_topics() -> dict:
+    """事件 topic0 表: {'0x...(32 字节)': 事件 ABI}。"""
+    return {
+        '0x' + keccak(text=_signature(entry)).hex(): entry
+        for entry in get_contract_abi() if entry.get('type') == 'event'
+    }
+
+@lru_cache(maxsize=None)
+def function_abi(fn_name: str) -> dict:
+    for entry in function_selectors().values():
+        if entry['name'] == fn_name:
+            return entry
+    raise KeyError(f"合约 ABI 中不存在函数: {fn_name}")
+
+def clear_cache():
+    """清除进程内缓存 (例如测试中修改了 ABI 配置)。"""
+    for cached in (get_contract_abi, function_selectors, event_topics, function_abi):
+        cached.cache_clear()
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import logging
+
+from .blockchain_interface import BlockchainInterface
+from .chain_cache import ChainReadCache
+from .contract_abi import event_topics
+from .models import ContractEvent, IndexerCheckpoint
+
+logger = logging.getLogger(__name__)
+
+class EventIndexer:
+    """
+    事件索引器 - 将 RentalPlatform 合约事件增量同步到数据库。
+
+    每轮从检查点之后的区块开始，按 chunk_size 分段调用一次 eth_getLogs
+    (一次取回全部六种事件)，解码后批量写入 ContractEvent，并在同一事务中推进检查点。
+    只同步到 "最新区块 - confirmations"，以避开链重组带来的回滚。
+    检查点的 updated_at 每轮都会刷新 (没有新区块时也一样)，条件 GET (conditional.py) 据此判断索引器是否仍在运行。
+    """
+    CHECKPOINT_NAME = 'contract_events'
+    EVENT_NAMES = [choice[0] for choice in ContractEvent.EVENT_TYPES]
+
+    def __init__(self, chunk_size=None, confirmations=None, start_block=None):
+        self.chunk_size = chunk_size or getattr(settings, 'BLOCKCHAIN_INDEXER_CHUNK_SIZE', 2000)
+        self.confirmations = confirmations if confirmations is not None else getattr(settings, 'BLOCKCHAIN_INDEXER_CONFIRMATIONS', 5)
+        self.start_block = start_block if start_block is not None else getattr(settings, 'BLOCKCHAIN_INDEXER_START_BLOCK', 0)
+        self._topic_to_event = None
+
+    def _event_topics(self) -> dict:
+        """ (辅助方法) 根据预计算的 topic0 表构建 topic0 -> 合约事件对象 的映射 """
+        if self._topic_to_event is None:
+            self._topic_to_event = {
+                topic: BlockchainInterface.contract.events[event_abi['name']]()
+                for topic, event_abi in event_topics().items()
+                if event_abi['name'] in self.EVENT_NAMES
+            }
+        return self._topic_to_event
+
+    def get_checkpoint(self) -> IndexerCheckpoint:
+        checkpoint, _ = IndexerCheckpoint.objects.get_or_create(
+            name=self.CHECKPOINT_NAME,
+            defaults={'block_number': self.start_block - 1},
+        )
+        return checkpoint
+
+    def run_once(self) -> int:
+        """同步一轮，返回新写入的事件数量。"""
+        if not BlockchainInterface.is_ready():
+            raise RuntimeError(BlockchainInterface.get_error_message() or "区块链接口未初始化。")
+
+        w3 = BlockchainInterface.w3
+        safe_head = w3.eth.block_number - self.confirmations
+        from_block = self.get_checkpoint().block_number + 1
+        total = 0
+        if from_block > safe_head:
+            # 没有新的安全区块: 只刷新时间，表明索引器仍在跟进链头
+            IndexerCheckpoint.objects.filter(name=self.CHECKPOINT_NAME).update(updated_at=timezone.now())
+        while from_block <= safe_head:
+            to_block = min(from_block + self.chunk_size - 1, safe_head)
+            total += self._index_range(from_block, to_block)
+            from_block = to_block + 1
+        return total
+
+    def _index_range(self, from_block: int, to_block: int) -> int:
+        """ (辅助方法) 同步 [from_block, to_block] 区间内的事件并推进检查点 """
+        w3 = BlockchainInterface.w3
+        topic_to_event = self._event_topics()
+        logs = w3.eth.get_logs({
+            'address': BlockchainInterface.contract.address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': [list(topic_to_event.keys())],
+        })
+
+        # 同一区块内的多个事件只查询一次区块时间戳
+        block_timestamps = {}
+        rows = []
+        for log in logs:
+            event = topic_to_event.get(log['topics'][0].hex())
+            if event is None:
+                continue
+            decoded = event.process_log(log)
+            block_number = decoded['blockNumber']
+            if block_number not in block_timestamps:
+                block_timestamps[block_number] = w3.eth.get_block(block_number)['timestamp']
+            rows.append(ContractEvent(
+                event_type=decoded['event'],
+                block_number=block_number,
+                log_index=decoded['logIndex'],
+                transaction_hash=decoded['transactionHash'].hex(),
+                block_timestamp=block_timestamps[block_number],
+                args=dict(decoded['args']),
+            ))
+
+        with transaction.atomic():
+            ContractEvent.objects.bulk_create(rows, ignore_conflicts=True)
+            # QuerySet.update() 不会触发 auto_now，需显式刷新 updated_at
+            IndexerCheckpoint.objects.filter(name=self.CHECKPOINT_NAME).update(block_number=to_block, updated_at=timezone.now())
+        # 新事件写入后使对应的链上读取缓存失效
+        for row in rows:
+            ChainReadCache.invalidate_for_event(row.event_type, row.args)
+        logger.info(f"已索引区块 {from_block}-{to_block}，新增事件 {len(rows)} 条。")
+        return len(rows)
@@ -0,0 +1,207 @@
+"""
+合约事件实时推送 (Server-Sent Events)。
+
+由 config/asgi.py 把 EVENT_STREAM_PATH 路由到 event_stream_app (原生 ASGI 应用，可以感知客户端断开)。
+每个进程只有一个 EventBroadcaster: 它按 EVENT_STREAM_POLL_INTERVAL 轮询事件索引器写入的 ContractEvent 表
+(不访问区块链节点)，把新事件分发给本进程的所有订阅者，因此上游开销与在线浏览器标签页数量无关。
+
+查询参数:
+- types: 可选，逗号分隔的事件类型
+- from_block: 可选，先补发该区块 (含) 之后的已索引事件，再接续实时事件
+断线重连时浏览器自动携带 Last-Event-ID ("区块号-日志序号")，从该事件之后继续推送，优先于 from_block。
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from urllib.parse import parse_qs
+import asyncio
+import json
+import logging
+
+from .models import ContractEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_position(value: str):
+    block_number, log_index = (int(part) for part in value.split('-'))
+    return block_number, log_index
+
+
+def _after(position) -> Q:
+    block_number, log_index = position
+    return Q(block_number__gt=block_number) | Q(block_number=block_number, log_index__gt=log_index)
+
+
+def _fetch_events(query: Q, event_types: list, limit: int) -> list:
+    """ (辅助函数) 在线程池中执行的 ORM 查询，按链上顺序返回 (位置, 事件类型, SSE 文本) """
+    try:
+        events = ContractEvent.objects.filter(query)
+        if event_types:
+            events = events.filter(event_type__in=event_types)
+        return [
+            ((event.block_number, event.log_index), event.event_type, _format_sse(event))
+            for event in events.order_by('block_number', 'log_index')[:limit]
+        ]
+    finally:
+        # thread_sensitive=False 的查询在 asgiref 的临时线程中执行，不经过请求结束时的连接清理，
+        # 每次查询后关闭本线程的连接，避免连接随线程泄漏
+        connection.close()
+
+
+def _latest_position():
+    try:
+        event = ContractEvent.objects.order_by('-block_number', '-log_index').only('block_number', 'log_index').first()
+        return (event.block_number, event.log_index) if event else (-1, -1)
+    finally:
+        connection.close()
+
+
+def _format_sse(event: ContractEvent) -> bytes:
+    data = json.dumps(event.as_dict(), ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event.position}\nevent: {event.event_type}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """单个客户端的订阅: 有界队列，消费过慢时标记为溢出，由连接处理方断开让客户端带 Last-Event-ID 重连。"""
+    def __init__(self, event_types: set, queue_size: int):
+        self.event_types = event_types
+        self.queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def offer(self, position, event_type: str, payload: bytes):
+        if self.event_types and event_type not in self.event_types:
+            return
+        try:
+            self.queue.put_nowait((position, payload))
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroadcaster:
+    """进程内唯一的事件轮询与分发任务；第一个订阅者到来时启动，最后一个订阅者离开后停止。"""
+    _subscriptions = set()
+    _task = None
+    _position = None
+
+    @classmethod
+    def subscribe(cls, event_types: set) -> Subscription:
+        subscription = Subscription(event_types, getattr(settings, 'EVENT_STREAM_QUEUE_SIZE', 1000))
+        cls._subscriptions.add(subscription)
+        loop = asyncio.get_running_loop()
+        if cls._task is None or cls._task.done() or cls._task.get_loop() is not loop:
+            cls._task = loop.create_task(cls._run())
+        return subscription
+
+    @classmethod
+    def unsubscribe(cls, subscription: Subscription):
+        cls._subscriptions.discard(subscription)
+
+    @classmethod
+    async def _run(cls):
+        interval = getattr(settings, 'EVENT_STREAM_POLL_INTERVAL', 2.0)
+        batch_size = getattr(settings, 'EVENT_STREAM_REPLAY_LIMIT', 1000)
+        while cls._subscriptions:
+            try:
+                # 起始位置也在重试循环内读取: 首次查询失败时任务不会退出，订阅者不会只收到心跳
+                if cls._position is None:
+                    cls._position = await sync_to_async(_latest_position, thread_sensitive=False)()
+                events = await sync_to_async(_fetch_events, thread_sensitive=False)(_after(cls._position), [], batch_size)
+            except Exception as e:
+                logger.warning(f"事件流轮询失败，将在下一轮重试: {e}")
+                events = []
+            for position, event_type, payload in events:
+                for subscription in list(cls._subscriptions):
+                    subscription.offer(position, event_type, payload)
+                cls._position = position
+            if len(events) < batch_size:
+                await asyncio.sleep(interval)
+        # 无人订阅期间不再跟踪位置，下一个订阅者到来时从最新事件开始 (历史事件由各连接自行补发)
+        cls._task = None
+        cls._position = None
+
+
+async def _send_error(send, status: int, message: str):
+    body = json.dumps({'status': 'error', 'message': message}, ensure_ascii=False).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def event_stream_app(scope, receive, send):
+    """SSE 事件流 ASGI 应用。"""
+    if scope['method'] != 'GET':
+        await _send_error(send, 405, '只支持 GET 请求。')
+        return
+    params = parse_qs(scope.get('query_string', b'').decode())
+    headers = dict(scope.get('headers', []))
+
+    event_types = {t for t in params.get('types', [''])[0].split(',') if t}
+    unknown_types = event_types - set(dict(ContractEvent.EVENT_TYPES))
+    if unknown_types:
+        await _send_error(send, 400, f"未知的事件类型: {', '.join(sorted(unknown_types))}")
+        return
+    try:
+        if headers.get(b'last-event-id'):
+            resume_after = _parse_position(headers[b'last-event-id'].decode())
+        elif params.get('from_block'):
+            resume_after = (int(params['from_block'][0]) - 1, 2 ** 31)
+        else:
+            resume_after = None
+    except ValueError:
+        await _send_error(send, 400, '无效的 from_block 或 Last-Event-ID。')
+        return
+
+    # 先订阅再补发历史事件，补发期间到达的实时事件在队列中按位置去重
+    subscription = EventBroadcaster.subscribe(event_types)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15.0)
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),  # 禁止 nginx 缓冲事件流
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+        last_sent = resume_after
+        if resume_after is not None:
+            # 分页补发直到追上最新事件，再切换到实时队列 (补发期间的新事件已在队列中，按位置去重)
+            replay_limit = getattr(settings, 'EVENT_STREAM_REPLAY_LIMIT', 1000)
+            while not disconnected.done():
+                replay = await sync_to_async(_fetch_events, thread_sensitive=False)(
+                    _after(last_sent), sorted(event_types), replay_limit,
+                )
+                for position, _, payload in replay:
+                    await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+                    last_sent = position
+                if len(replay) < replay_limit:
+                    break
+
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(subscription.queue.get())
+            await asyncio.wait({next_event, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                if not disconnected.done():
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                continue
+            position, payload = next_event.result()
+            if last_sent is not None and position <= last_sent:
+                continue
+            await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+            last_sent = position
+            if subscription.overflowed:
+                # 客户端跟不上推送速度: 结束本次响应，浏览器会带 Last-Event-ID 自动重连并补发
+                break
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        EventBroadcaster.unsubscribe(subscription)
+        disconnected.cancel()
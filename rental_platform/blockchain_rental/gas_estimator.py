@@ -0,0 +1,118 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+import logging
+import time
+
+from .metrics import observe_rpc
+
+logger = logging.getLogger(__name__)
+
+class GasEstimateCache:
+    """
+    Gas 估算缓存 - 按 函数选择器 + 参数大小分桶 缓存 gas 估算值。
+
+    confirmBooking、completeBooking、registerUser 等函数的 gas 消耗几乎不随参数变化，
+    因此同一选择器、同一 calldata 大小区间内的估算结果可以复用:
+    - live 模式下每次仍调用 estimate_gas，并用结果更新缓存；
+    - cached 模式下命中缓存即直接返回 (不访问节点)，未命中才回退到 estimate_gas。
+    缓存中保存原始估算值，返回给调用方的值 (无论来自缓存还是实时估算) 都乘以 BLOCKCHAIN_GAS_SAFETY_MARGIN 作为安全余量。
+    同步 (BlockchainInterface) 和异步 (AsyncBlockchainInterface) 接口都通过 estimate / aestimate 估算，行为一致。
+    calibrate_gas 管理命令会定期用真实交易回执中的 gasUsed 重新校准缓存。
+    注意: 缓存命中时不会执行模拟调用，合约 revert 只会在钱包发送交易时暴露。
+    """
+    KEY_PREFIX = 'gas_estimate'
+    MODE_LIVE = 'live'
+    MODE_CACHED = 'cached'
+
+    @classmethod
+    def _cache(cls):
+        return caches[getattr(settings, 'BLOCKCHAIN_CACHE_ALIAS', 'default')]
+
+    @classmethod
+    def mode(cls) -> str:
+        return getattr(settings, 'BLOCKCHAIN_GAS_ESTIMATE_MODE', cls.MODE_LIVE)
+
+    @staticmethod
+    def size_bucket(calldata: str) -> int:
+        """calldata (不含选择器) 的字节数向上取整到 2 的幂，作为大小分桶。"""
+        payload_bytes = max(0, (len(calldata) - 2) // 2 - 4)
+        if payload_bytes == 0:
+            return 0
+        return 1 << (payload_bytes - 1).bit_length()
+
+    @staticmethod
+    def selector_of(calldata: str) -> str:
+        return calldata[:10].lower()
+
+    @classmethod
+    def _key(cls, calldata: str) -> str:
+        return f'{cls.KEY_PREFIX}:{cls.selector_of(calldata)}:{cls.size_bucket(calldata)}'
+
+    @classmethod
+    def with_margin(cls, gas: int) -> int:
+        return int(gas * getattr(settings, 'BLOCKCHAIN_GAS_SAFETY_MARGIN', 1.2))
+
+    @classmethod
+    def get(cls, calldata: str):
+        """返回带安全余量的缓存估算值，未命中返回 None。"""
+        entry = cls._cache().get(cls._key(calldata))
+        if entry is None:
+            return None
+        return cls.with_margin(entry['gas'])
+
+    @classmethod
+    def estimate(cls, calldata: str, estimate_fn, simulate: bool = False) -> tuple:
+        """
+        返回 (带安全余量的 gas 估算值, 来源 'cache' 或 'live')。
+        cached 模式下优先使用缓存的估算值 (不访问节点)，未命中或 live 模式下调用 estimate_fn() 实时估算并更新缓存。
+        simulate=True 时无论哪种模式都实时估算，用于必须先确认调用不会 revert 的场景 (例如后端代发在分配 nonce 之前)。
+        """
+        if cls.mode() == cls.MODE_CACHED and not simulate:
+            cached_gas = cls.get(calldata)
+            if cached_gas is not None:
+                return cached_gas, 'cache'
+        with observe_rpc('estimate_gas'):
+            estimated_gas = estimate_fn()
+        cls.record_estimate(calldata, estimated_gas)
+        return cls.with_margin(estimated_gas), 'live'
+
+    @classmethod
+    async def aestimate(cls, calldata: str, estimate_fn) -> tuple:
+        """estimate 的异步版本，estimate_fn 为返回协程的可调用对象。"""
+        if cls.mode() == cls.MODE_CACHED:
+            cached_gas = await sync_to_async(cls.get)(calldata)
+            if cached_gas is not None:
+                return cached_gas, 'cache'
+        with observe_rpc('estimate_gas'):
+            estimated_gas = await estimate_fn()
+        await sync_to_async(cls.record_estimate)(calldata, estimated_gas)
+        return cls.with_margin(estimated_gas), 'live'
+
+    @classmethod
+    def record_estimate(cls, calldata: str, gas: int):
+        """记录一次 estimate_gas 结果，同一分桶内保留观测到的最大值。"""
+        key = cls._key(calldata)
+        entry = cls._cache().get(key)
+        if entry is not None and entry['gas'] >= gas:
+            return
+        cls._cache().set(key, {'gas': gas, 'source': 'estimate', 'updated_at': time.time()},
+                         getattr(settings, 'BLOCKCHAIN_GAS_CACHE_TTL', 86400))
+
+    @classmethod
+    def calibrate(cls, samples: list) -> dict:
+        """
+        用真实回执重新校准缓存。samples 为 (calldata, gas_used) 列表，
+        每个分桶取最大 gasUsed 覆盖原有条目。返回 {缓存键: 新的 gas 值}。
+        """
+        calibrated = {}
+        for calldata, gas_used in samples:
+            key = cls._key(calldata)
+            calibrated[key] = max(calibrated.get(key, 0), gas_used)
+        ttl = getattr(settings, 'BLOCKCHAIN_GAS_CACHE_TTL', 86400)
+        cls._cache().set_many(
+            {key: {'gas': gas, 'source': 'receipt', 'updated_at': time.time()} for key, gas in calibrated.items()},
+            ttl
+        )
+        logger.info(f"已根据 {len(samples)} 条交易回执校准 {len(calibrated)} 个 gas 估算分桶。")
+        return calibrated
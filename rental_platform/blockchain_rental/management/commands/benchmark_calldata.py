@@ -0,0 +1,46 @@
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from web3 import Web3
+
+from blockchain_rental.calldata import CalldataEncoder
+from blockchain_rental.contract_abi import function_selectors, get_contract_abi
+
+SAMPLE_ARGS = {
+    'registerUser': ('Alice', 'alice@example.com'),
+    'registerProperty': ('海景公寓', '两室一厅，步行五分钟到海边。', 350),
+    'createBooking': (1, 1767225600, 1767484800),
+    'confirmBooking': (1,),
+    'completeBooking': (1,),
+    'submitReview': (1, 5, '房东很热情，房间干净整洁。'),
+}
+
+
+class Command(BaseCommand):
+    help = "微基准: 对比 web3 合约对象编码 calldata 与离线 CalldataEncoder 的耗时，并校验两者输出逐字节一致。"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help="每个函数的编码次数")
+
+    def handle(self, *args, **options):
+        # 无需连接节点: 两条路径都只做本地编码
+        contract = Web3().eth.contract(address=settings.RENTAL_PLATFORM_CONTRACT_ADDRESS, abi=get_contract_abi())
+        encoder = CalldataEncoder(function_selectors())
+        iterations = options['iterations']
+
+        self.stdout.write(f"{'函数':<18}{'web3 (µs)':>12}{'encoder (µs)':>14}{'加速比':>10}")
+        for fn_name, fn_args in SAMPLE_ARGS.items():
+            web3_data = contract.functions[fn_name](*fn_args)._encode_transaction_data()
+            encoder_data = encoder.encode(fn_name, *fn_args)
+            if web3_data != encoder_data:
+                raise CommandError(f"{fn_name} 的编码结果不一致:\n{web3_data}\n{encoder_data}")
+
+            web3_seconds = timeit.timeit(
+                lambda: contract.functions[fn_name](*fn_args)._encode_transaction_data(), number=iterations
+            )
+            encoder_seconds = timeit.timeit(lambda: encoder.encode(fn_name, *fn_args), number=iterations)
+            self.stdout.write(
+                f"{fn_name:<18}{web3_seconds / iterations * 1e6:>12.1f}{encoder_seconds / iterations * 1e6:>14.1f}"
+                f"{web3_seconds / encoder_seconds:>9.1f}x"
+            )
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain_rental.blockchain_interface import BlockchainInterface
+from blockchain_rental.gas_estimator import GasEstimateCache
+from blockchain_rental.models import BlockchainTransaction
+
+
+class Command(BaseCommand):
+    help = "根据最近交易的真实回执 (gasUsed) 重新校准 gas 估算缓存，可配合 --interval 定期运行。"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help="参与校准的最近交易数量")
+        parser.add_argument('--interval', type=float, default=None, help="设置后常驻运行，每隔指定秒数校准一次")
+
+    def handle(self, *args, **options):
+        while True:
+            if not BlockchainInterface.is_ready():
+                raise CommandError(BlockchainInterface.get_error_message() or "区块链接口未初始化。")
+            samples = self.collect_samples(options['limit'])
+            calibrated = GasEstimateCache.calibrate(samples)
+            self.stdout.write(f"已根据 {len(samples)} 条回执校准 {len(calibrated)} 个分桶。")
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+
+    def collect_samples(self, limit: int) -> list:
+        """
+        批量查询交易和回执，返回发往本合约且执行成功的 (calldata, gasUsed) 列表。
+        每笔交易两个请求，按 BLOCKCHAIN_RPC_BATCH_SIZE 分批发送；尚未广播 (transaction_hash 为空) 的代发交易不参与校准。
+        """
+        tx_hashes = list(
+            BlockchainTransaction.objects.exclude(transaction_hash='').order_by('-created_at')
+            .values_list('transaction_hash', flat=True)[:limit]
+        )
+        hashes_per_batch = max(1, getattr(settings, 'BLOCKCHAIN_RPC_BATCH_SIZE', 100) // 2)
+        results = {}
+        for start in range(0, len(tx_hashes), hashes_per_batch):
+            payload = []
+            for index in range(start, min(start + hashes_per_batch, len(tx_hashes))):
+                payload.append({"jsonrpc": "2.0", "id": 2 * index, "method": "eth_getTransactionByHash", "params": [tx_hashes[index]]})
+                payload.append({"jsonrpc": "2.0", "id": 2 * index + 1, "method": "eth_getTransactionReceipt", "params": [tx_hashes[index]]})
+            responses = BlockchainInterface.w3.provider.make_batch_request(payload)
+            if isinstance(responses, dict):
+                raise CommandError(f"批量查询回执失败: {responses.get('error')}")
+            results.update((response.get('id'), response.get('result')) for response in responses)
+
+        contract_address = BlockchainInterface.contract.address.lower()
+        samples = []
+        for index in range(len(tx_hashes)):
+            tx, receipt = results.get(2 * index), results.get(2 * index + 1)
+            if not tx or not receipt or (tx.get('to') or '').lower() != contract_address:
+                continue
+            if int(receipt.get('status', '0x0'), 16) != 1:
+                continue
+            samples.append((tx['input'], int(receipt['gasUsed'], 16)))
+        return samples
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain_rental.event_indexer import EventIndexer
+
+
+class Command(BaseCommand):
+    help = "将 RentalPlatform 合约事件增量同步到数据库 (可作为常驻后台进程运行)。"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="只同步一轮后退出")
+        parser.add_argument('--interval', type=float, default=12.0, help="常驻模式下两轮同步之间的间隔秒数")
+        parser.add_argument('--chunk-size', type=int, default=None, help="每次 eth_getLogs 查询的区块跨度")
+        parser.add_argument('--confirmations', type=int, default=None, help="距离最新区块保留的确认数")
+        parser.add_argument('--start-block', type=int, default=None, help="首次运行时的起始区块 (通常为合约部署区块)")
+
+    def handle(self, *args, **options):
+        indexer = EventIndexer(
+            chunk_size=options['chunk_size'],
+            confirmations=options['confirmations'],
+            start_block=options['start_block'],
+        )
+        while True:
+            try:
+                count = indexer.run_once()
+                self.stdout.write(f"本轮同步新增事件 {count} 条，检查点: {indexer.get_checkpoint().block_number}")
+            except Exception as e:
+                if options['once']:
+                    raise CommandError(f"事件同步失败: {e}")
+                self.stderr.write(f"事件同步失败，将在下一轮重试: {e}")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
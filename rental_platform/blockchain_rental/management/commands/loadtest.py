@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import requests
+
+from blockchain_rental.benchmarking import LocalChain, summarize
+
+# 可用的请求类型: 名称 -> (HTTP 方法, 路径模板)；{property_id} 每次随机选取一个已存在的房源
+OPERATIONS = {
+    'prepare_property_registration': ('POST', '/api/prepare/property-registration/'),
+    'get_property_info': ('GET', '/api/property/{property_id}/'),
+    'get_property_count': ('GET', '/api/property/count/'),
+    'async_prepare_property_registration': ('POST', '/api/async/prepare/property-registration/'),
+    'async_get_property_info': ('GET', '/api/async/property/{property_id}/'),
+}
+DEFAULT_SERVER_COMMAND = '{python} manage.py runserver {host}:{port} --noreload'
+
+
+def parse_mix(value: str) -> dict:
+    """解析请求比例，例如 "prepare_property_registration=1,get_property_info=4"。"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in OPERATIONS:
+            raise CommandError(f"未知的请求类型: {name} (可选: {', '.join(OPERATIONS)})")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"无效的请求权重: {part}")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "压测: 以指定并发度、请求比例和时长向 prepare/读取接口发送真实 HTTP 请求，报告吞吐量、p50/p95/p99 延迟和错误率；"
+        "--sweep 依次测试多个并发度以找出饱和点。默认在本地 Hardhat 节点上部署并填充合约，并启动一个指向它的应用实例。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rpc-url', default='http://127.0.0.1:8545', help="本地节点地址 (npx hardhat node)")
+        parser.add_argument('--properties', type=int, default=50, help="填充的房源数")
+        parser.add_argument('--base-url', default=None,
+                            help="压测已在运行的应用实例 (须已连接到填充过数据的本地链)；不指定时自动部署合约并启动实例")
+        parser.add_argument('--host', default='127.0.0.1', help="自动启动实例时监听的地址")
+        parser.add_argument('--port', type=int, default=8765, help="自动启动实例时监听的端口")
+        parser.add_argument('--server-command', default=DEFAULT_SERVER_COMMAND,
+                            help="启动应用实例的命令，可使用 {python} {host} {port} 占位符，例如 "
+                                 "\"gunicorn config.wsgi -w 1 --threads 8 -b {host}:{port}\"")
+        parser.add_argument('--no-cache', action='store_true', help="自动启动的实例关闭链上只读缓存")
+        parser.add_argument('--server-log', default=os.path.join(tempfile.gettempdir(), 'loadtest_server.log'),
+                            help="自动启动的实例的 stdout/stderr 写入该文件 (启动失败或请求出错时用于排查)")
+        parser.add_argument('--mix', default='prepare_property_registration=1,get_property_info=4', help="请求类型及权重")
+        parser.add_argument('--concurrency', type=int, default=8, help="并发客户端数 (每个客户端顺序发送请求)")
+        parser.add_argument('--sweep', default=None, help="逗号分隔的并发度列表，依次测试，例如 1,2,4,8,16,32")
+        parser.add_argument('--duration', type=float, default=30.0, help="每个并发度的计时秒数")
+        parser.add_argument('--warmup', type=float, default=3.0, help="每个并发度计时前的预热秒数 (不计入结果)")
+        parser.add_argument('--timeout', type=float, default=30.0, help="单个请求的超时秒数")
+        parser.add_argument('--saturation-gain', type=float, default=0.1,
+                            help="吞吐量相对上一个并发度的增幅低于该比例时视为达到饱和")
+        parser.add_argument('--output', default=None, help="结果 JSON 文件路径")
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        levels = [int(level) for level in options['sweep'].split(',')] if options['sweep'] else [options['concurrency']]
+        server = None
+        base_url = options['base_url']
+        if base_url is None:
+            base_url = f"http://{options['host']}:{options['port']}"
+            server = self.start_server(options)
+        try:
+            self.wait_until_ready(base_url, server=server, server_log=options['server_log'])
+            context = self.discover(base_url)
+            levels_results = []
+            for concurrency in levels:
+                result = self.run_level(base_url, context, mix, concurrency, options)
+                levels_results.append(result)
+                self.stdout.write(self.format_row(result))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(10)
+
+        saturation = self.find_saturation(levels_results, options['saturation_gain'])
+        if len(levels_results) > 1:
+            if saturation is not None:
+                self.stdout.write(self.style.WARNING(f"饱和点: 并发 {saturation} (继续增加并发，吞吐量增幅低于 {options['saturation_gain']:.0%})"))
+            else:
+                self.stdout.write("在测试的并发范围内吞吐量仍在增长，尚未饱和。")
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump({
+                    "base_url": base_url, "mix": mix, "duration": options['duration'],
+                    "saturation_concurrency": saturation, "levels": levels_results,
+                }, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"结果已写入 {options['output']}"))
+
+    def start_server(self, options):
+        """在本地链上部署并填充合约，然后启动一个指向该合约的应用实例。"""
+        try:
+            chain = LocalChain(options['rpc_url'])
+            contract_address = chain.deploy()
+            self.stdout.write(f"合约已部署: {contract_address}，正在填充 {options['properties']} 个房源...")
+            chain.seed(users=min(10, max(2, options['properties'])), properties=options['properties'], bookings=0, reviews=0)
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+        env = {
+            **os.environ,
+            'SEPOLIA_RPC_URL': options['rpc_url'],
+            'SEPOLIA_RPC_URLS': '',
+            'CONTRACT_ADDRESS': contract_address,
+        }
+        if options['no_cache']:
+            env['BLOCKCHAIN_CACHE_ENABLED'] = 'False'
+        command = options['server_command'].format(python=sys.executable, host=options['host'], port=options['port'])
+        self.stdout.write(f"启动应用实例: {command} (输出写入 {options['server_log']})")
+        with open(options['server_log'], 'ab') as log_file:
+            # 子进程持有自己的文件描述符，父进程可以立即关闭
+            return subprocess.Popen(shlex.split(command), cwd=settings.BASE_DIR, env=env,
+                                    stdout=log_file, stderr=subprocess.STDOUT)
+
+    @staticmethod
+    def wait_until_ready(base_url: str, timeout: float = 60.0, server=None, server_log=None):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise CommandError(f"应用实例已退出 (退出码 {server.returncode})，详见 {server_log}")
+            try:
+                if requests.get(f"{base_url}/api/property/count/", timeout=5).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        raise CommandError(f"应用实例在 {timeout:.0f} 秒内未就绪: {base_url}" + (f"，详见 {server_log}" if server_log else ""))
+
+    @staticmethod
+    def discover(base_url: str) -> dict:
+        """通过接口本身获取房源数量和一个已注册的房东地址 (用作 gas 估算的 fromAddress)。"""
+        count = requests.get(f"{base_url}/api/property/count/", timeout=30).json()['data']['property_count']
+        if not count:
+            raise CommandError("链上没有房源，无法压测读取接口。")
+        owner = requests.get(f"{base_url}/api/property/1/", timeout=30).json()['data']['owner']
+        return {"property_count": count, "from_address": owner}
+
+    def run_level(self, base_url: str, context: dict, mix: dict, concurrency: int, options: dict) -> dict:
+        """
+        以 concurrency 个闭环客户端运行 warmup + duration 秒，统计计时阶段内发出的所有请求。
+        计时结束后才完成的请求 (包括超时) 仍按实际耗时和结果计入，不会因为慢而被丢弃。
+        """
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        body = json.dumps({
+            'title': '压测房源', 'description': '压测数据', 'price': 100, 'fromAddress': context['from_address'],
+        })
+        records = []
+        records_lock = threading.Lock()
+        measure_from = time.monotonic() + options['warmup']
+        deadline = measure_from + options['duration']
+
+        def client(worker_id: int):
+            session = requests.Session()
+            rng = random.Random(worker_id)
+            local_records = []
+            while True:
+                name = rng.choices(names, weights)[0]
+                method, path = OPERATIONS[name]
+                url = base_url + path.format(property_id=rng.randint(1, context['property_count']))
+                started = time.monotonic()
+                if started >= deadline:
+                    break
+                try:
+                    if method == 'POST':
+                        response = session.post(url, data=body, headers={'Content-Type': 'application/json'}, timeout=options['timeout'])
+                    else:
+                        response = session.get(url, timeout=options['timeout'])
+                    ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                finished = time.monotonic()
+                if started >= measure_from:
+                    local_records.append((name, finished - started, ok))
+            with records_lock:
+                records.extend(local_records)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(client, range(concurrency)))
+
+        def summary(items):
+            return summarize([latency for _, latency, _ in items], sum(1 for *_, ok in items if not ok), options['duration'])
+
+        return {
+            "concurrency": concurrency,
+            **summary(records),
+            "operations": {name: summary([r for r in records if r[0] == name]) for name in names},
+        }
+
+    @staticmethod
+    def find_saturation(levels_results: list, min_gain: float):
+        """返回第一个 "再增加并发吞吐量增幅低于 min_gain" 的并发度；始终在增长时返回 None。"""
+        for previous, current in zip(levels_results, levels_results[1:]):
+            if not previous['throughput_rps'] or current['throughput_rps'] is None:
+                continue
+            if current['throughput_rps'] / previous['throughput_rps'] - 1 < min_gain:
+                return previous['concurrency']
+        return None
+
+    @staticmethod
+    def format_row(result: dict) -> str:
+        if not result['requests']:
+            return f"并发 {result['concurrency']:>4}: 计时阶段没有发出请求"
+        return (
+            f"并发 {result['concurrency']:>4}: {result['throughput_rps']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+            f"错误率 {result['error_rate']:.2%}"
+        )
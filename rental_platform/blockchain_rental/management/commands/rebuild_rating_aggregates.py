@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blockchain_rental.reputation import rebuild_from_events, rebuild_from_reviews
+
+
+class Command(BaseCommand):
+    help = "重新计算房源和用户的评分汇总表，与评价表或链上 ReviewSubmitted 事件对账并重建。"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', choices=['reviews', 'events'], default='reviews',
+            help="reviews: 根据本地评价表重建; events: 根据 index_events 同步的链上 ReviewSubmitted 事件重建",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="只报告不一致的行数，不写入汇总表")
+
+    def handle(self, *args, **options):
+        apply = not options['dry_run']
+        if options['source'] == 'events':
+            result = rebuild_from_events(apply=apply)
+            source_label = f"链上事件 (未匹配事件 {result['unmatched']} 条)"
+        else:
+            result = rebuild_from_reviews(apply=apply)
+            source_label = "评价表"
+        action = "已重建" if apply else "对账结果 (未写入)"
+        self.stdout.write(
+            f"{action}，数据来源: {source_label}。房源 {result['properties']} 个，用户 {result['users']} 个，"
+            f"与现有汇总不一致 {result['mismatched']} 行。"
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain_rental.blockchain_interface import BlockchainInterface
+from blockchain_rental.chain_reconciler import RECONCILERS
+
+
+class Command(BaseCommand):
+    help = "将房源、用户和预订的区块链字段与合约数据对账并修正 (分块流式处理，可从检查点继续)。"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models', default=','.join(RECONCILERS),
+            help=f"逗号分隔的对账对象，可选: {', '.join(RECONCILERS)} (默认全部)",
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help="每批从数据库读取并向链上查询的记录数")
+        parser.add_argument('--restart', action='store_true', help="忽略检查点，从头开始对账 (与 --dry-run 同用时不修改检查点)")
+        parser.add_argument('--dry-run', action='store_true', help="只统计需要修正的记录数，不写入数据库也不推进检查点")
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['models'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in RECONCILERS]
+        if unknown:
+            raise CommandError(f"未知的对账对象: {', '.join(unknown)}")
+        if not BlockchainInterface.is_ready():
+            raise CommandError(BlockchainInterface.get_error_message() or "区块链接口未初始化。")
+
+        for name in names:
+            reconciler = RECONCILERS[name](chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+            if options['restart'] and not options['dry_run']:
+                reconciler.reset_checkpoint()
+            try:
+                stats = reconciler.run()
+            except Exception as e:
+                raise CommandError(f"{name} 对账中断，下次运行将从检查点继续: {e}")
+            self.stdout.write(
+                f"{name}: 检查 {stats['checked']} 条，修正 {stats['corrected']} 条，"
+                f"跳过 (无有效链上ID/地址) {stats['skipped']} 条，读取失败 {stats['errors']} 条。"
+            )
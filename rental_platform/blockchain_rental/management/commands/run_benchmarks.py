@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta, timezone
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import URLPattern, reverse
+
+from blockchain_rental import urls as app_urls
+from blockchain_rental.benchmarking import LocalChain, local_chain_environment, mirror_to_database, summarize
+from blockchain_rental.blockchain_interface import BlockchainInterface
+from blockchain_rental.event_indexer import EventIndexer
+
+# 用于准备注册交易的未注册地址 (链上 joinDate 为 0)
+UNREGISTERED_ADDRESS = '0x00000000000000000000000000000000000000b1'
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "基准测试: 在本地 Hardhat 节点上部署合约并填充数据，测量 blockchain_rental 每个 URL 接口和 "
+        "BlockchainInterface 每个公开方法的延迟分位数与吞吐量，结果写入 JSON 以便跨提交对比。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rpc-url', default='http://127.0.0.1:8545', help="本地节点地址 (npx hardhat node)")
+        parser.add_argument('--users', type=int, default=10, help="填充的用户数")
+        parser.add_argument('--properties', type=int, default=20, help="填充的房源数")
+        parser.add_argument('--bookings', type=int, default=20, help="填充的 (已完成) 预订数")
+        parser.add_argument('--reviews', type=int, default=10, help="填充的评价数")
+        parser.add_argument('--iterations', type=int, default=50, help="每个测试项的计时次数")
+        parser.add_argument('--warmup', type=int, default=5, help="每个测试项计时前的预热次数")
+        parser.add_argument('--no-cache', action='store_true', help="关闭链上只读缓存 (测量每次都访问节点的路径)")
+        parser.add_argument('--only', default='', help="只运行名称包含该字符串的测试项")
+        parser.add_argument('--output', default='benchmark_results.json', help="结果 JSON 文件路径")
+        parser.add_argument('--compare', default=None, help="与之前的结果 JSON 对比 p50/p95")
+
+    def handle(self, *args, **options):
+        try:
+            chain = LocalChain(options['rpc_url'])
+            contract_address = chain.deploy()
+            self.stdout.write(f"合约已部署: {contract_address}，正在填充数据...")
+            seeded = chain.seed(options['users'], options['properties'], options['bookings'], options['reviews'])
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        with local_chain_environment(options['rpc_url'], contract_address, cache_enabled=not options['no_cache']):
+            samples = mirror_to_database(seeded)
+            EventIndexer(confirmations=0, start_block=0).run_once()
+            targets = {**self.view_targets(seeded, samples), **self.interface_targets(seeded)}
+            self.warn_uncovered_routes(targets)
+            results = {}
+            for name, fn in targets.items():
+                if options['only'] and options['only'] not in name:
+                    continue
+                results[name] = self.measure(fn, options['iterations'], options['warmup'])
+                self.stdout.write(self.format_row(name, results[name]))
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "rpc_url": options['rpc_url'],
+                "cache_enabled": not options['no_cache'],
+                "iterations": options['iterations'],
+                "warmup": options['warmup'],
+                "seed": {key: options[key] for key in ('users', 'properties', 'bookings', 'reviews')},
+            },
+            "results": results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"结果已写入 {options['output']}"))
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    @staticmethod
+    def measure(fn, iterations: int, warmup: int) -> dict:
+        """顺序调用 fn，fn 返回 False 或抛出异常均计为错误。"""
+        for _ in range(warmup):
+            try:
+                fn()
+            except Exception:
+                pass
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            call_started = time.perf_counter()
+            try:
+                ok = fn()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - call_started)
+            if not ok:
+                errors += 1
+        return summarize(latencies, errors, time.perf_counter() - started)
+
+    @staticmethod
+    def view_targets(seeded: dict, samples: dict) -> dict:
+        """每个 URL 接口一个测试项，键为 view:<URL 名称>，返回值表示请求是否成功 (状态码 < 400)。"""
+        client = Client()
+        user_address = seeded["users"][0]
+        property_ids = ','.join(str(prop["id"]) for prop in seeded["properties"][:20])
+        check_in = (datetime.now(timezone.utc) + timedelta(days=400)).date()
+
+        def get(url_name, params=None, **kwargs):
+            url = reverse(url_name, kwargs=kwargs or None)
+            return lambda: client.get(url, params or {}).status_code < 400
+
+        def post(url_name, body):
+            url = reverse(url_name)
+            payload = json.dumps(body)
+            return lambda: client.post(url, payload, content_type='application/json').status_code < 400
+
+        register_user = {'name': '基准测试', 'email': 'bench@example.com', 'fromAddress': UNREGISTERED_ADDRESS}
+        register_property_params = {'title': '基准测试房源', 'description': '描述', 'price': 100}
+        register_property = {**register_property_params, 'fromAddress': user_address}
+        return {
+            'view:explorer': get('explorer'),
+            'view:home': get('home'),
+            'view:metrics': get('metrics'),
+            'view:prepare_user_registration': post('prepare_user_registration', register_user),
+            'view:prepare_property_registration': post('prepare_property_registration', register_property),
+            'view:prepare_transactions_batch': post('prepare_transactions_batch', {'operations': [
+                {'function': 'registerProperty', 'params': register_property_params, 'fromAddress': user_address},
+                {'function': 'confirmBooking', 'params': {'bookingId': seeded["pending_booking"]}, 'fromAddress': user_address},
+                {'function': 'completeBooking', 'params': {'bookingId': seeded["ended_booking"]}, 'fromAddress': seeded["users"][1]},
+            ]}),
+            'view:get_user_info': get('get_user_info', user_address=user_address),
+            'view:get_property_info': get('get_property_info', property_id=1),
+            'view:get_property_count': get('get_property_count'),
+            'view:get_properties_info': get('get_properties_info', {'ids': property_ids}),
+            'view:get_properties_info:page': get('get_properties_info', {'offset': 0, 'limit': 50}),
+            'view:async_prepare_user_registration': post('async_prepare_user_registration', register_user),
+            'view:async_prepare_property_registration': post('async_prepare_property_registration', register_property),
+            'view:async_get_user_info': get('async_get_user_info', user_address=user_address),
+            'view:async_get_property_info': get('async_get_property_info', property_id=1),
+            'view:async_get_property_count': get('async_get_property_count'),
+            'view:list_contract_events': get('list_contract_events'),
+            'view:get_property_availability': get(
+                'get_property_availability',
+                {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=3)).isoformat()},
+                property_pk=samples["available_property"],
+            ),
+            'view:search_properties': get('search_properties', {'q': '测试房源'}),
+            'view:get_property_rating': get('get_property_rating', property_pk=samples["property"]),
+            'view:get_user_reputation': get('get_user_reputation', user_pk=samples["owner"]),
+            'view:local-property-list': get('local-property-list'),
+            'view:local-property-detail': get('local-property-detail', pk=samples["property"]),
+            'view:local-booking-list': get('local-booking-list'),
+            'view:local-review-list': get('local-review-list'),
+            'view:local-transaction-list': get('local-transaction-list'),
+        }
+
+    @staticmethod
+    def interface_targets(seeded: dict) -> dict:
+        """BlockchainInterface 每个公开方法一个测试项，键为 interface:<方法名>，返回值为结果中是否没有 error。"""
+        users = seeded["users"]
+        property_ids = [prop["id"] for prop in seeded["properties"]]
+        booking_ids = [booking["id"] for booking in seeded["bookings"]]
+        owner = seeded["properties"][0]["owner"]
+        future = int(time.time()) + 400 * 86400
+
+        def ok(fn, *args, **kwargs):
+            return lambda: not fn(*args, **kwargs).get('error')
+
+        return {
+            'interface:get_user_info': ok(BlockchainInterface.get_user_info, users[0]),
+            'interface:get_property_info': ok(BlockchainInterface.get_property_info, property_ids[0]),
+            'interface:get_property_count': ok(BlockchainInterface.get_property_count),
+            'interface:get_properties_batch': ok(BlockchainInterface.get_properties_batch, property_ids),
+            'interface:get_properties_range': ok(BlockchainInterface.get_properties_range, 0, 50),
+            'interface:get_users_batch': ok(BlockchainInterface.get_users_batch, users),
+            'interface:get_bookings_batch': ok(BlockchainInterface.get_bookings_batch, booking_ids),
+            'interface:prepare_register_user_tx': ok(
+                BlockchainInterface.prepare_register_user_tx, '基准测试', 'bench@example.com', from_address=UNREGISTERED_ADDRESS,
+            ),
+            'interface:prepare_register_property_tx': ok(
+                BlockchainInterface.prepare_register_property_tx, '基准测试房源', '描述', 100, from_address=owner,
+            ),
+            'interface:prepare_create_booking_tx': ok(
+                BlockchainInterface.prepare_create_booking_tx, seeded["spare_available"], future, future + 86400, from_address=users[1],
+            ),
+            'interface:prepare_confirm_booking_tx': ok(
+                BlockchainInterface.prepare_confirm_booking_tx, seeded["pending_booking"], from_address=users[0],
+            ),
+            'interface:prepare_complete_booking_tx': ok(
+                BlockchainInterface.prepare_complete_booking_tx, seeded["ended_booking"], from_address=users[1],
+            ),
+            'interface:prepare_submit_review_tx': ok(
+                BlockchainInterface.prepare_submit_review_tx, seeded["bookings"][0]["property_id"], 5, '基准测试评价',
+                from_address=seeded["bookings"][0]["tenant"],
+            ),
+        }
+
+    def warn_uncovered_routes(self, targets: dict):
+        """新增 URL 后提醒补充测试项。"""
+        covered = {name.split(':')[1] for name in targets}
+        for pattern in app_urls.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name and pattern.name not in covered:
+                self.stderr.write(f"警告: 接口 {pattern.name} 没有对应的基准测试项。")
+
+    @staticmethod
+    def format_row(name: str, result: dict) -> str:
+        return (
+            f"{name:<48} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"p99 {result['p99_ms']:>9.2f} ms  {result['throughput_rps']:>8.1f} req/s  错误 {result['errors']}"
+        )
+
+    def compare(self, baseline_path: str, results: dict):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        self.stdout.write(f"\n与 {baseline_path} (提交 {baseline['meta'].get('commit')}) 对比:")
+        for name, result in results.items():
+            previous = baseline['results'].get(name)
+            if not previous or not previous.get('p50_ms') or not previous.get('p95_ms'):
+                continue
+            self.stdout.write(
+                f"{name:<48} p50 {result['p50_ms'] / previous['p50_ms'] - 1:>+8.1%}  "
+                f"p95 {result['p95_ms'] / previous['p95_ms'] - 1:>+8.1%}"
+            )
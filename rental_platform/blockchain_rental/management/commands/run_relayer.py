@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain_rental.relayer import Relayer
+
+
+class Command(BaseCommand):
+    help = (
+        "用 BACKEND_SIGNER_PRIVATE_KEY 签名并发送代发队列中的交易 (可作为常驻后台进程运行)；"
+        "同一签名账户只运行一个实例，代发交易的确认状态也由本命令跟踪。"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="只处理一轮后退出")
+        parser.add_argument('--interval', type=float, default=2.0, help="常驻模式下两轮之间的间隔秒数")
+        parser.add_argument('--complete-bookings', action='store_true',
+                            help="每轮先为已确认且已过退房日期的预订排队 completeBooking (链上不限制调用者的函数)")
+
+    def handle(self, *args, **options):
+        try:
+            relayer = Relayer()
+        except Exception as e:
+            raise CommandError(f"后端代发初始化失败: {e}")
+        self.stdout.write(f"后端签名账户: {relayer.address}")
+        while True:
+            try:
+                if options['complete_bookings']:
+                    queued = Relayer.enqueue_due_completions()
+                    if queued:
+                        self.stdout.write(f"已为 {queued} 个到期预订排队 completeBooking")
+                stats = relayer.run_once()
+                if options['once'] or any(stats.values()):
+                    self.stdout.write(
+                        f"本轮代发: 已确认 {stats['confirmed']}，执行失败 {stats['failed']}，已发送 {stats['submitted']}，提高费用重发 {stats['bumped']}，"
+                        f"改为跟踪已上链的旧哈希 {stats['replaced_mined']}，nonce 被占用 {stats['nonce_taken']}，"
+                        f"估算失败 {stats['rejected']}，发送失败 {stats['send_errors']}"
+                    )
+            except Exception as e:
+                if options['once']:
+                    raise CommandError(f"后端代发失败: {e}")
+                self.stderr.write(f"后端代发失败，将在下一轮重试: {e}")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
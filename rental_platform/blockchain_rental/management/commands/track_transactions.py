@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain_rental.tx_tracker import TransactionTracker
+
+
+class Command(BaseCommand):
+    help = "批量查询待确认交易的回执并更新 BlockchainTransaction 状态 (可作为常驻后台进程运行)。"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="只检查一轮后退出")
+        parser.add_argument('--interval', type=float, default=12.0, help="常驻模式下两轮检查之间的间隔秒数")
+        parser.add_argument('--chunk-size', type=int, default=None, help="每个批量请求查询的交易数量")
+        parser.add_argument('--confirmations', type=int, default=None, help="标记为已确认所需的确认数")
+
+    def handle(self, *args, **options):
+        tracker = TransactionTracker(
+            chunk_size=options['chunk_size'],
+            confirmations=options['confirmations'],
+        )
+        while True:
+            try:
+                stats = tracker.run_once()
+                self.stdout.write(
+                    f"本轮检查: 已确认 {stats['confirmed']}，失败 {stats['failed']}，"
+                    f"等待确认数 {stats['waiting']}，未查到回执 {stats['not_found']}"
+                )
+            except Exception as e:
+                if options['once']:
+                    raise CommandError(f"交易状态检查失败: {e}")
+                self.stderr.write(f"交易状态检查失败，将在下一轮重试: {e}")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+import os
+import time
+
+from .request_profile import record_rpc
+
+# Prometheus 指标。
+# 设置环境变量 PROMETHEUS_MULTIPROC_DIR 后 (须在进程启动、导入本模块之前设置，且每次部署前清空该目录)，
+# prometheus_client 会把各 worker 的指标值写入该目录下的 mmap 文件，/metrics 汇总所有 worker 的数据。
+# method 标签只取合约函数名或固定的 RPC 方法名，不包含参数，保证标签基数有限。
+
+RPC_LATENCY = Histogram(
+    'blockchain_rpc_duration_seconds', '链上 RPC 调用耗时 (秒)', ['method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+RPC_ERRORS = Counter('blockchain_rpc_errors_total', '链上 RPC 调用失败次数 (按异常类型)', ['method', 'exception'])
+RPC_IN_FLIGHT = Gauge(
+    'blockchain_rpc_in_flight', '正在进行中的链上 RPC 调用数', ['method'], multiprocess_mode='livesum',
+)
+CACHE_LOOKUPS = Counter('blockchain_cache_lookups_total', '链上只读缓存查找次数 (result 为 hit 或 miss)', ['function', 'result'])
+
+
+@contextmanager
+def observe_rpc(method: str):
+    """
+    记录一次链上 RPC 调用: 进行中计数、耗时直方图，异常时按异常类名累加错误计数 (异常继续向外抛出)。
+    耗时同时计入当前请求的统计 (RequestTimingMiddleware)。
+    同步和异步代码均可使用 (在 with 块内 await 即可)。
+    """
+    in_flight = RPC_IN_FLIGHT.labels(method)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        RPC_ERRORS.labels(method, type(e).__name__).inc()
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        RPC_LATENCY.labels(method).observe(duration)
+        record_rpc(method, duration)
+        in_flight.dec()
+
+
+def record_cache_lookup(fn_name: str, hit: bool):
+    CACHE_LOOKUPS.labels(fn_name, 'hit' if hit else 'miss').inc()
+
+
+class _DefaultRegistryProxy:
+    """ (辅助类) 单进程模式下把默认注册表中的全部指标并入本次输出 """
+    def collect(self):
+        return REGISTRY.collect()
+
+
+def render_metrics() -> bytes:
+    """以 Prometheus 文本格式输出指标；多进程模式下汇总 PROMETHEUS_MULTIPROC_DIR 中所有 worker 的数据。"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = CollectorRegistry()
+        registry.register(_DefaultRegistryProxy())
+    return generate_latest(registry)
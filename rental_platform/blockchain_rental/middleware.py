@@ -0,0 +1,82 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+import json
+import logging
+import time
+
+from . import request_profile
+
+slow_request_logger = logging.getLogger('blockchain_rental.slow_requests')
+
+
+class RequestTimingMiddleware:
+    """
+    请求级性能统计中间件。
+
+    为每个请求记录总耗时、SQL 查询数/耗时 (由各数据库连接上的 request_profile.query_wrapper 上报) 和链上 RPC 调用数/耗时
+    (由 metrics.observe_rpc 上报)；按 SERVER_TIMING_ENABLED 输出 Server-Timing 响应头，
+    耗时超过 SLOW_REQUEST_THRESHOLD_MS 的请求以 JSON 写入 blockchain_rental.slow_requests 日志，
+    其中包含最慢的 SLOW_REQUEST_TOP_QUERIES 条 SQL (只记录带占位符的语句，不记录参数)。
+    同时支持同步 (WSGI) 和异步 (ASGI) 请求。
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold_ms = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 1000)
+        self.top_queries = getattr(settings, 'SLOW_REQUEST_TOP_QUERIES', 5)
+        self.server_timing = getattr(settings, 'SERVER_TIMING_ENABLED', settings.DEBUG)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = request_profile.RequestProfile(self.top_queries)
+        token = request_profile.activate(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_profile.deactivate(token)
+        return self._finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = request_profile.RequestProfile(self.top_queries)
+        token = request_profile.activate(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_profile.deactivate(token)
+        return self._finish(request, response, profile)
+
+    def _finish(self, request, response, profile):
+        total_ms = profile.elapsed() * 1000
+        db_ms = profile.db_time * 1000
+        rpc_ms = profile.rpc_time * 1000
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.1f};desc="{profile.db_count} queries"',
+                f'rpc;dur={rpc_ms:.1f};desc="{profile.rpc_count} calls"',
+                f'app;dur={max(total_ms - db_ms - rpc_ms, 0):.1f}',
+                f'total;dur={total_ms:.1f}',
+            ])
+        if total_ms >= self.threshold_ms:
+            slow_request_logger.warning(json.dumps({
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "view": getattr(getattr(request, 'resolver_match', None), 'view_name', None),
+                "status": response.status_code,
+                "duration_ms": round(total_ms, 2),
+                "db_queries": profile.db_count,
+                "db_ms": round(db_ms, 2),
+                "rpc_calls": profile.rpc_count,
+                "rpc_ms": round(rpc_ms, 2),
+                "rpc_methods": {
+                    method: {"calls": count, "ms": round(duration * 1000, 2)}
+                    for method, (count, duration) in profile.rpc_methods.items()
+                },
+                "slow_queries": profile.slow_queries(),
+            }, ensure_ascii=False))
+        return response
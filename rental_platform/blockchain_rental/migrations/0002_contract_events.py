@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='检查点名称', max_length=64, unique=True)),
+                ('block_number', models.BigIntegerField(default=-1, help_text='已处理的最新区块号')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '索引检查点',
+                'verbose_name_plural': '索引检查点',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContractEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('UserRegistered', '用户注册'), ('PropertyRegistered', '房源注册'), ('BookingCreated', '预订创建'), ('BookingConfirmed', '预订确认'), ('BookingCompleted', '预订完成'), ('ReviewSubmitted', '评价提交')], help_text='事件类型', max_length=32)),
+                ('block_number', models.PositiveBigIntegerField(help_text='事件所在区块号')),
+                ('log_index', models.PositiveIntegerField(help_text='事件在区块中的日志序号')),
+                ('transaction_hash', models.CharField(help_text='触发事件的交易哈希', max_length=66)),
+                ('block_timestamp', models.PositiveBigIntegerField(help_text='区块时间戳 (Unix 秒)')),
+                ('args', models.JSONField(default=dict, help_text='解码后的事件参数')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': '合约事件',
+                'verbose_name_plural': '合约事件',
+                'ordering': ['-block_number', '-log_index'],
+                'indexes': [models.Index(fields=['event_type', '-block_number', '-log_index'], name='contract_event_type_pos_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contractevent',
+            constraint=models.UniqueConstraint(fields=('block_number', 'log_index'), name='unique_contract_event_position'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0003_booking_daterange_exclusion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='block_number',
+            field=models.PositiveBigIntegerField(blank=True, help_text='交易被打包的区块号', null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='check_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='未查到回执的检查次数，用于计算退避间隔'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='next_check_at',
+            field=models.DateTimeField(blank=True, help_text='下次检查回执的时间，为空表示尽快检查', null=True),
+        ),
+        migrations.AlterField(
+            model_name='blockchaintransaction',
+            name='status',
+            field=models.CharField(choices=[('pending', '等待确认'), ('confirmed', '已确认'), ('failed', '执行失败')], default='pending', help_text='交易状态', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='blockchaintransaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_check_at'], name='blockchain_tx_due_idx'),
+        ),
+    ]
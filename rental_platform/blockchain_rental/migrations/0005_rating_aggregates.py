@@ -0,0 +1,51 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0004_transaction_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyRatingAggregate',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0, help_text='评价数')),
+                ('rating_sum', models.PositiveIntegerField(default=0, help_text='评分总和')),
+                ('star_1', models.PositiveIntegerField(default=0, help_text='1 星评价数')),
+                ('star_2', models.PositiveIntegerField(default=0, help_text='2 星评价数')),
+                ('star_3', models.PositiveIntegerField(default=0, help_text='3 星评价数')),
+                ('star_4', models.PositiveIntegerField(default=0, help_text='4 星评价数')),
+                ('star_5', models.PositiveIntegerField(default=0, help_text='5 星评价数')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('property', models.OneToOneField(help_text='房源', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_aggregate', serialize=False, to='blockchain_rental.property')),
+            ],
+            options={
+                'verbose_name': '房源评分汇总',
+                'verbose_name_plural': '房源评分汇总',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRatingAggregate',
+            fields=[
+                ('review_count', models.PositiveIntegerField(default=0, help_text='评价数')),
+                ('rating_sum', models.PositiveIntegerField(default=0, help_text='评分总和')),
+                ('star_1', models.PositiveIntegerField(default=0, help_text='1 星评价数')),
+                ('star_2', models.PositiveIntegerField(default=0, help_text='2 星评价数')),
+                ('star_3', models.PositiveIntegerField(default=0, help_text='3 星评价数')),
+                ('star_4', models.PositiveIntegerField(default=0, help_text='4 星评价数')),
+                ('star_5', models.PositiveIntegerField(default=0, help_text='5 星评价数')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(help_text='评价接收者', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '用户评分汇总',
+                'verbose_name_plural': '用户评分汇总',
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:14
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+PROPERTY_SEARCH_VECTOR_GIN = GinIndex(fields=['search_vector'], name='property_search_vector_gin')
+
+
+def add_search_index(apps, schema_editor):
+    # tsvector 和 GIN 索引只存在于 PostgreSQL，其他数据库 (如本地测试用的 SQLite) 跳过
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Property = apps.get_model('blockchain_rental', 'Property')
+    config = getattr(settings, 'PROPERTY_SEARCH_CONFIG', 'simple')
+    # 为已有房源回填搜索向量，之后由 Property.save() 维护
+    Property.objects.using(schema_editor.connection.alias).update(search_vector=(
+        SearchVector('title', weight='A', config=config)
+        + SearchVector('location', weight='B', config=config)
+        + SearchVector('description', weight='C', config=config)
+    ))
+    schema_editor.add_index(Property, PROPERTY_SEARCH_VECTOR_GIN)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('blockchain_rental', 'Property'), PROPERTY_SEARCH_VECTOR_GIN)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0005_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0006_property_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blockchaintransaction',
+            index=models.Index(fields=['-created_at', '-id'], name='blockchain_tx_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blockchaintransaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='blockchain_tx_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', '-created_at', '-id'], name='booking_property_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['renter', '-created_at', '-id'], name='booking_renter_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-created_at', '-id'], name='property_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='property_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', '-created_at', '-id'], name='review_reviewer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['receiver', '-created_at', '-id'], name='review_receiver_created_idx'),
+        ),
+    ]
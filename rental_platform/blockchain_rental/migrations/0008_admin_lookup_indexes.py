@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0007_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blockchaintransaction',
+            name='transaction_hash',
+            field=models.CharField(db_index=True, help_text='区块链交易哈希', max_length=66),
+        ),
+        migrations.AlterField(
+            model_name='contractevent',
+            name='transaction_hash',
+            field=models.CharField(db_index=True, help_text='触发事件的交易哈希', max_length=66),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['check_in_date'], name='booking_check_in_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0008_admin_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='calldata',
+            field=models.TextField(blank=True, help_text='交易 calldata'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='gas_limit',
+            field=models.PositiveBigIntegerField(blank=True, help_text='gas 上限', null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='last_error',
+            field=models.TextField(blank=True, help_text='最近一次发送失败的原因'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='max_fee_per_gas',
+            field=models.DecimalField(blank=True, decimal_places=0, help_text='当前签名使用的 maxFeePerGas (wei)', max_digits=78, null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='max_priority_fee_per_gas',
+            field=models.DecimalField(blank=True, decimal_places=0, help_text='当前签名使用的 maxPriorityFeePerGas (wei)', max_digits=78, null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='nonce',
+            field=models.PositiveBigIntegerField(blank=True, help_text='分配给该交易的 nonce，发送前先写入数据库', null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='replaced_hashes',
+            field=models.JSONField(blank=True, default=list, help_text='提高费用重发前使用过的交易哈希 (同一 nonce)'),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='sender_address',
+            field=models.CharField(blank=True, help_text='后端签名账户地址', max_length=42, null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, help_text='最近一次广播时间，用于判断是否需要提高费用重发', null=True),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='to_address',
+            field=models.CharField(blank=True, help_text='交易接收地址 (合约地址)', max_length=42),
+        ),
+        migrations.AddField(
+            model_name='blockchaintransaction',
+            name='value_wei',
+            field=models.DecimalField(decimal_places=0, default=0, help_text='转账金额 (wei)', max_digits=78),
+        ),
+        migrations.AlterField(
+            model_name='blockchaintransaction',
+            name='status',
+            field=models.CharField(choices=[('queued', '等待发送'), ('pending', '等待确认'), ('confirmed', '已确认'), ('failed', '执行失败')], default='pending', help_text='交易状态', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='blockchaintransaction',
+            name='transaction_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='区块链交易哈希 (后端代发交易在发送前为空)', max_length=66),
+        ),
+        migrations.AddIndex(
+            model_name='blockchaintransaction',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'pending'])), fields=['sender_address', 'nonce'], name='blockchain_tx_relay_idx'),
+        ),
+    ]
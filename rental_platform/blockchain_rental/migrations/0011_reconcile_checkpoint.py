@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+def move_reconcile_checkpoints(apps, schema_editor):
+    # 对账进度此前借用 IndexerCheckpoint.block_number 保存主键，迁移到专用表后删除旧行
+    IndexerCheckpoint = apps.get_model('blockchain_rental', 'IndexerCheckpoint')
+    ReconcileCheckpoint = apps.get_model('blockchain_rental', 'ReconcileCheckpoint')
+    legacy = IndexerCheckpoint.objects.filter(name__startswith='reconcile_chain:')
+    ReconcileCheckpoint.objects.bulk_create([
+        ReconcileCheckpoint(name=checkpoint.name, last_pk=max(0, checkpoint.block_number)) for checkpoint in legacy
+    ])
+    legacy.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0010_review_rating_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconcileCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='对账对象名称', max_length=64, unique=True)),
+                ('last_pk', models.BigIntegerField(default=0, help_text='已处理的最大主键')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '对账检查点',
+                'verbose_name_plural': '对账检查点',
+            },
+        ),
+        migrations.RunPython(move_reconcile_checkpoints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:52
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+# PostgreSQL 上 icontains 编译为 UPPER(列) LIKE UPPER('%词%')，索引表达式与之一致才能被使用。
+# 三元组索引不依赖分词，中文子串 (如 "海景") 也能命中；少于 3 个字符的搜索词只能退化为扫描整个索引。
+PROPERTY_TRIGRAM_INDEXES = [
+    GinIndex(OpClass(Upper(field), name='gin_trgm_ops'), name=f'property_{field}_trgm')
+    for field in ('title', 'location', 'description')
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    # pg_trgm 只存在于 PostgreSQL，其他数据库 (如本地测试用的 SQLite) 跳过
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Property = apps.get_model('blockchain_rental', 'Property')
+    for index in PROPERTY_TRIGRAM_INDEXES:
+        schema_editor.add_index(Property, index)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Property = apps.get_model('blockchain_rental', 'Property')
+    for index in PROPERTY_TRIGRAM_INDEXES:
+        schema_editor.remove_index(Property, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0011_reconcile_checkpoint'),
+    ]
+
+    operations = [
+        # 非 PostgreSQL 数据库上 CreateExtension 本身不执行任何操作
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
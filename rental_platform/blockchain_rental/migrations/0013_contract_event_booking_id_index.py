@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-18 17:07
+
+from django.db import migrations, models
+import django.db.models.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain_rental', '0012_property_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contractevent',
+            index=models.Index(django.db.models.fields.json.KeyTransform('bookingId', 'args'), condition=models.Q(('event_type', 'BookingCreated')), name='contract_event_booking_id_idx'),
+        ),
+    ]
@@ -1,5 +1,14 @@
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.conf import settings
+from django.contrib.postgres.fields import DateRangeField, RangeBoundary
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db.models import F, Func, Q, Value
+from django.db.models.fields.json import KeyTransform
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class User(AbstractUser):
@@ -22,6 +31,25 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+class PropertyQuerySet(models.QuerySet):
+    def search(self, term: str):
+        """
+        全文搜索房源，结果带 rank 注解并按相关度排序。
+        PostgreSQL 上匹配 search_vector 列 (由 GIN 索引支持)，或任一搜索字段包含搜索词:
+        simple 配置不对中文分词 ("海景公寓" 是一个词素，搜 "海景" 匹配不到)，子串匹配由 pg_trgm 三元组 GIN 索引支持。
+        只靠子串匹配命中的房源 rank 为 0，排在全文匹配之后。
+        其他数据库只做 icontains 匹配，rank 为空。
+        """
+        contains = Q()
+        for field in Property.SEARCH_FIELDS:
+            contains |= Q(**{f'{field}__icontains': term})
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(term, search_type='websearch', config=Property.search_config())
+            return self.filter(Q(search_vector=query) | contains).annotate(
+                rank=SearchRank(F('search_vector'), query)
+            ).order_by('-rank', '-id')
+        return self.filter(contains).annotate(rank=Value(None, output_field=models.FloatField())).order_by('-id')
+
 class Property(models.Model):
     """
     房源模型 - 存储房源基本信息
@@ -44,14 +72,79 @@ class Property(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # 全文搜索向量 (仅 PostgreSQL 维护): 标题权重 A、位置 B、描述 C
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PropertyQuerySet.as_manager()
+
+    SEARCH_FIELDS = ('title', 'location', 'description')
     
     class Meta:
         verbose_name = _("房源")
         verbose_name_plural = _("房源")
+        # 支持 (created_at, id) 键集分页的列表查询 (全表及按所有者过滤)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='property_created_idx'),
+            models.Index(fields=['owner', '-created_at', '-id'], name='property_owner_created_idx'),
+        ]
+        # search_vector 上的 GIN 索引 property_search_vector_gin 只在 PostgreSQL 上创建 (见迁移 0006_property_search_vector)；
+        # 支持 icontains 子串匹配的三元组 GIN 索引 property_*_trgm 同样只在 PostgreSQL 上创建 (见迁移 0012_property_trigram_indexes)
     
     def __str__(self):
         return self.title
+
+    @staticmethod
+    def search_config() -> str:
+        return getattr(settings, 'PROPERTY_SEARCH_CONFIG', 'simple')
+
+    @classmethod
+    def search_vector_expression(cls):
+        config = cls.search_config()
+        return (
+            SearchVector('title', weight='A', config=config)
+            + SearchVector('location', weight='B', config=config)
+            + SearchVector('description', weight='C', config=config)
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(self.SEARCH_FIELDS):
+            return
+        # 保存后在数据库内用一条 UPDATE 重新计算搜索向量
+        if connections[kwargs.get('using') or self._state.db].vendor == 'postgresql':
+            Property.objects.using(self._state.db).filter(pk=self.pk).update(search_vector=self.search_vector_expression())
         
+class DateRange(Func):
+    """PostgreSQL daterange(lower, upper, '[)') 表达式，入住日计入、退房日不计入。"""
+    function = 'DATERANGE'
+    output_field = DateRangeField()
+
+    def __init__(self, lower, upper, **extra):
+        super().__init__(lower, upper, RangeBoundary(), **extra)
+
+class BookingQuerySet(models.QuerySet):
+    def active(self):
+        """占用房源日期的预订 (等待确认或已确认)。"""
+        return self.filter(status__in=Booking.ACTIVE_STATUSES)
+
+    def overlapping(self, check_in_date, check_out_date):
+        """
+        与 [check_in_date, check_out_date) 日期区间重叠的预订。
+        PostgreSQL 上使用与 GiST 排他约束相同的 daterange 表达式，查询可直接命中该索引；
+        其他数据库退化为普通的区间比较。
+        """
+        if connections[self.db].vendor == 'postgresql':
+            return self.annotate(
+                stay=DateRange('check_in_date', 'check_out_date')
+            ).filter(stay__overlap=DateRange(Value(check_in_date), Value(check_out_date)))
+        return self.filter(check_in_date__lt=check_out_date, check_out_date__gt=check_in_date)
+
+    def conflicting(self, property_id, check_in_date, check_out_date):
+        """指定房源在该日期区间内已存在的有效预订。"""
+        return self.filter(property_id=property_id).active().overlapping(check_in_date, check_out_date)
+
 class Booking(models.Model):
     """
     预订模型 - 处理租客对房源的预订
@@ -68,6 +161,8 @@ class Booking(models.Model):
         ('cancelled', _('已取消')),
         ('disputed', _('存在争议')),
     ]
+    # 这些状态的预订占用房源日期，数据库排他约束保证同一房源的这些预订日期互不重叠
+    ACTIVE_STATUSES = ('pending', 'confirmed')
     
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="bookings", help_text=_("预订的房源"))
     renter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bookings", help_text=_("租客"))
@@ -83,14 +178,41 @@ class Booking(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
     
     class Meta:
         verbose_name = _("预订")
         verbose_name_plural = _("预订")
+        # 支持 (created_at, id) 键集分页的列表查询 (全表及按房源、租客过滤)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+            models.Index(fields=['property', '-created_at', '-id'], name='booking_property_created_idx'),
+            models.Index(fields=['renter', '-created_at', '-id'], name='booking_renter_created_idx'),
+            # admin 按入住日期的 date_hierarchy / 日期过滤
+            models.Index(fields=['check_in_date'], name='booking_check_in_idx'),
+        ]
+        # 同一房源有效预订 (pending/confirmed) 的日期不重叠由 PostgreSQL 排他约束 booking_no_overlap 保证，
+        # 该约束只在 PostgreSQL 上创建 (见迁移 0003_booking_daterange_exclusion 中的 RunPython)。
+        # 有意不在此处声明: ExclusionConstraint 会让 SQLite 上的建表和 full_clean() 的约束校验失败。
+        # 因此它不在迁移状态中，makemigrations 不会检测到它的变化，修改约束需要手写迁移；
+        # 应用层的重叠校验由 clean() 通过 Booking.objects.conflicting() 完成，与约束使用相同的区间语义。
+        constraints = [
+            models.CheckConstraint(check=Q(check_out_date__gt=F('check_in_date')), name='booking_check_out_after_check_in'),
+        ]
     
     def __str__(self):
         return f"{self.renter.username} - {self.property.title} ({self.check_in_date} to {self.check_out_date})"
 
+    def clean(self):
+        super().clean()
+        if self.check_in_date and self.check_out_date and self.check_out_date <= self.check_in_date:
+            raise ValidationError(_("退房日期必须晚于入住日期。"))
+        if self.check_in_date and self.check_out_date and self.property_id and self.status in self.ACTIVE_STATUSES:
+            conflicts = Booking.objects.conflicting(self.property_id, self.check_in_date, self.check_out_date).exclude(pk=self.pk)
+            if conflicts.exists():
+                raise ValidationError(_("该房源在所选日期已被预订。"))
+
 class Review(models.Model):
     """
     评价模型 - 处理预订完成后的评价
@@ -116,10 +238,138 @@ class Review(models.Model):
     class Meta:
         verbose_name = _("评价")
         verbose_name_plural = _("评价")
+        # 支持 (created_at, id) 键集分页的列表查询 (全表及按评价者、接收者过滤)
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='review_created_idx'),
+            models.Index(fields=['reviewer', '-created_at', '-id'], name='review_reviewer_created_idx'),
+            models.Index(fields=['receiver', '-created_at', '-id'], name='review_receiver_created_idx'),
+        ]
+        # 汇总表只有 star_1 ~ star_5 列，超出范围的评分无法计入
+        constraints = [
+            models.CheckConstraint(check=Q(rating__gte=1, rating__lte=5), name='review_rating_range'),
+        ]
     
     def __str__(self):
         return f"{self.reviewer.username}'s review for {self.receiver.username}"
 
+    def _aggregate_targets(self) -> tuple:
+        """ (辅助方法) 本条评价计入的 (房源ID, 接收者ID, 评分) """
+        property_id = Booking.objects.filter(pk=self.booking_id).values_list('property_id', flat=True).first()
+        return property_id, self.receiver_id, self.rating
+
+    def save(self, *args, **kwargs):
+        # 评价与评分汇总表在同一事务中更新，二者始终一致。
+        # 注意: bulk_create()、QuerySet.update() 和原生 SQL 不调用 save()，不会更新汇总表，
+        # 使用后需执行 rebuild_rating_aggregates 重建 (QuerySet.delete() 会逐条发送 post_delete，不受影响)。
+        # 评分范围由 CheckConstraint review_rating_range 保证: full_clean() 报 ValidationError，直接保存报 IntegrityError
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous_review = Review.objects.select_for_update().filter(pk=self.pk).first()
+                previous = previous_review._aggregate_targets() if previous_review else None
+            super().save(*args, **kwargs)
+            current = self._aggregate_targets()
+            if previous != current:
+                if previous is not None:
+                    RatingAggregate.apply_review(*previous, delta=-1)
+                RatingAggregate.apply_review(*current, delta=1)
+
+class RatingAggregate(models.Model):
+    """
+    评分汇总表的抽象基类 - 增量维护的评价数、评分总和与各星级分布
+
+    Review 保存或删除时在同一事务中通过 F() 表达式原子地增减计数，
+    读取平均分和分布时只需读取一行，不必扫描评价表。
+    绕过 Review.save() 的批量写入 (bulk_create、QuerySet.update、原生 SQL) 不会更新汇总，
+    rebuild_rating_aggregates 管理命令可从评价表或链上 ReviewSubmitted 事件全量重建。
+    """
+    STARS = range(1, 6)
+
+    review_count = models.PositiveIntegerField(default=0, help_text=_("评价数"))
+    rating_sum = models.PositiveIntegerField(default=0, help_text=_("评分总和"))
+    star_1 = models.PositiveIntegerField(default=0, help_text=_("1 星评价数"))
+    star_2 = models.PositiveIntegerField(default=0, help_text=_("2 星评价数"))
+    star_3 = models.PositiveIntegerField(default=0, help_text=_("3 星评价数"))
+    star_4 = models.PositiveIntegerField(default=0, help_text=_("4 星评价数"))
+    star_5 = models.PositiveIntegerField(default=0, help_text=_("5 星评价数"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else None
+
+    @property
+    def histogram(self) -> dict:
+        return {str(star): getattr(self, f'star_{star}') for star in self.STARS}
+
+    def as_dict(self) -> dict:
+        return {
+            'review_count': self.review_count,
+            'rating_sum': self.rating_sum,
+            'average_rating': self.average_rating,
+            'histogram': self.histogram,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    @classmethod
+    def _apply(cls, target_id, rating: int, delta: int):
+        if target_id is None:
+            return
+        if rating not in cls.STARS:
+            raise ValueError(f"无效的评分: {rating}")
+        if delta > 0:
+            # 移出评价时不创建新行: 级联删除中汇总行可能已随房源/用户一起删除
+            cls.objects.get_or_create(pk=target_id)
+        rows = cls.objects.filter(pk=target_id)
+        if delta < 0:
+            # 汇总若曾从链上事件重建，可能不包含这条本地评价，此时不做扣减 (下次重建时校正)
+            rows = rows.filter(review_count__gte=-delta, rating_sum__gte=-delta * rating, **{f'star_{rating}__gte': -delta})
+        rows.update(**{
+            'review_count': F('review_count') + delta,
+            'rating_sum': F('rating_sum') + delta * rating,
+            f'star_{rating}': F(f'star_{rating}') + delta,
+            'updated_at': timezone.now(),
+        })
+
+    @staticmethod
+    def apply_review(property_id, receiver_id, rating: int, delta: int):
+        """把一条评价计入 (delta=1) 或移出 (delta=-1) 房源和接收者的汇总。"""
+        PropertyRatingAggregate._apply(property_id, rating, delta)
+        UserRatingAggregate._apply(receiver_id, rating, delta)
+
+class PropertyRatingAggregate(RatingAggregate):
+    """房源评分汇总 (每个房源一行)"""
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name="rating_aggregate", help_text=_("房源"))
+
+    class Meta:
+        verbose_name = _("房源评分汇总")
+        verbose_name_plural = _("房源评分汇总")
+
+    def __str__(self):
+        return f"{self.property_id}: {self.average_rating} ({self.review_count})"
+
+class UserRatingAggregate(RatingAggregate):
+    """用户 (评价接收者) 评分汇总 (每个用户一行)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="rating_aggregate", help_text=_("评价接收者"))
+
+    class Meta:
+        verbose_name = _("用户评分汇总")
+        verbose_name_plural = _("用户评分汇总")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.average_rating} ({self.review_count})"
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_aggregates(sender, instance, **kwargs):
+    """
+    评价被删除 (包括随预订、用户级联删除) 时从汇总中移出。
+    删除操作由 Django 在事务中执行，post_delete 与删除语句处于同一事务。
+    """
+    RatingAggregate.apply_review(*instance._aggregate_targets(), delta=-1)
+
 class BlockchainTransaction(models.Model):
     """
     区块链交易模型 - 记录所有与区块链交互的交易
@@ -135,18 +385,142 @@ class BlockchainTransaction(models.Model):
         ('other', _('其他')),
     ]
     
+    STATUS_CHOICES = [
+        ('queued', _('等待发送')),
+        ('pending', _('等待确认')),
+        ('confirmed', _('已确认')),
+        ('failed', _('执行失败')),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="transactions", help_text=_("发起交易的用户"))
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES, help_text=_("交易类型"))
-    transaction_hash = models.CharField(max_length=66, help_text=_("区块链交易哈希"))
+    transaction_hash = models.CharField(max_length=66, blank=True, db_index=True, help_text=_("区块链交易哈希 (后端代发交易在发送前为空)"))
     related_object_id = models.IntegerField(null=True, blank=True, help_text=_("关联对象ID"))
     related_object_type = models.CharField(max_length=20, null=True, blank=True, help_text=_("关联对象类型"))
-    status = models.CharField(max_length=20, default='pending', help_text=_("交易状态"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', help_text=_("交易状态"))
     created_at = models.DateTimeField(auto_now_add=True)
     confirmed_at = models.DateTimeField(null=True, blank=True, help_text=_("交易确认时间"))
+
+    # 确认跟踪字段 (由 track_transactions 后台任务维护)
+    block_number = models.PositiveBigIntegerField(null=True, blank=True, help_text=_("交易被打包的区块号"))
+    check_attempts = models.PositiveIntegerField(default=0, help_text=_("未查到回执的检查次数，用于计算退避间隔"))
+    next_check_at = models.DateTimeField(null=True, blank=True, help_text=_("下次检查回执的时间，为空表示尽快检查"))
+
+    # 后端代发字段 (由 relayer.Relayer 维护，用户钱包签名的交易均为空)
+    sender_address = models.CharField(max_length=42, null=True, blank=True, help_text=_("后端签名账户地址"))
+    nonce = models.PositiveBigIntegerField(null=True, blank=True, help_text=_("分配给该交易的 nonce，发送前先写入数据库"))
+    to_address = models.CharField(max_length=42, blank=True, help_text=_("交易接收地址 (合约地址)"))
+    calldata = models.TextField(blank=True, help_text=_("交易 calldata"))
+    value_wei = models.DecimalField(max_digits=78, decimal_places=0, default=0, help_text=_("转账金额 (wei)"))
+    gas_limit = models.PositiveBigIntegerField(null=True, blank=True, help_text=_("gas 上限"))
+    max_fee_per_gas = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True, help_text=_("当前签名使用的 maxFeePerGas (wei)"))
+    max_priority_fee_per_gas = models.DecimalField(max_digits=78, decimal_places=0, null=True, blank=True, help_text=_("当前签名使用的 maxPriorityFeePerGas (wei)"))
+    submitted_at = models.DateTimeField(null=True, blank=True, help_text=_("最近一次广播时间，用于判断是否需要提高费用重发"))
+    replaced_hashes = models.JSONField(default=list, blank=True, help_text=_("提高费用重发前使用过的交易哈希 (同一 nonce)"))
+    last_error = models.TextField(blank=True, help_text=_("最近一次发送失败的原因"))
     
     class Meta:
         verbose_name = _("区块链交易")
         verbose_name_plural = _("区块链交易")
+        indexes = [
+            # 跟踪任务只扫描待确认且已到检查时间的交易
+            models.Index(fields=['next_check_at'], condition=Q(status='pending'), name='blockchain_tx_due_idx'),
+            # 支持 (created_at, id) 键集分页的列表查询 (全表及按用户过滤)
+            models.Index(fields=['-created_at', '-id'], name='blockchain_tx_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='blockchain_tx_user_created_idx'),
+            # 代发队列按 nonce 顺序取出待发送和待确认的交易
+            models.Index(fields=['sender_address', 'nonce'], condition=Q(status__in=['queued', 'pending']), name='blockchain_tx_relay_idx'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_type} - {self.transaction_hash[:10]}..."
+
+class ContractEvent(models.Model):
+    """
+    合约事件模型 - 由事件索引器从链上同步的 RentalPlatform 合约事件
+
+    每条记录对应一条链上日志，(block_number, log_index) 唯一确定一个事件。
+    浏览器页面和 /api/events/ 直接从此表分页读取，不再逐个向节点查询事件。
+    """
+    EVENT_TYPES = [
+        ('UserRegistered', _('用户注册')),
+        ('PropertyRegistered', _('房源注册')),
+        ('BookingCreated', _('预订创建')),
+        ('BookingConfirmed', _('预订确认')),
+        ('BookingCompleted', _('预订完成')),
+        ('ReviewSubmitted', _('评价提交')),
+    ]
+
+    event_type = models.CharField(max_length=32, choices=EVENT_TYPES, help_text=_("事件类型"))
+    block_number = models.PositiveBigIntegerField(help_text=_("事件所在区块号"))
+    log_index = models.PositiveIntegerField(help_text=_("事件在区块中的日志序号"))
+    transaction_hash = models.CharField(max_length=66, db_index=True, help_text=_("触发事件的交易哈希"))
+    block_timestamp = models.PositiveBigIntegerField(help_text=_("区块时间戳 (Unix 秒)"))
+    args = models.JSONField(default=dict, help_text=_("解码后的事件参数"))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("合约事件")
+        verbose_name_plural = _("合约事件")
+        ordering = ['-block_number', '-log_index']
+        constraints = [
+            models.UniqueConstraint(fields=['block_number', 'log_index'], name='unique_contract_event_position'),
+        ]
+        indexes = [
+            models.Index(fields=['event_type', '-block_number', '-log_index'], name='contract_event_type_pos_idx'),
+            # BookingConfirmed/BookingCompleted 只携带 bookingId，缓存失效时按它查找对应的 BookingCreated 事件
+            models.Index(
+                KeyTransform('bookingId', 'args'), condition=Q(event_type='BookingCreated'), name='contract_event_booking_id_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} @ {self.block_number}:{self.log_index}"
+
+    @property
+    def position(self) -> str:
+        """事件位置 "区块号-日志序号"，用作分页游标和事件流的 Last-Event-ID"""
+        return f"{self.block_number}-{self.log_index}"
+
+    def as_dict(self) -> dict:
+        return {
+            'type': self.event_type,
+            'data': self.args,
+            'timestamp': self.block_timestamp,
+            'txHash': self.transaction_hash,
+            'blockNumber': self.block_number,
+        }
+
+class IndexerCheckpoint(models.Model):
+    """
+    索引器检查点模型 - 记录后台同步任务已处理到的区块号
+
+    索引器重启后从 block_number + 1 继续同步，实现增量、可恢复的链上数据导入。
+    """
+    name = models.CharField(max_length=64, unique=True, help_text=_("检查点名称"))
+    block_number = models.BigIntegerField(default=-1, help_text=_("已处理的最新区块号"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("索引检查点")
+        verbose_name_plural = _("索引检查点")
+
+    def __str__(self):
+        return f"{self.name}: {self.block_number}"
+
+class ReconcileCheckpoint(models.Model):
+    """
+    对账检查点模型 - 记录 reconcile_chain 每类对账对象已处理到的最大主键
+
+    对账中断后从 last_pk 之后继续；完整跑完一遍后复位为 0。
+    """
+    name = models.CharField(max_length=64, unique=True, help_text=_("对账对象名称"))
+    last_pk = models.BigIntegerField(default=0, help_text=_("已处理的最大主键"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("对账检查点")
+        verbose_name_plural = _("对账检查点")
+
+    def __str__(self):
+        return f"{self.name}: {self.last_pk}"
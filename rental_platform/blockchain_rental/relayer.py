@@ -0,0 +1,362 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from eth_account import Account
+import logging
+import math
+import threading
+
+from .blockchain_interface import BlockchainInterface
+from .calldata import encode_call, get_encoder
+from .metrics import observe_rpc
+from .models import BlockchainTransaction, Booking
+from .tx_tracker import TransactionTracker
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10 ** 9
+# 节点对同一 nonce 重复广播相同交易时返回的错误 (视为发送成功)
+ALREADY_KNOWN_ERRORS = ('already known', 'known transaction', 'already imported')
+NONCE_TOO_LOW_ERRORS = ('nonce too low', 'nonce has already been used')
+# 合约中不校验 msg.sender 的写入函数，后端账户代发才有意义:
+# registerUser/registerProperty/createBooking/submitReview 会以后端账户的身份执行，
+# confirmBooking 要求调用者是房东，这些调用只能由用户钱包签名
+RELAYABLE_FUNCTIONS = ('completeBooking',)
+
+
+class NonceManager:
+    """
+    后端签名账户的本地 nonce 分配器。
+
+    首次分配 (或 reset 之后) 时取 链上 pending nonce 与 数据库中已分配但未结束的最大 nonce + 1 的较大值，
+    之后在内存中递增，因此可以连续发送多笔交易而不必等待前一笔的回执。
+    nonce 在广播前写入数据库，进程重启后不会重复分配已广播的 nonce。
+    同一签名账户只应有一个 run_relayer 进程。
+    """
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._next_nonce = None
+        self._lock = threading.Lock()
+
+    def _sync(self) -> int:
+        with observe_rpc('eth_getTransactionCount'):
+            chain_nonce = self.w3.eth.get_transaction_count(self.address, 'pending')
+        db_max = BlockchainTransaction.objects.filter(
+            sender_address=self.address, status__in=['queued', 'pending'], nonce__isnull=False,
+        ).aggregate(max_nonce=Max('nonce'))['max_nonce']
+        return max(chain_nonce, db_max + 1 if db_max is not None else 0)
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = self._sync()
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def reset(self):
+        """节点报告 nonce 冲突时调用，下次分配重新与链上同步。"""
+        with self._lock:
+            self._next_nonce = None
+
+
+class Relayer:
+    """
+    后端代发服务 - 用 BACKEND_SIGNER_PRIVATE_KEY 签名并发送排队的合约调用。
+
+    合约按 msg.sender 鉴权，后端账户只能代发不限制调用者的函数 (RELAYABLE_FUNCTIONS)，目前即退房后的 completeBooking:
+    enqueue_due_completions 为已确认且已过退房日期的预订排队 completeBooking。
+    队列即 BlockchainTransaction 表: enqueue 写入 status='queued' 的记录，run_once 每轮:
+    1. 检查已广播但超过 RELAYER_BUMP_AFTER 秒仍未上链的交易: nonce 已被占用时找出实际上链的哈希，
+       否则以更高的费用 (同一 nonce) 重新签名广播；
+    2. 在 RELAYER_MAX_IN_FLIGHT 的限制内，为排队的交易估算 gas、分配 nonce、写回数据库，
+       再把签名后的交易放在一个 JSON-RPC 批量请求中一次发出 (不等待回执)。
+    广播成功的交易转为 pending，之后由 track_transactions 照常跟踪确认状态。
+    """
+    UPDATE_FIELDS = [
+        'status', 'transaction_hash', 'nonce', 'gas_limit', 'max_fee_per_gas', 'max_priority_fee_per_gas',
+        'submitted_at', 'replaced_hashes', 'last_error', 'check_attempts', 'next_check_at',
+    ]
+
+    def __init__(self, private_key: str = None):
+        private_key = private_key or getattr(settings, 'BACKEND_SIGNER_PRIVATE_KEY', None)
+        if not private_key:
+            raise RuntimeError("未配置 BACKEND_SIGNER_PRIVATE_KEY，无法启用后端代发。")
+        if not BlockchainInterface.is_ready():
+            raise RuntimeError(BlockchainInterface.get_error_message() or "区块链接口未初始化。")
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+        self.w3 = BlockchainInterface.w3
+        self.chain_id = self.w3.eth.chain_id
+        self.nonces = NonceManager(self.w3, self.address)
+        # 本账户代发交易的确认状态只由本进程跟踪 (track_transactions 跳过 sender_address 非空的行)
+        self.tracker = TransactionTracker(sender_address=self.address)
+        self.max_in_flight = getattr(settings, 'RELAYER_MAX_IN_FLIGHT', 16)
+        self.bump_after = getattr(settings, 'RELAYER_BUMP_AFTER', 60)
+        self.bump_percent = getattr(settings, 'RELAYER_FEE_BUMP_PERCENT', 12.5)
+        self.max_fee_cap = int(getattr(settings, 'RELAYER_MAX_FEE_GWEI', 200) * GWEI)
+
+    @staticmethod
+    def enqueue(user, transaction_type: str, fn_name: str, args: tuple, value_in_wei: int = 0,
+                related_object_id=None, related_object_type=None) -> BlockchainTransaction:
+        """把一次合约调用加入代发队列 (calldata 离线编码，不访问节点)。"""
+        if fn_name not in RELAYABLE_FUNCTIONS:
+            raise ValueError(f"{fn_name} 按 msg.sender 鉴权，不能由后端账户代发 (可代发: {', '.join(RELAYABLE_FUNCTIONS)})")
+        return BlockchainTransaction.objects.create(
+            user=user,
+            transaction_type=transaction_type,
+            status='queued',
+            to_address=settings.RENTAL_PLATFORM_CONTRACT_ADDRESS,
+            calldata=encode_call(fn_name, *args),
+            value_wei=value_in_wei,
+            related_object_id=related_object_id,
+            related_object_type=related_object_type,
+        )
+
+    @staticmethod
+    def enqueue_due_completions(limit: int = 100) -> int:
+        """
+        为已确认、退房日期已过、链上状态为 confirmed 的预订排队 completeBooking，返回新排队的数量。
+        每个预订只排队一次 (包括失败的)，需要重试时删除对应的失败记录即可。
+        """
+        selector = get_encoder().selector('completeBooking')
+        already_queued = BlockchainTransaction.objects.filter(
+            related_object_type='booking', calldata__startswith=selector,
+        ).values('related_object_id')
+        due = Booking.objects.filter(
+            status='confirmed', contract_status='confirmed', check_out_date__lt=timezone.localdate(),
+            blockchain_contract_id__regex=r'^[0-9]+$',
+        ).exclude(pk__in=already_queued).order_by('check_out_date', 'pk').only('pk', 'renter_id', 'blockchain_contract_id')[:limit]
+        rows = [
+            BlockchainTransaction(
+                user_id=booking.renter_id,
+                transaction_type='booking',
+                status='queued',
+                to_address=settings.RENTAL_PLATFORM_CONTRACT_ADDRESS,
+                calldata=encode_call('completeBooking', int(booking.blockchain_contract_id)),
+                related_object_id=booking.pk,
+                related_object_type='booking',
+            )
+            for booking in due
+        ]
+        BlockchainTransaction.objects.bulk_create(rows)
+        return len(rows)
+
+    def run_once(self) -> dict:
+        """处理一轮: 先更新已广播交易的确认状态，再处理卡住的交易，最后发送排队的交易。返回各结果的计数。"""
+        stats = {'submitted': 0, 'bumped': 0, 'replaced_mined': 0, 'nonce_taken': 0, 'rejected': 0, 'send_errors': 0}
+        tracked = self.tracker.run_once()
+        stats['confirmed'], stats['failed'] = tracked['confirmed'], tracked['failed']
+        self._handle_stuck(stats)
+        self._submit_queued(stats)
+        return stats
+
+    # --- 费用 ---
+    def _market_fees(self):
+        """ (辅助方法) 当前网络的 (maxFeePerGas, maxPriorityFeePerGas): 2 倍基础费用 + 小费，不超过费用上限"""
+        with observe_rpc('eth_getBlockByNumber'):
+            base_fee = self.w3.eth.get_block('latest').get('baseFeePerGas', 0)
+        try:
+            with observe_rpc('eth_maxPriorityFeePerGas'):
+                priority_fee = self.w3.eth.max_priority_fee
+        except Exception as e:
+            logger.debug(f"查询建议小费失败，使用默认值: {e}")
+            priority_fee = int(getattr(settings, 'RELAYER_PRIORITY_FEE_GWEI', 1.5) * GWEI)
+        max_fee = min(self.max_fee_cap, 2 * base_fee + priority_fee)
+        return max_fee, min(priority_fee, max_fee)
+
+    def _bumped_fees(self, tx: BlockchainTransaction, market):
+        """ (辅助方法) 重发所需的费用: 两项费用都至少提高 RELAYER_FEE_BUMP_PERCENT (节点替换交易的要求)，且不低于当前市场费用。已到上限时返回 None"""
+        factor = 1 + self.bump_percent / 100
+        old_max_fee, old_priority_fee = int(tx.max_fee_per_gas), int(tx.max_priority_fee_per_gas)
+        max_fee = max(math.ceil(old_max_fee * factor), market[0])
+        priority_fee = max(math.ceil(old_priority_fee * factor), market[1])
+        if max_fee > self.max_fee_cap:
+            return None
+        return max_fee, min(priority_fee, max_fee)
+
+    def _sign(self, tx: BlockchainTransaction):
+        return self.account.sign_transaction({
+            'type': 2,
+            'chainId': self.chain_id,
+            'nonce': tx.nonce,
+            'to': self.w3.to_checksum_address(tx.to_address),
+            'data': tx.calldata,
+            'value': int(tx.value_wei),
+            'gas': tx.gas_limit,
+            'maxFeePerGas': int(tx.max_fee_per_gas),
+            'maxPriorityFeePerGas': int(tx.max_priority_fee_per_gas),
+        })
+
+    # --- 发送 ---
+    def _broadcast(self, raw_transactions: list) -> list:
+        """ (辅助方法) 一次批量请求广播多笔已签名交易，返回与输入顺序一致的 (交易哈希, 错误信息)"""
+        if not raw_transactions:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": "eth_sendRawTransaction", "params": [raw.hex() if isinstance(raw, bytes) else raw]}
+            for request_id, raw in enumerate(raw_transactions)
+        ]
+        with observe_rpc('batch:eth_sendRawTransaction'):
+            responses = self.w3.provider.make_batch_request(payload)
+        if isinstance(responses, dict):
+            error = str(responses.get('error', responses))
+            return [(None, error)] * len(raw_transactions)
+        responses_by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request_id in range(len(raw_transactions)):
+            response = responses_by_id.get(request_id) or {}
+            error = response.get('error')
+            results.append((response.get('result'), (error.get('message') if isinstance(error, dict) else str(error)) if error else None))
+        return results
+
+    def _receipt_exists(self, tx_hash: str):
+        """ (辅助方法) 交易是否已上链；查询出错、无法判断时返回 None"""
+        try:
+            with observe_rpc('eth_getTransactionReceipt'):
+                response = self.w3.provider.make_request('eth_getTransactionReceipt', [tx_hash])
+        except Exception as e:
+            logger.warning(f"查询交易回执失败 ({tx_hash}): {e}")
+            return None
+        if response.get('error'):
+            logger.warning(f"查询交易回执失败 ({tx_hash}): {response['error']}")
+            return None
+        receipt = response.get('result')
+        return bool(receipt and receipt.get('blockNumber') is not None)
+
+    def _submit_queued(self, stats: dict):
+        """ (辅助方法) 在进行中数量限制内发送排队的交易，已分配 nonce 的 (上一轮发送失败) 优先按 nonce 顺序重试"""
+        in_flight = BlockchainTransaction.objects.filter(sender_address=self.address, status='pending').count()
+        capacity = self.max_in_flight - in_flight
+        if capacity <= 0:
+            return
+        retries = list(BlockchainTransaction.objects.filter(
+            sender_address=self.address, status='queued', nonce__isnull=False,
+        ).order_by('nonce')[:capacity])
+        fresh = list(BlockchainTransaction.objects.filter(
+            status='queued', nonce__isnull=True,
+        ).order_by('id')[:capacity - len(retries)])
+        if not retries and not fresh:
+            return
+
+        market = self._market_fees()
+        now = timezone.now()
+        for tx in retries:
+            # 上一轮发送失败的交易按当前市场费用重新定价 (不低于上次签名的费用，以便替换可能已进入交易池的旧版本)
+            tx.max_fee_per_gas = max(int(tx.max_fee_per_gas), market[0])
+            tx.max_priority_fee_per_gas = min(max(int(tx.max_priority_fee_per_gas), market[1]), int(tx.max_fee_per_gas))
+        batch = list(retries)
+        for tx in fresh:
+            # 先模拟执行 (实时 estimate_gas，cached 模式下也不使用缓存值) 再分配 nonce:
+            # 会 revert 的调用直接标记失败，不会占用 nonce 造成空洞，也不会广播后白白消耗手续费。
+            # 返回值已包含 BLOCKCHAIN_GAS_SAFETY_MARGIN 安全余量，直接用作 gas 上限
+            try:
+                estimated_gas, _ = BlockchainInterface._estimate_gas({
+                    'from': self.address, 'to': tx.to_address, 'data': tx.calldata, 'value': int(tx.value_wei),
+                }, simulate=True)
+            except Exception as e:
+                tx.status = 'failed'
+                tx.last_error = BlockchainInterface._format_prepare_error(e)
+                stats['rejected'] += 1
+                continue
+            tx.sender_address = self.address
+            tx.gas_limit = estimated_gas
+            tx.nonce = self.nonces.allocate()
+            tx.max_fee_per_gas, tx.max_priority_fee_per_gas = market
+            batch.append(tx)
+        # 广播前先持久化 nonce 和费用 (进程在广播后崩溃时，重启会以相同参数重发，得到相同的交易哈希)
+        BlockchainTransaction.objects.bulk_update(fresh, self.UPDATE_FIELDS + ['sender_address'])
+
+        signed = [self._sign(tx) for tx in batch]
+        for tx, signed_tx, (tx_hash, error) in zip(batch, signed, self._broadcast([s.rawTransaction for s in signed])):
+            local_hash = signed_tx.hash.hex()
+            if error and any(marker in error.lower() for marker in NONCE_TOO_LOW_ERRORS):
+                mined = self._receipt_exists(local_hash)
+                if mined is not True:
+                    if mined is False:
+                        # nonce 已被其他交易占用: 重新分配 nonce，下一轮再发
+                        self.nonces.reset()
+                        tx.nonce = None
+                    # 无法判断时保留 nonce，下一轮重试
+                    tx.last_error = error
+                    stats['send_errors'] += 1
+                    continue
+            if error and not any(marker in error.lower() for marker in ALREADY_KNOWN_ERRORS + NONCE_TOO_LOW_ERRORS):
+                # 网络或余额不足等错误: 保留 nonce 留在队列中，下一轮以相同 nonce 重试
+                tx.last_error = error
+                stats['send_errors'] += 1
+                logger.warning(f"代发交易 {tx.pk} (nonce {tx.nonce}) 广播失败: {error}")
+                continue
+            tx.status = 'pending'
+            tx.transaction_hash = tx_hash or local_hash
+            tx.submitted_at = now
+            tx.last_error = ''
+            tx.check_attempts = 0
+            tx.next_check_at = None
+            stats['submitted'] += 1
+        BlockchainTransaction.objects.bulk_update(batch, self.UPDATE_FIELDS)
+        logger.info(f"本轮代发: {stats}")
+
+    # --- 卡住的交易 ---
+    def _handle_stuck(self, stats: dict):
+        """ (辅助方法) 处理广播超过 bump_after 秒仍未上链的交易"""
+        stuck = list(BlockchainTransaction.objects.filter(
+            sender_address=self.address, status='pending', block_number__isnull=True,
+            submitted_at__lte=timezone.now() - timedelta(seconds=self.bump_after),
+        ).order_by('nonce'))
+        if not stuck:
+            return
+        with observe_rpc('eth_getTransactionCount'):
+            mined_nonce = self.w3.eth.get_transaction_count(self.address, 'latest')
+        market = self._market_fees()
+        now = timezone.now()
+        rebroadcast = []
+        for tx in stuck:
+            if tx.nonce < mined_nonce:
+                # nonce 已上链: 可能是某个较早的哈希 (重发前的版本) 被打包，改为跟踪实际上链的那一笔
+                receipts = {}
+                for candidate in [tx.transaction_hash] + list(reversed(tx.replaced_hashes)):
+                    receipts[candidate] = self._receipt_exists(candidate)
+                    if receipts[candidate]:
+                        if candidate != tx.transaction_hash:
+                            tx.replaced_hashes = [h for h in tx.replaced_hashes if h != candidate] + [tx.transaction_hash]
+                            tx.transaction_hash = candidate
+                            stats['replaced_mined'] += 1
+                        break
+                else:
+                    if None not in receipts.values():
+                        # 所有签名版本都没有回执: 该 nonce 被本服务之外的交易占用，本交易不会再上链
+                        tx.status = 'failed'
+                        tx.last_error = f"nonce {tx.nonce} 已被其他交易使用，本交易未上链"
+                        stats['nonce_taken'] += 1
+                        logger.warning(f"代发交易 {tx.pk}: {tx.last_error}")
+                tx.submitted_at = now
+                tx.next_check_at = None
+                continue
+            fees = self._bumped_fees(tx, market)
+            if fees is None:
+                logger.warning(f"代发交易 {tx.pk} (nonce {tx.nonce}) 未上链，但费用已达到上限 RELAYER_MAX_FEE_GWEI，不再提高。")
+                tx.submitted_at = now
+                continue
+            tx.max_fee_per_gas, tx.max_priority_fee_per_gas = fees
+            rebroadcast.append(tx)
+
+        signed = [self._sign(tx) for tx in rebroadcast]
+        for tx, signed_tx, (tx_hash, error) in zip(rebroadcast, signed, self._broadcast([s.rawTransaction for s in signed])):
+            if error and not any(marker in error.lower() for marker in ALREADY_KNOWN_ERRORS):
+                # 替换失败 (例如原交易恰好上链)，保留原费用记录，下一轮重新判断
+                tx.refresh_from_db()
+                tx.last_error = error
+                tx.submitted_at = now
+                stats['send_errors'] += 1
+                continue
+            tx.replaced_hashes = tx.replaced_hashes + [tx.transaction_hash]
+            tx.transaction_hash = tx_hash or signed_tx.hash.hex()
+            tx.submitted_at = now
+            tx.last_error = ''
+            tx.check_attempts = 0
+            tx.next_check_at = None
+            stats['bumped'] += 1
+        BlockchainTransaction.objects.bulk_update(stuck, self.UPDATE_FIELDS)
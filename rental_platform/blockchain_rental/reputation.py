@@ -0,0 +1,102 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+import logging
+
+from .models import ContractEvent, Property, PropertyRatingAggregate, RatingAggregate, Review, UserRatingAggregate
+
+logger = logging.getLogger(__name__)
+
+STARS = RatingAggregate.STARS
+
+def _empty_totals() -> dict:
+    return {'review_count': 0, 'rating_sum': 0, **{f'star_{star}': 0 for star in STARS}}
+
+def _count_mismatches(model, key_field: str, totals_by_key: dict) -> int:
+    """ (辅助函数) 统计现有汇总表与重新计算结果不一致的行数 (缺少的行按全零计) """
+    empty = _empty_totals()
+    existing = {row.pop(key_field): row for row in model.objects.values(key_field, *empty)}
+    keys = set(existing) | set(totals_by_key)
+    return sum(1 for key in keys if existing.get(key, empty) != {**empty, **totals_by_key.get(key, {})})
+
+def _replace_aggregates(model, key_field: str, totals_by_key: dict):
+    """ (辅助函数) 用新的汇总结果整体替换汇总表 (由调用方的事务保证原子性) """
+    model.objects.all().delete()
+    model.objects.bulk_create(
+        [model(**{key_field: key}, **totals) for key, totals in totals_by_key.items()],
+        batch_size=1000,
+    )
+
+def _totals_from_reviews(group_by: str) -> dict:
+    """ (辅助函数) 用一条 GROUP BY 查询按 group_by 字段汇总评价表 """
+    rows = Review.objects.values(group_by).annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'star_{star}': Count('id', filter=Q(rating=star)) for star in STARS},
+    ).order_by()
+    return {row.pop(group_by): row for row in rows if row[group_by] is not None}
+
+def _reconcile(compute_totals, apply: bool) -> dict:
+    """
+    (辅助函数) 调用 compute_totals() 得到 (房源汇总, 用户汇总, 附加结果) 并与现有汇总表对账，
+    apply 为 True 时用重新计算的结果替换。
+    计算与替换在同一事务中进行，并先锁住现有汇总行: 并发的 Review.save() 更新汇总时会等待本事务提交，
+    其增量要么已计入重新计算的结果，要么在替换之后再作用到新行上，不会丢失或重复。
+    """
+    with transaction.atomic():
+        if apply:
+            list(PropertyRatingAggregate.objects.select_for_update().values_list('pk', flat=True))
+            list(UserRatingAggregate.objects.select_for_update().values_list('pk', flat=True))
+        property_totals, user_totals, extra = compute_totals()
+        result = {
+            'properties': len(property_totals),
+            'users': len(user_totals),
+            'mismatched': (_count_mismatches(PropertyRatingAggregate, 'property_id', property_totals)
+                           + _count_mismatches(UserRatingAggregate, 'user_id', user_totals)),
+            **extra,
+        }
+        if apply:
+            _replace_aggregates(PropertyRatingAggregate, 'property_id', property_totals)
+            _replace_aggregates(UserRatingAggregate, 'user_id', user_totals)
+    return result
+
+def _totals_from_events() -> tuple:
+    """ (辅助函数) 按 ReviewSubmitted 事件汇总，返回 (房源汇总, 用户汇总, {'unmatched': 跳过的事件数}) """
+    local_properties = {
+        blockchain_property_id: (property_pk, owner_id)
+        for blockchain_property_id, property_pk, owner_id in Property.objects.exclude(
+            blockchain_property_id__isnull=True
+        ).values_list('blockchain_property_id', 'pk', 'owner_id')
+    }
+    property_totals = defaultdict(_empty_totals)
+    user_totals = defaultdict(_empty_totals)
+    unmatched = 0
+    events = ContractEvent.objects.filter(event_type='ReviewSubmitted').values_list('args', flat=True)
+    for args in events.iterator(chunk_size=2000):
+        target = local_properties.get(str(args.get('propertyId')))
+        rating = int(args.get('rating', 0))
+        if target is None or rating not in STARS:
+            unmatched += 1
+            continue
+        for totals in (property_totals[target[0]], user_totals[target[1]]):
+            totals['review_count'] += 1
+            totals['rating_sum'] += rating
+            totals[f'star_{rating}'] += 1
+
+    if unmatched:
+        logger.warning(f"{unmatched} 条 ReviewSubmitted 事件没有对应的本地房源，已跳过。")
+    return property_totals, user_totals, {'unmatched': unmatched}
+
+def rebuild_from_reviews(apply: bool = True) -> dict:
+    """根据本地评价表重新计算房源和用户评分汇总并对账，返回各表的行数和不一致的行数。"""
+    return _reconcile(
+        lambda: (_totals_from_reviews('booking__property_id'), _totals_from_reviews('receiver_id'), {}), apply,
+    )
+
+def rebuild_from_events(apply: bool = True) -> dict:
+    """
+    根据已索引的链上 ReviewSubmitted 事件重新计算评分汇总并对账 (以链上数据为准)。
+    事件中的 propertyId 通过 Property.blockchain_property_id 对应到本地房源，
+    评价接收者为该房源的所有者；没有对应本地房源的事件计入 unmatched。
+    """
+    return _reconcile(_totals_from_events, apply)
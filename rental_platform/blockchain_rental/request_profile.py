@@ -0,0 +1,92 @@
+from contextvars import ContextVar
+import heapq
+import threading
+import time
+
+# 当前请求的性能统计；由 RequestTimingMiddleware 在请求开始时设置，请求之外为 None
+_current_profile = ContextVar('blockchain_rental_request_profile', default=None)
+
+
+class RequestProfile:
+    """
+    单个请求的耗时统计: SQL 查询数/耗时、链上 RPC 调用数/耗时，并保留耗时最长的若干条 SQL。
+    共享线程池中的批量读取也会累加到同一个对象上，因此写入时加锁。
+    """
+    def __init__(self, top_queries: int = 5):
+        self.started = time.perf_counter()
+        self.top_queries = top_queries
+        self.db_count = 0
+        self.db_time = 0.0
+        self.rpc_count = 0
+        self.rpc_time = 0.0
+        self.rpc_methods = {}
+        self._slow_queries = []  # (耗时, 序号, sql) 小顶堆，只保留最慢的 top_queries 条
+        self._lock = threading.Lock()
+
+    def record_query(self, sql: str, duration: float):
+        with self._lock:
+            self.db_count += 1
+            self.db_time += duration
+            entry = (duration, self.db_count, sql)
+            if len(self._slow_queries) < self.top_queries:
+                heapq.heappush(self._slow_queries, entry)
+            elif self._slow_queries and duration > self._slow_queries[0][0]:
+                heapq.heapreplace(self._slow_queries, entry)
+
+    def record_rpc(self, method: str, duration: float):
+        with self._lock:
+            self.rpc_count += 1
+            self.rpc_time += duration
+            count, total = self.rpc_methods.get(method, (0, 0.0))
+            self.rpc_methods[method] = (count + 1, total + duration)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def slow_queries(self) -> list:
+        return [
+            {"sql": sql, "duration_ms": round(duration * 1000, 2)}
+            for duration, _, sql in sorted(self._slow_queries, reverse=True)
+        ]
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def activate(profile: RequestProfile):
+    """设置当前请求的统计对象，返回用于 deactivate 的令牌。"""
+    return _current_profile.set(profile)
+
+
+def deactivate(token):
+    _current_profile.reset(token)
+
+
+def query_wrapper(execute, sql, params, many, context):
+    """数据库执行包装器: 当前上下文中有请求统计对象时记录 SQL 耗时，否则直接执行。"""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - start)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """
+    connection_created 信号处理函数: 在每个新建的数据库连接上安装 query_wrapper。
+    连接在实际执行查询的线程中创建 (ASGI 下为 sync_to_async 的工作线程)，
+    而 sync_to_async 会把调用方的 contextvars 复制到工作线程，因此查询总能找到所属请求的统计对象。
+    """
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+def record_rpc(method: str, duration: float):
+    """由 metrics.observe_rpc 调用；不在请求中 (如管理命令) 时忽略。"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record_rpc(method, duration)
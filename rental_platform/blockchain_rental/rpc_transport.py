@@ -0,0 +1,473 @@
+from web3 import AsyncHTTPProvider, HTTPProvider
+from web3._utils.request import async_make_post_request
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+import aiohttp
+import asyncio
+import json
+import logging
+import random
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 这些方法不是幂等的，网络错误时重发可能导致重复广播，因此不自动重试
+NON_RETRYABLE_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+class RetryableRPCError(Exception):
+    """节点返回了可重试的 HTTP 状态码 (限流或网关错误)。"""
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """带完全抖动 (full jitter) 的指数退避时长。"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    连接池化的 HTTP RPC 传输。
+
+    与 web3 默认的 HTTPProvider 相比:
+    - 所有线程共享同一个 requests.Session 和 HTTPAdapter 连接池 (默认实现按线程缓存会话，
+      突发流量下每个新线程都要重新建立 TCP/TLS 连接)，连接保持 keep-alive 复用；
+    - 每次调用使用固定超时；
+    - 网络错误、超时和 429/5xx 响应按带抖动的指数退避有限次重试 (非幂等方法除外)；
+    - 提供 make_batch_request，以一次 HTTP 往返发送 JSON-RPC 批量请求。
+    """
+    # 由本类自行处理重试，不再叠加 web3 默认的重试中间件
+    _middlewares = ()
+
+    def __init__(self, endpoint_uri, pool_size: int = 20, timeout: float = 10.0,
+                 max_retries: int = 2, backoff_base: float = 0.2, backoff_max: float = 2.0):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        super().__init__(endpoint_uri, request_kwargs={'timeout': timeout})
+
+    def _post(self, body: bytes, retryable: bool = True) -> bytes:
+        """ (辅助方法) 通过共享会话发送请求，按需重试 """
+        attempts = self.max_retries + 1 if retryable else 1
+        for attempt in range(attempts):
+            try:
+                response = self.session.post(self.endpoint_uri, data=body, **self.get_request_kwargs())
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise RetryableRPCError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                return response.content
+            except (requests.ConnectionError, requests.Timeout, RetryableRPCError) as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning(f"RPC 请求失败 ({e})，{delay:.2f} 秒后进行第 {attempt + 1} 次重试。")
+                time.sleep(delay)
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        raw_response = self._post(request_data, retryable=method not in NON_RETRYABLE_METHODS)
+        return self.decode_rpc_response(raw_response)
+
+    def make_batch_request(self, payload: list):
+        """发送 JSON-RPC 批量请求，返回节点的原始响应 (列表，或整体失败时的错误对象)。"""
+        return json.loads(self._post(json.dumps(payload).encode()))
+
+# 异步传输中可重试的异常: 连接错误、超时和可重试的 HTTP 状态码
+ASYNC_RETRYABLE_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError, RetryableRPCError)
+
+async def async_post(endpoint_uri: str, body: bytes, request_kwargs: dict) -> bytes:
+    """通过 web3 按线程和事件循环缓存的 aiohttp 会话 (keep-alive) 发送请求；429/5xx 转换为 RetryableRPCError。"""
+    try:
+        return await async_make_post_request(endpoint_uri, body, **request_kwargs)
+    except aiohttp.ClientResponseError as e:
+        if e.status in RETRYABLE_STATUS_CODES:
+            raise RetryableRPCError(f"HTTP {e.status}") from e
+        raise
+
+class AsyncPooledHTTPProvider(AsyncHTTPProvider):
+    """
+    PooledHTTPProvider 的异步版本 (供 AsyncBlockchainInterface 使用)，由 from_sync() 按同步传输的节点、超时和重试参数创建:
+    - 复用 web3 缓存的 aiohttp 会话，连接保持 keep-alive；
+    - 网络错误、超时和 429/5xx 响应按带抖动的指数退避有限次重试 (非幂等方法除外)，等待期间不占用线程。
+    """
+    # 由本类自行处理重试，不再叠加 web3 默认的重试中间件
+    _middlewares = ()
+
+    def __init__(self, endpoint_uri, timeout: float = 10.0, max_retries: int = 2,
+                 backoff_base: float = 0.2, backoff_max: float = 2.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        super().__init__(endpoint_uri, request_kwargs={'timeout': aiohttp.ClientTimeout(total=timeout)})
+
+    @classmethod
+    def from_sync(cls, provider: PooledHTTPProvider) -> 'AsyncPooledHTTPProvider':
+        return cls(provider.endpoint_uri, timeout=provider.timeout, max_retries=provider.max_retries,
+                   backoff_base=provider.backoff_base, backoff_max=provider.backoff_max)
+
+    async def _post(self, body: bytes, retryable: bool = True) -> bytes:
+        """ (辅助方法) 发送请求，按需重试 """
+        attempts = self.max_retries + 1 if retryable else 1
+        for attempt in range(attempts):
+            try:
+                return await async_post(self.endpoint_uri, body, self.get_request_kwargs())
+            except ASYNC_RETRYABLE_ERRORS as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning(f"异步 RPC 请求失败 ({e!r})，{delay:.2f} 秒后进行第 {attempt + 1} 次重试。")
+                await asyncio.sleep(delay)
+
+    async def make_request(self, method, params):
+        raw_response = await self._post(self.encode_rpc_request(method, params), retryable=method not in NON_RETRYABLE_METHODS)
+        return self.decode_rpc_response(raw_response)
+
+class RPCHealthMonitor:
+    """
+    后台健康探测线程。
+
+    周期性调用 probe()，根据结果维护 healthy 标志。请求线程只读取该标志，
+    从不在请求路径上执行重连；节点恢复后由探测线程负责重新初始化。
+    偶发的单次探测失败不会立即让所有链上接口返回 503: 连续失败 failure_threshold 次才标记为不可用，
+    探测失败后改为每 retry_interval 秒重新探测，尽快确认故障或恢复。
+    """
+    def __init__(self, probe, interval: float, failure_threshold: int = 2, retry_interval: float = 2.0):
+        self.probe = probe
+        self.interval = interval
+        self.failure_threshold = max(1, failure_threshold)
+        self.retry_interval = min(retry_interval, interval)
+        self.healthy = False
+        self.last_error = None
+        self.consecutive_failures = 0
+        self.first_probe_done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='rpc-health-monitor', daemon=True)
+            self._thread.start()
+
+    def check_now(self) -> bool:
+        try:
+            ok = bool(self.probe())
+        except Exception as e:
+            ok = False
+            self.last_error = str(e)
+            logger.warning(f"RPC 健康探测失败: {e}")
+        if ok:
+            self.consecutive_failures = 0
+            self.last_error = None
+            self.healthy = True
+        else:
+            self.consecutive_failures += 1
+            # 尚未成功过 (首次探测) 时直接视为不可用
+            if not self.first_probe_done.is_set() or self.consecutive_failures >= self.failure_threshold:
+                self.healthy = False
+        self.first_probe_done.set()
+        return self.healthy
+
+    def _run(self):
+        while True:
+            self.check_now()
+            time.sleep(self.interval if self.consecutive_failures == 0 else self.retry_interval)
+
+class NoHealthyEndpointError(Exception):
+    """所有 RPC 节点的熔断器都处于打开状态。"""
+
+# 节点以 JSON-RPC 错误 (而不是 HTTP 429) 表示限流时使用的错误码
+RATE_LIMIT_RPC_ERROR_CODES = {-32005, 429}
+
+class RPCEndpoint:
+    """
+    单个 RPC 节点的滚动统计与熔断器状态 (由 FailoverHTTPProvider 在持锁时更新)。
+
+    latency / error_rate 为指数加权移动平均 (EWMA)；连续失败 failure_threshold 次或错误率超过
+    error_rate_threshold 时熔断器打开，冷却 cooldown 秒后进入半开状态，只放行一次试探请求:
+    成功则关闭熔断器，失败则重新打开。head 为最近一次探测到的链头区块号 (尚未探测成功时为 None)，
+    lagging 表示该链头落后所有节点中的最高链头超过允许的区块数。
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, provider: PooledHTTPProvider):
+        self.provider = provider
+        self.uri = provider.endpoint_uri
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.head = None
+        self.lagging = False
+
+    @property
+    def name(self) -> str:
+        """日志中使用的节点名称 (只保留主机部分，避免输出 URL 中的 API Key)"""
+        return urlparse(self.uri).netloc or self.uri
+
+    def score(self) -> float:
+        """路由优先级，越小越优先: 滚动延迟按错误率放大；尚无样本的节点优先，以便尽快取得样本"""
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(0.05, 1.0 - self.error_rate)
+
+    def snapshot(self) -> dict:
+        return {
+            "endpoint": self.name,
+            "state": self.state,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "consecutive_failures": self.consecutive_failures,
+            "head": self.head,
+            "lagging": self.lagging,
+        }
+
+class FailoverHTTPProvider(HTTPProvider):
+    """
+    多节点 RPC 传输: 按滚动延迟和错误率把请求路由到最快的可用节点，失败时切换到下一个节点。
+
+    - 每个节点使用一个 PooledHTTPProvider (共享连接池、固定超时)，单个节点上不再重试；
+      可重试的失败 (网络错误、超时、429/5xx 及限流类 JSON-RPC 错误) 换一个节点重发，最多 max_retries 次；
+    - 非幂等方法 (NON_RETRYABLE_METHODS) 只发送到当前最优节点一次，不切换节点重发；
+    - 熔断器打开的节点不参与路由，冷却后由请求或 probe_endpoints() (后台健康探测线程调用) 试探恢复；
+    - probe_endpoints() 记录各节点的链头，落后最高链头超过 max_block_lag 个区块的节点 (同步滞后，读到的是旧状态)
+      不参与路由，只在没有其他可用节点时兜底使用；max_block_lag 为 None 时不检查；
+    - 所有节点都不可用时抛出 NoHealthyEndpointError，不等待超时。
+    """
+    _middlewares = ()
+
+    def __init__(self, endpoint_uris: list, pool_size: int = 20, timeout: float = 10.0,
+                 max_retries: int = 2, backoff_base: float = 0.2, backoff_max: float = 2.0,
+                 ewma_alpha: float = 0.2, failure_threshold: int = 3, error_rate_threshold: float = 0.5,
+                 cooldown: float = 30.0, max_block_lag: int = 5):
+        if not endpoint_uris:
+            raise ValueError("至少需要一个 RPC 节点地址。")
+        self.endpoints = [
+            RPCEndpoint(PooledHTTPProvider(uri, pool_size=pool_size, timeout=timeout, max_retries=0))
+            for uri in endpoint_uris
+        ]
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.max_block_lag = max_block_lag
+        self._lock = threading.Lock()
+        super().__init__(endpoint_uris[0], request_kwargs={'timeout': timeout})
+
+    def __str__(self):
+        return f"RPC failover connection {', '.join(endpoint.name for endpoint in self.endpoints)}"
+
+    # --- 路由与熔断 ---
+    def _acquire(self, exclude: set) -> RPCEndpoint:
+        """
+        (辅助方法) 选出本次请求使用的节点: 熔断器关闭且未落后链头的节点中得分最低者；
+        没有时放行一个冷却结束的节点做半开试探；再没有时才使用落后链头的节点
+        """
+        now = time.monotonic()
+        with self._lock:
+            closed = [e for e in self.endpoints if e.state == RPCEndpoint.CLOSED and e not in exclude]
+            synced = [e for e in closed if not e.lagging]
+            if synced:
+                return min(synced, key=RPCEndpoint.score)
+            recovering = [
+                e for e in self.endpoints
+                if e.state == RPCEndpoint.OPEN and e not in exclude and now - e.opened_at >= self.cooldown
+            ]
+            if recovering:
+                endpoint = min(recovering, key=lambda e: e.opened_at)
+                endpoint.state = RPCEndpoint.HALF_OPEN
+                return endpoint
+            if closed:
+                return min(closed, key=lambda e: (-e.head, e.score()))
+        raise NoHealthyEndpointError("所有 RPC 节点均不可用 (熔断中)。")
+
+    def _record(self, endpoint: RPCEndpoint, latency: float = None, error: Exception = None):
+        """ (辅助方法) 更新节点的滚动统计，并按结果切换熔断器状态"""
+        alpha = self.ewma_alpha
+        with self._lock:
+            endpoint.error_rate = (1 - alpha) * endpoint.error_rate + alpha * (1.0 if error else 0.0)
+            if error is None:
+                endpoint.latency = latency if endpoint.latency is None else (1 - alpha) * endpoint.latency + alpha * latency
+                endpoint.consecutive_failures = 0
+                if endpoint.state != RPCEndpoint.CLOSED:
+                    endpoint.state = RPCEndpoint.CLOSED
+                    # 恢复后从较低的错误率重新开始统计，避免刚恢复就因历史错误率再次熔断
+                    endpoint.error_rate = min(endpoint.error_rate, self.error_rate_threshold / 2)
+                    logger.info(f"RPC 节点 {endpoint.name} 已恢复，熔断器关闭。")
+                return
+            endpoint.consecutive_failures += 1
+            if endpoint.state == RPCEndpoint.HALF_OPEN or (
+                endpoint.state == RPCEndpoint.CLOSED and (
+                    endpoint.consecutive_failures >= self.failure_threshold
+                    or endpoint.error_rate >= self.error_rate_threshold
+                )
+            ):
+                if endpoint.state == RPCEndpoint.CLOSED:
+                    logger.warning(f"RPC 节点 {endpoint.name} 连续失败 {endpoint.consecutive_failures} 次 "
+                                   f"(错误率 {endpoint.error_rate:.0%})，熔断器打开: {error}")
+                endpoint.state = RPCEndpoint.OPEN
+                endpoint.opened_at = time.monotonic()
+
+    def endpoint_stats(self) -> list:
+        with self._lock:
+            return [endpoint.snapshot() for endpoint in self.endpoints]
+
+    def probe_endpoints(self) -> int:
+        """
+        向每个熔断器关闭或冷却已结束的节点发送一次 eth_blockNumber，刷新延迟统计和链头并试探恢复，返回可用节点数。
+        由后台健康探测线程定期调用，使不在最优路径上的节点也保有最新的延迟样本和链头。
+        """
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            with self._lock:
+                if endpoint.state == RPCEndpoint.OPEN and now - endpoint.opened_at < self.cooldown:
+                    continue
+                if endpoint.state == RPCEndpoint.OPEN:
+                    endpoint.state = RPCEndpoint.HALF_OPEN
+            decoded = self._send(endpoint, self.encode_rpc_request('eth_blockNumber', []), ignore_errors=True)
+            try:
+                head = int(decoded['result'], 16)
+            except (TypeError, KeyError, ValueError):
+                continue
+            with self._lock:
+                endpoint.head = head
+        with self._lock:
+            best_head = max((e.head for e in self.endpoints if e.head is not None), default=None)
+            for endpoint in self.endpoints:
+                lagging = (self.max_block_lag is not None and endpoint.head is not None
+                           and best_head - endpoint.head > self.max_block_lag)
+                if lagging and not endpoint.lagging:
+                    logger.warning(f"RPC 节点 {endpoint.name} 链头 {endpoint.head} 落后最高链头 {best_head} "
+                                   f"超过 {self.max_block_lag} 个区块，暂不参与路由。")
+                elif endpoint.lagging and not lagging:
+                    logger.info(f"RPC 节点 {endpoint.name} 已追上链头，恢复参与路由。")
+                endpoint.lagging = lagging
+            return sum(1 for endpoint in self.endpoints if endpoint.state == RPCEndpoint.CLOSED)
+
+    # --- 发送 ---
+    @staticmethod
+    def _is_rate_limited(decoded) -> bool:
+        responses = decoded if isinstance(decoded, list) else [decoded]
+        for response in responses:
+            error = response.get('error') if isinstance(response, dict) else None
+            if isinstance(error, dict) and (
+                error.get('code') in RATE_LIMIT_RPC_ERROR_CODES or 'rate limit' in str(error.get('message', '')).lower()
+            ):
+                return True
+        return False
+
+    def _send(self, endpoint: RPCEndpoint, body: bytes, ignore_errors: bool = False):
+        """ (辅助方法) 向指定节点发送一次请求并记录结果，返回解码后的响应"""
+        started = time.perf_counter()
+        try:
+            decoded = json.loads(endpoint.provider._post(body, retryable=False))
+            if self._is_rate_limited(decoded):
+                raise RetryableRPCError(f"节点限流: {decoded if isinstance(decoded, dict) else decoded[0]}")
+        except Exception as e:
+            # 任何异常都要记录，否则半开试探中的节点会一直停留在半开状态
+            self._record(endpoint, error=e)
+            if ignore_errors:
+                return None
+            raise
+        self._record(endpoint, latency=time.perf_counter() - started)
+        return decoded
+
+    def _dispatch(self, body: bytes, retryable: bool = True):
+        """ (辅助方法) 按路由顺序发送请求，可重试的失败切换到下一个节点"""
+        attempts = self.max_retries + 1 if retryable else 1
+        tried = set()
+        for attempt in range(attempts):
+            try:
+                endpoint = self._acquire(tried)
+            except NoHealthyEndpointError:
+                if not tried or attempt == attempts - 1:
+                    raise
+                # 本次请求已试过所有可用节点: 退避后从头再选
+                tried.clear()
+                time.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                endpoint = self._acquire(tried)
+            tried.add(endpoint)
+            try:
+                return self._send(endpoint, body)
+            except (requests.RequestException, RetryableRPCError, ValueError) as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"RPC 节点 {endpoint.name} 请求失败 ({e})，切换节点进行第 {attempt + 1} 次重试。")
+
+    def make_request(self, method, params):
+        return self._dispatch(self.encode_rpc_request(method, params), retryable=method not in NON_RETRYABLE_METHODS)
+
+    def make_batch_request(self, payload: list):
+        """发送 JSON-RPC 批量请求，返回节点的原始响应 (列表，或整体失败时的错误对象)。"""
+        return self._dispatch(json.dumps(payload).encode())
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return self.probe_endpoints() > 0
+
+class AsyncFailoverHTTPProvider(AsyncHTTPProvider):
+    """
+    FailoverHTTPProvider 的异步版本 (供 AsyncBlockchainInterface 使用)。
+
+    不维护自己的节点状态，而是直接使用同步传输的 RPCEndpoint 列表及其路由与熔断方法 (_acquire、_record):
+    同步和异步请求共用同一份延迟/错误率统计、熔断器和链头滞后排除，后台健康探测 (probe_endpoints) 对两者同时生效。
+    切换节点、重试次数和非幂等方法的处理与同步版本一致，网络 I/O 由 aiohttp 完成，不占用线程。
+    """
+    _middlewares = ()
+
+    def __init__(self, failover: FailoverHTTPProvider):
+        self.failover = failover
+        timeout = failover.endpoints[0].provider.timeout
+        super().__init__(failover.endpoint_uri, request_kwargs={'timeout': aiohttp.ClientTimeout(total=timeout)})
+
+    def __str__(self):
+        return f"Async {self.failover}"
+
+    async def _send(self, endpoint: RPCEndpoint, body: bytes):
+        """ (辅助方法) 向指定节点发送一次请求并把结果记录到共享的节点统计中，返回解码后的响应"""
+        started = time.perf_counter()
+        try:
+            decoded = json.loads(await async_post(endpoint.uri, body, self.get_request_kwargs()))
+            if self.failover._is_rate_limited(decoded):
+                raise RetryableRPCError(f"节点限流: {decoded if isinstance(decoded, dict) else decoded[0]}")
+        except Exception as e:
+            self.failover._record(endpoint, error=e)
+            raise
+        self.failover._record(endpoint, latency=time.perf_counter() - started)
+        return decoded
+
+    async def _dispatch(self, body: bytes, retryable: bool = True):
+        """ (辅助方法) 按共享的路由顺序发送请求，可重试的失败切换到下一个节点"""
+        failover = self.failover
+        attempts = failover.max_retries + 1 if retryable else 1
+        tried = set()
+        for attempt in range(attempts):
+            try:
+                endpoint = failover._acquire(tried)
+            except NoHealthyEndpointError:
+                if not tried or attempt == attempts - 1:
+                    raise
+                tried.clear()
+                await asyncio.sleep(backoff_delay(attempt, failover.backoff_base, failover.backoff_max))
+                endpoint = failover._acquire(tried)
+            tried.add(endpoint)
+            try:
+                return await self._send(endpoint, body)
+            except (aiohttp.ClientError, asyncio.TimeoutError, RetryableRPCError, ValueError) as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"RPC 节点 {endpoint.name} 异步请求失败 ({e!r})，切换节点进行第 {attempt + 1} 次重试。")
+
+    async def make_request(self, method, params):
+        return await self._dispatch(self.encode_rpc_request(method, params), retryable=method not in NON_RETRYABLE_METHODS)
@@ -0,0 +1,79 @@
+from rest_framework import serializers
+
+from .models import BlockchainTransaction, Booking, Property, Review, User
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """嵌套在其他对象中的用户摘要 (不包含邮箱等个人信息)"""
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'blockchain_address', 'is_identity_verified')
+
+
+class PropertySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Property
+        fields = ('id', 'title', 'blockchain_property_id')
+
+
+class PropertySerializer(serializers.ModelSerializer):
+    owner = UserSummarySerializer(read_only=True)
+    review_count = serializers.SerializerMethodField()
+    average_rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Property
+        fields = (
+            'id', 'owner', 'title', 'description', 'location', 'price_per_night',
+            'blockchain_property_id', 'verification_hash', 'is_verified',
+            'review_count', 'average_rating', 'created_at', 'updated_at',
+        )
+
+    @staticmethod
+    def _rating_aggregate(obj):
+        # 通过 select_related('rating_aggregate') 预先取回，没有评价时不存在该行
+        return getattr(obj, 'rating_aggregate', None)
+
+    def get_review_count(self, obj):
+        aggregate = self._rating_aggregate(obj)
+        return aggregate.review_count if aggregate else 0
+
+    def get_average_rating(self, obj):
+        aggregate = self._rating_aggregate(obj)
+        return aggregate.average_rating if aggregate else None
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    property = PropertySummarySerializer(read_only=True)
+    renter = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Booking
+        fields = (
+            'id', 'property', 'renter', 'check_in_date', 'check_out_date', 'total_price', 'status',
+            'blockchain_contract_id', 'contract_hash', 'contract_status', 'created_at', 'updated_at',
+        )
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    reviewer = UserSummarySerializer(read_only=True)
+    receiver = UserSummarySerializer(read_only=True)
+    property_id = serializers.IntegerField(source='booking.property_id', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = (
+            'id', 'booking', 'property_id', 'reviewer', 'receiver', 'rating', 'comment',
+            'review_hash', 'blockchain_verification', 'created_at',
+        )
+
+
+class BlockchainTransactionSerializer(serializers.ModelSerializer):
+    user = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = BlockchainTransaction
+        fields = (
+            'id', 'user', 'transaction_type', 'transaction_hash', 'related_object_id', 'related_object_type',
+            'status', 'block_number', 'created_at', 'confirmed_at',
+        )
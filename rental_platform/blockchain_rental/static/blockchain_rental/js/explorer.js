@@ -234,6 +234,20 @@ async function loadContractInfo() {
     }
 }
 
+// 从后端事件索引 API 获取一页事件（最近的在前）
+async function fetchIndexedEvents(eventTypes, limit = 50) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (eventTypes && eventTypes.length > 0) {
+        params.set('type', eventTypes.join(','));
+    }
+    const response = await fetch(`${EVENTS_API_URL}?${params.toString()}`);
+    const payload = await response.json();
+    if (!response.ok || payload.status !== 'success') {
+        throw new Error(payload.message || `HTTP ${response.status}`);
+    }
+    return payload.data;
+}
+
 // 加载所有事件
 async function loadEvents() {
     try {
@@ -244,84 +258,14 @@ async function loadEvents() {
         setLoading(bookingEventsEl);
         setLoading(reviewEventsEl);
         
-        // 获取当前区块号
-        const currentBlock = await provider.getBlockNumber();
-        // 查询从 0 到当前区块的所有事件（或限制查询范围以提高性能）
-        const startBlock = Math.max(0, currentBlock - 10000); // 限制为最近10000个区块
-        
-        // 定义要查询的事件类型
-        const eventTypes = [
-            'UserRegistered',
-            'PropertyRegistered',
-            'BookingCreated',
-            'BookingConfirmed',
-            'BookingCompleted',
-            'ReviewSubmitted'
-        ];
-        
-        // 收集所有事件
-        let allEvents = [];
-        let userEvents = [];
-        let propertyEvents = [];
-        let bookingEvents = [];
-        let reviewEvents = [];
-        
-        // 逐个查询事件类型
-        for (const eventType of eventTypes) {
-            console.log(`查询事件: ${eventType}`);
-            
-            // 获取事件过滤器
-            const filter = contract.filters[eventType]();
-            
-            // 查询事件历史
-            const events = await contract.queryFilter(filter, startBlock, currentBlock);
-            console.log(`找到 ${events.length} 个 ${eventType} 事件`);
-            
-            // 获取事件详情
-            for (const event of events) {
-                // 获取包含事件的交易细节
-                const tx = await event.getTransaction();
-                // 获取包含事件的区块细节
-                const block = await event.getBlock();
-                
-                // 创建事件对象
-                const eventObj = {
-                    type: eventType,
-                    data: event.args,
-                    timestamp: block.timestamp,
-                    txHash: tx.hash,
-                    blockNumber: event.blockNumber
-                };
-                
-                // 添加到所有事件列表
-                allEvents.push(eventObj);
-                
-                // 根据事件类型添加到相应列表
-                switch (eventType) {
-                    case 'UserRegistered':
-                        userEvents.push(eventObj);
-                        break;
-                    case 'PropertyRegistered':
-                        propertyEvents.push(eventObj);
-                        break;
-                    case 'BookingCreated':
-                    case 'BookingConfirmed':
-                    case 'BookingCompleted':
-                        bookingEvents.push(eventObj);
-                        break;
-                    case 'ReviewSubmitted':
-                        reviewEvents.push(eventObj);
-                        break;
-                }
-            }
-        }
-        
-        // 按时间戳排序（最近的在前）
-        allEvents.sort((a, b) => b.timestamp - a.timestamp);
-        userEvents.sort((a, b) => b.timestamp - a.timestamp);
-        propertyEvents.sort((a, b) => b.timestamp - a.timestamp);
-        bookingEvents.sort((a, b) => b.timestamp - a.timestamp);
-        reviewEvents.sort((a, b) => b.timestamp - a.timestamp);
+        // 事件由后端索引器同步到数据库，每个表格只需一次分页查询，无需逐个访问区块链节点
+        const [allEvents, userEvents, propertyEvents, bookingEvents, reviewEvents] = await Promise.all([
+            fetchIndexedEvents(null),
+            fetchIndexedEvents(['UserRegistered']),
+            fetchIndexedEvents(['PropertyRegistered']),
+            fetchIndexedEvents(['BookingCreated', 'BookingConfirmed', 'BookingCompleted']),
+            fetchIndexedEvents(['ReviewSubmitted'])
+        ]);
         
         // 清空各表格
         allEventsEl.innerHTML = '';
@@ -387,62 +331,57 @@ async function loadEvents() {
     }
 }
 
-// 设置事件监听器，实时监听新事件
+// 后端不支持事件流时 (例如以 WSGI/runserver 部署) 改为定期刷新事件列表的间隔
+const EVENTS_POLL_FALLBACK_MS = 30000;
+const STREAM_EVENT_TYPES = ['UserRegistered', 'PropertyRegistered', 'BookingCreated', 'BookingConfirmed', 'BookingCompleted', 'ReviewSubmitted'];
+
+// 订阅后端推送的新事件 (SSE)。所有标签页共享服务端的一次轮询，浏览器不再直接订阅区块链节点；
+// 断线后 EventSource 会携带 Last-Event-ID 自动重连，服务端补发期间错过的事件
 function setupEventListeners() {
-    // 监听用户注册事件
-    contract.on('UserRegistered', (user, name, timestamp, event) => {
-        console.log('新用户注册事件:', user, name, timestamp);
-        handleNewEvent('UserRegistered', {user, name, timestamp}, event);
-    });
-    
-    // 监听房源注册事件
-    contract.on('PropertyRegistered', (propertyId, owner, title, event) => {
-        console.log('新房源注册事件:', propertyId, owner, title);
-        handleNewEvent('PropertyRegistered', {propertyId, owner, title}, event);
-    });
-    
-    // 监听预订创建事件
-    contract.on('BookingCreated', (bookingId, propertyId, tenant, event) => {
-        console.log('新预订创建事件:', bookingId, propertyId, tenant);
-        handleNewEvent('BookingCreated', {bookingId, propertyId, tenant}, event);
-    });
-    
-    // 监听预订确认事件
-    contract.on('BookingConfirmed', (bookingId, event) => {
-        console.log('预订确认事件:', bookingId);
-        handleNewEvent('BookingConfirmed', {bookingId}, event);
-    });
-    
-    // 监听预订完成事件
-    contract.on('BookingCompleted', (bookingId, event) => {
-        console.log('预订完成事件:', bookingId);
-        handleNewEvent('BookingCompleted', {bookingId}, event);
-    });
-    
-    // 监听评价提交事件
-    contract.on('ReviewSubmitted', (propertyId, reviewer, rating, event) => {
-        console.log('新评价提交事件:', propertyId, reviewer, rating);
-        handleNewEvent('ReviewSubmitted', {propertyId, reviewer, rating}, event);
+    if (!window.EventSource) {
+        setInterval(loadEvents, EVENTS_POLL_FALLBACK_MS);
+        return;
+    }
+    const source = new EventSource(EVENTS_STREAM_URL);
+    let connected = false;
+    let fallbackTimer = null;
+
+    source.onopen = () => {
+        connected = true;
+        if (fallbackTimer) {
+            clearInterval(fallbackTimer);
+            fallbackTimer = null;
+        }
+    };
+    source.onerror = () => {
+        // 从未连接成功说明服务端不支持事件流，停止重试并退回定期刷新
+        if (!connected && !fallbackTimer) {
+            source.close();
+            console.warn('事件流不可用，改为每 30 秒刷新事件列表');
+            fallbackTimer = setInterval(loadEvents, EVENTS_POLL_FALLBACK_MS);
+        }
+    };
+    STREAM_EVENT_TYPES.forEach(eventType => {
+        source.addEventListener(eventType, message => {
+            const event = JSON.parse(message.data);
+            console.log('新事件:', event.type, event.data);
+            handleNewEvent(event);
+        });
     });
 }
 
-// 处理新事件
-async function handleNewEvent(eventType, eventArgs, eventObj) {
+// 根据新事件在本地更新统计数字，避免每个事件都重新查询合约
+function incrementCounter(element) {
+    const value = parseInt(element.textContent, 10);
+    if (!Number.isNaN(value)) {
+        element.textContent = String(value + 1);
+    }
+}
+
+// 处理新事件，event 为事件流推送的数据 (与 /api/events/ 返回的格式相同)
+function handleNewEvent(event) {
+    const eventType = event.type;
     try {
-        // 获取包含事件的交易细节
-        const tx = await eventObj.getTransaction();
-        // 获取包含事件的区块细节
-        const block = await eventObj.getBlock();
-        
-        // 创建事件对象
-        const event = {
-            type: eventType,
-            data: eventArgs,
-            timestamp: block.timestamp,
-            txHash: tx.hash,
-            blockNumber: eventObj.blockNumber
-        };
-        
         // 创建事件行
         let row;
         
@@ -505,7 +444,11 @@ async function handleNewEvent(eventType, eventArgs, eventObj) {
         }
         
         // 更新合约信息
-        loadContractInfo();
+        if (eventType === 'PropertyRegistered') {
+            incrementCounter(propertyCountEl);
+        } else if (eventType === 'BookingCreated') {
+            incrementCounter(bookingCountEl);
+        }
         
         // 显示通知
         showNotification(`新${getEventTypeName(eventType)}事件`);
@@ -1,3 +1,1762 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+import asyncio
+import json
+import math
+from pathlib import Path
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from prometheus_client import REGISTRY
+from web3 import AsyncWeb3, Web3
+from web3._utils.abi import get_abi_output_types
+from web3.exceptions import ContractLogicError
+
+from . import calldata, contract_abi
+from .async_blockchain_interface import AsyncBlockchainInterface
+from .benchmarking import DAY, load_contract_bytecode, mirror_to_database, percentile, summarize
+from .blockchain_interface import BlockchainInterface
+from .chain_cache import ChainReadCache
+from .chain_reconciler import ChainReconciler, PropertyReconciler, ZERO_ADDRESS
+from .event_indexer import EventIndexer
+from .event_stream import EventBroadcaster, event_stream_app
+from .gas_estimator import GasEstimateCache
+from .management.commands.loadtest import Command as LoadtestCommand, parse_mix
+from .management.commands.run_benchmarks import Command as RunBenchmarksCommand
+from .metrics import observe_rpc
+from .models import (
+    BlockchainTransaction, Booking, ContractEvent, IndexerCheckpoint, Property, PropertyRatingAggregate, ReconcileCheckpoint,
+    Review, User, UserRatingAggregate,
+)
+from .relayer import Relayer
+from .reputation import rebuild_from_events, rebuild_from_reviews
+from .rpc_transport import (
+    AsyncFailoverHTTPProvider, AsyncPooledHTTPProvider, FailoverHTTPProvider, NoHealthyEndpointError, PooledHTTPProvider,
+    RetryableRPCError, RPCEndpoint, RPCHealthMonitor,
+)
+from .tx_tracker import TransactionTracker
+
+
+class LocalModelApiQueryCountTests(TestCase):
+    """本地模型列表 API: SQL 查询数固定，与页大小无关；键集分页不重复、不遗漏。"""
+
+    ROWS = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20)
+        renter = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        cls.properties = []
+        for index in range(cls.ROWS):
+            prop = Property.objects.create(
+                owner=owner, title=f'房源 {index}', description='描述', location='厦门', price_per_night=Decimal('100.00'),
+            )
+            booking = Booking.objects.create(
+                property=prop, renter=renter, total_price=Decimal('200.00'), status='completed',
+                check_in_date=datetime.date(2026, 1, 1), check_out_date=datetime.date(2026, 1, 3),
+            )
+            Review.objects.create(booking=booking, reviewer=renter, receiver=owner, rating=index % 5 + 1, comment='不错')
+            BlockchainTransaction.objects.create(user=renter, transaction_type='booking', transaction_hash='0x' + f'{index:064x}')
+            cls.properties.append(prop)
+
+    def assert_constant_queries(self, url_name, expected_queries=1):
+        url = reverse(url_name)
+        for page_size in (2, self.ROWS):
+            with self.assertNumQueries(expected_queries):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['results']), page_size)
+
+    def test_property_list_query_count(self):
+        self.assert_constant_queries('local-property-list')
+
+    def test_booking_list_query_count(self):
+        self.assert_constant_queries('local-booking-list')
+
+    def test_review_list_query_count(self):
+        self.assert_constant_queries('local-review-list')
+
+    def test_transaction_list_query_count(self):
+        self.assert_constant_queries('local-transaction-list')
+
+    def test_cursor_pagination_with_equal_created_at(self):
+        # created_at 相同时由 id 决定顺序，逐页遍历应恰好得到全部记录一次
+        Property.objects.update(created_at=timezone.now())
+        seen = []
+        params = {'page_size': 5}
+        while True:
+            data = self.client.get(reverse('local-property-list'), params).json()
+            seen.extend(item['id'] for item in data['results'])
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, sorted((prop.pk for prop in self.properties), reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('local-property-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class StandInNode:
+    """本地替身 RPC 节点: 对任何方法返回区块号 block_number，可设置响应延迟和 HTTP 错误状态码，并记录收到的请求。"""
+
+    def __init__(self, delay=0.0, block_number=100):
+        self.delay = delay
+        self.block_number = block_number
+        self.status = 200
+        self.methods = []
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                requests = body if isinstance(body, list) else [body]
+                node.methods.extend(request['method'] for request in requests)
+                time.sleep(node.delay)
+                results = [{'jsonrpc': '2.0', 'id': request['id'], 'result': hex(node.block_number)} for request in requests]
+                raw = json.dumps(results if isinstance(body, list) else results[0]).encode()
+                self.send_response(node.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FailoverHTTPProviderTests(SimpleTestCase):
+    """多节点 RPC 传输: 按延迟路由、失败切换、熔断与恢复 (使用本地替身节点)。"""
+
+    def setUp(self):
+        self.slow = StandInNode(delay=0.05)
+        self.fast = StandInNode()
+        self.addCleanup(self.slow.stop)
+        self.addCleanup(self.fast.stop)
+        self.provider = FailoverHTTPProvider(
+            [self.slow.url, self.fast.url], timeout=2, max_retries=1, backoff_base=0.01,
+            failure_threshold=2, cooldown=0.2,
+        )
+
+    def reset_counts(self):
+        self.slow.methods.clear()
+        self.fast.methods.clear()
+
+    def test_routes_reads_to_fastest_endpoint(self):
+        self.assertEqual(self.provider.probe_endpoints(), 2)
+        self.reset_counts()
+        for _ in range(5):
+            self.assertEqual(self.provider.make_request('eth_blockNumber', [])['result'], '0x64')
+        self.assertEqual(len(self.fast.methods), 5)
+        self.assertEqual(self.slow.methods, [])
+
+    def test_fails_over_and_trips_circuit(self):
+        self.provider.probe_endpoints()
+        self.fast.status = 503
+        self.reset_counts()
+        for _ in range(4):
+            self.assertEqual(self.provider.make_request('eth_blockNumber', [])['result'], '0x64')
+        # 连续失败 2 次后熔断，之后的请求不再发往该节点
+        self.assertEqual(len(self.fast.methods), 2)
+        self.assertEqual(len(self.slow.methods), 4)
+        states = {stats['endpoint']: stats['state'] for stats in self.provider.endpoint_stats()}
+        self.assertEqual(states[self.fast.url.split('//')[1]], RPCEndpoint.OPEN)
+
+    def test_probe_closes_circuit_after_recovery(self):
+        self.provider.probe_endpoints()
+        self.fast.status = 503
+        self.provider.probe_endpoints()
+        self.provider.probe_endpoints()
+        self.assertEqual(self.provider.probe_endpoints(), 1)  # 冷却中，不探测
+        self.fast.status = 200
+        time.sleep(0.25)
+        self.assertEqual(self.provider.probe_endpoints(), 2)
+        self.reset_counts()
+        self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual(len(self.fast.methods), 1)
+
+    def test_all_endpoints_open_fails_fast(self):
+        self.slow.status = self.fast.status = 503
+        for _ in range(2):
+            self.provider.probe_endpoints()
+        with self.assertRaises(NoHealthyEndpointError):
+            self.provider.make_request('eth_blockNumber', [])
+
+    def test_non_idempotent_methods_are_not_resent(self):
+        self.provider.probe_endpoints()
+        self.fast.status = 503
+        self.reset_counts()
+        with self.assertRaises(RetryableRPCError):
+            self.provider.make_request('eth_sendRawTransaction', ['0x00'])
+        self.assertEqual(len(self.fast.methods) + len(self.slow.methods), 1)
+
+    def test_batch_request_is_routed(self):
+        self.provider.probe_endpoints()
+        responses = self.provider.make_batch_request([
+            {'jsonrpc': '2.0', 'id': index, 'method': 'eth_blockNumber', 'params': []} for index in range(3)
+        ])
+        self.assertEqual([response['result'] for response in responses], ['0x64'] * 3)
+
+    def test_lagging_endpoint_is_not_routed(self):
+        self.fast.block_number = 90
+        self.assertEqual(self.provider.probe_endpoints(), 2)
+        stats = {stats['endpoint']: stats for stats in self.provider.endpoint_stats()}
+        self.assertEqual(stats[self.fast.url.split('//')[1]]['head'], 90)
+        self.assertTrue(stats[self.fast.url.split('//')[1]]['lagging'])
+        self.reset_counts()
+        self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual((len(self.slow.methods), len(self.fast.methods)), (1, 0))
+        # 追上链头 (落后不超过 max_block_lag) 后恢复按延迟路由
+        self.fast.block_number = 97
+        self.provider.probe_endpoints()
+        self.reset_counts()
+        self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual((len(self.slow.methods), len(self.fast.methods)), (0, 1))
+
+    async def test_async_provider_shares_routing_state(self):
+        async_provider = AsyncFailoverHTTPProvider(self.provider)
+        self.fast.block_number = 90
+        self.provider.probe_endpoints()
+        self.reset_counts()
+        self.assertEqual((await async_provider.make_request('eth_blockNumber', []))['result'], '0x64')
+        self.assertEqual((len(self.slow.methods), len(self.fast.methods)), (1, 0))
+
+        self.fast.block_number = 100
+        self.provider.probe_endpoints()
+        self.fast.status = 503
+        self.reset_counts()
+        for _ in range(3):
+            self.assertEqual((await async_provider.make_request('eth_blockNumber', []))['result'], '0x64')
+        # 异步请求的失败同样计入共享的熔断器，之后的同步请求也不再发往该节点
+        states = {stats['endpoint']: stats['state'] for stats in self.provider.endpoint_stats()}
+        self.assertEqual(states[self.fast.url.split('//')[1]], RPCEndpoint.OPEN)
+        self.assertEqual(len(self.fast.methods), 2)
+        self.reset_counts()
+        self.provider.make_request('eth_blockNumber', [])
+        self.assertEqual(self.fast.methods, [])
+
+    async def test_async_provider_does_not_resend_transactions(self):
+        self.provider.probe_endpoints()
+        self.fast.status = 503
+        self.reset_counts()
+        with self.assertRaises(RetryableRPCError):
+            await AsyncFailoverHTTPProvider(self.provider).make_request('eth_sendRawTransaction', ['0x00'])
+        self.assertEqual(len(self.fast.methods) + len(self.slow.methods), 1)
+
+    def test_lagging_endpoint_is_last_resort(self):
+        self.fast.block_number = 90
+        self.provider.probe_endpoints()
+        self.slow.status = 503
+        self.reset_counts()
+        self.assertEqual(self.provider.make_request('eth_blockNumber', [])['result'], '0x5a')
+        self.assertEqual((len(self.slow.methods), len(self.fast.methods)), (1, 1))
+
+
+class RPCHealthMonitorTests(SimpleTestCase):
+    """健康探测: 单次失败不标记为不可用，连续失败达到阈值才标记。"""
+
+    def make_monitor(self, results):
+        results = iter(results)
+
+        def probe():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return RPCHealthMonitor(probe, interval=15, failure_threshold=2, retry_interval=1)
+
+    def test_single_failure_keeps_node_healthy(self):
+        monitor = self.make_monitor([True, ConnectionError('timeout'), True])
+        self.assertTrue(monitor.check_now())
+        self.assertTrue(monitor.check_now())
+        self.assertEqual(monitor.consecutive_failures, 1)
+        self.assertTrue(monitor.check_now())
+        self.assertEqual(monitor.consecutive_failures, 0)
+
+    def test_consecutive_failures_mark_unhealthy(self):
+        monitor = self.make_monitor([True, ConnectionError('down'), False, True])
+        monitor.check_now()
+        monitor.check_now()
+        self.assertFalse(monitor.check_now())
+        self.assertEqual(monitor.last_error, 'down')
+        self.assertTrue(monitor.check_now())
+
+    def test_first_probe_failure_is_unhealthy(self):
+        monitor = self.make_monitor([ConnectionError('down')])
+        self.assertFalse(monitor.check_now())
+        self.assertTrue(monitor.first_probe_done.is_set())
+
+
+@override_settings(BLOCKCHAIN_CACHE_ENABLED=False)
+class AsyncBlockchainInterfaceTests(SimpleTestCase):
+    """异步接口: 复用同步接口的传输参数和健康探测结果，不在请求中初始化；可重试的失败按退避重试 (使用本地替身节点)。"""
+
+    def setUp(self):
+        self.node = StandInNode()
+        self.addCleanup(self.node.stop)
+        self.sync_w3 = Web3(PooledHTTPProvider(self.node.url, timeout=2, max_retries=2, backoff_base=0.01))
+        self.ready = True
+        self.monitor = mock.Mock()
+        self.monitor.first_probe_done.is_set.return_value = True
+        contract = Web3().eth.contract(address=Web3.to_checksum_address('0x' + '33' * 20), abi=contract_abi.get_contract_abi())
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.sync_w3),
+                        mock.patch.object(BlockchainInterface, 'contract', contract),
+                        mock.patch.object(BlockchainInterface, 'is_ready', side_effect=lambda: self.ready),
+                        mock.patch.object(BlockchainInterface, '_get_health_monitor', return_value=self.monitor),
+                        mock.patch.object(AsyncBlockchainInterface, 'w3', None),
+                        mock.patch.object(AsyncBlockchainInterface, 'contract', None),
+                        mock.patch.object(AsyncBlockchainInterface, '_transport', None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_async_transport_follows_sync_transport(self):
+        self.assertTrue(await AsyncBlockchainInterface.is_ready())
+        provider = AsyncBlockchainInterface.w3.provider
+        self.assertIsInstance(provider, AsyncPooledHTTPProvider)
+        self.assertEqual((provider.endpoint_uri, provider.max_retries, provider.timeout), (self.node.url, 2, 2))
+        self.assertEqual(await AsyncBlockchainInterface.w3.eth.block_number, 100)
+        self.assertTrue(await AsyncBlockchainInterface.is_ready())
+        self.assertIs(AsyncBlockchainInterface.w3.provider, provider)
+        # 同步接口重新初始化 (新的传输对象) 后异步传输随之重建
+        BlockchainInterface.w3 = Web3(PooledHTTPProvider(self.node.url, timeout=3))
+        self.assertTrue(await AsyncBlockchainInterface.is_ready())
+        self.assertEqual(AsyncBlockchainInterface.w3.provider.timeout, 3)
+
+    async def test_multiple_endpoints_share_failover_routing(self):
+        failover = FailoverHTTPProvider([self.node.url, self.node.url], timeout=2)
+        BlockchainInterface.w3 = Web3(failover)
+        self.assertTrue(await AsyncBlockchainInterface.is_ready())
+        self.assertIsInstance(AsyncBlockchainInterface.w3.provider, AsyncFailoverHTTPProvider)
+        self.assertIs(AsyncBlockchainInterface.w3.provider.failover, failover)
+        self.assertEqual(await AsyncBlockchainInterface.w3.eth.block_number, 100)
+
+    async def test_unhealthy_node_is_not_contacted(self):
+        self.ready = False
+        result = await AsyncBlockchainInterface.get_property_count()
+        self.assertIsNotNone(result['error'])
+        self.assertIsNone(AsyncBlockchainInterface.w3)
+        self.assertEqual(self.node.methods, [])
+
+    async def test_first_call_waits_for_first_probe(self):
+        self.monitor.first_probe_done.is_set.return_value = False
+        self.assertTrue(await AsyncBlockchainInterface.is_ready())
+        self.assertEqual(BlockchainInterface.is_ready.call_count, 2)
+
+    async def test_retryable_status_is_retried_except_for_sends(self):
+        await AsyncBlockchainInterface.is_ready()
+        self.node.status = 503
+        with self.assertRaises(RetryableRPCError):
+            await AsyncBlockchainInterface.w3.eth.block_number
+        self.assertEqual(self.node.methods, ['eth_blockNumber'] * 3)
+        self.node.methods.clear()
+        with self.assertRaises(RetryableRPCError):
+            await AsyncBlockchainInterface.w3.eth.send_raw_transaction('0x00')
+        self.assertEqual(self.node.methods, ['eth_sendRawTransaction'])
+
+    def test_works_across_event_loops(self):
+        for _ in range(2):
+            self.assertEqual(asyncio.run(self.read_block_number()), 100)
+
+    async def read_block_number(self):
+        await AsyncBlockchainInterface.is_ready()
+        return await AsyncBlockchainInterface.w3.eth.block_number
+
+
+@override_settings(BLOCKCHAIN_GAS_SAFETY_MARGIN=1.5, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class GasEstimateMarginTests(SimpleTestCase):
+    """live 与 cached 两种模式返回的估算值都带安全余量，缓存中保存原始值。"""
+
+    CALLDATA = '0x' + 'ab' * 36
+
+    def setUp(self):
+        GasEstimateCache._cache().clear()
+        self.w3 = mock.Mock()
+        self.w3.eth.estimate_gas.return_value = 100000
+        patcher = mock.patch.object(BlockchainInterface, 'w3', self.w3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_live_mode_applies_margin(self):
+        with self.settings(BLOCKCHAIN_GAS_ESTIMATE_MODE='live'):
+            self.assertEqual(BlockchainInterface._estimate_gas({'data': self.CALLDATA}), (150000, 'live'))
+            self.assertEqual(BlockchainInterface._estimate_gas({'data': self.CALLDATA}), (150000, 'live'))
+        self.assertEqual(self.w3.eth.estimate_gas.call_count, 2)
+
+    def test_cached_mode_applies_margin_once(self):
+        with self.settings(BLOCKCHAIN_GAS_ESTIMATE_MODE='cached'):
+            self.assertEqual(BlockchainInterface._estimate_gas({'data': self.CALLDATA}), (150000, 'live'))
+            self.assertEqual(BlockchainInterface._estimate_gas({'data': self.CALLDATA}), (150000, 'cache'))
+        self.assertEqual(self.w3.eth.estimate_gas.call_count, 1)
+
+    async def test_async_prepare_applies_margin(self):
+        async_w3 = mock.Mock()
+        async_w3.to_checksum_address = Web3.to_checksum_address
+        async_w3.eth.estimate_gas = mock.AsyncMock(return_value=100000)
+        contract = mock.Mock(address=Web3.to_checksum_address('0x' + '33' * 20))
+        with mock.patch.object(AsyncBlockchainInterface, 'is_ready', mock.AsyncMock(return_value=True)), \
+                mock.patch.object(AsyncBlockchainInterface, 'w3', async_w3), \
+                mock.patch.object(AsyncBlockchainInterface, 'contract', contract), \
+                self.settings(BLOCKCHAIN_GAS_ESTIMATE_MODE='cached'):
+            live = await AsyncBlockchainInterface.prepare_confirm_booking_tx(1)
+            cached = await AsyncBlockchainInterface.prepare_confirm_booking_tx(2)
+        self.assertEqual((live['estimated_gas'], live['gas_estimate_source']), (150000, 'live'))
+        self.assertEqual((cached['estimated_gas'], cached['gas_estimate_source']), (150000, 'cache'))
+        async_w3.eth.estimate_gas.assert_awaited_once()
+
+
+@override_settings(BLOCKCHAIN_RPC_BATCH_SIZE=4, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CalibrateGasCommandTests(TestCase):
+    """calibrate_gas 按 BLOCKCHAIN_RPC_BATCH_SIZE 分批查询回执，跳过尚未广播的代发交易。"""
+
+    CONTRACT_ADDRESS = Web3.to_checksum_address('0x' + '33' * 20)
+    CALLDATA = '0x' + 'ab' * 36
+
+    def setUp(self):
+        GasEstimateCache._cache().clear()
+        user = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        self.tx_hashes = ['0x' + f'{index:064x}' for index in range(1, 6)]
+        for tx_hash in self.tx_hashes:
+            BlockchainTransaction.objects.create(user=user, transaction_type='booking', transaction_hash=tx_hash)
+        BlockchainTransaction.objects.create(user=user, transaction_type='booking', status='queued', sender_address='0x' + '44' * 20)
+        self.w3 = mock.Mock()
+        self.w3.provider.make_batch_request.side_effect = lambda payload: [
+            {'id': request['id'], 'result': (
+                {'to': self.CONTRACT_ADDRESS, 'input': self.CALLDATA} if request['method'] == 'eth_getTransactionByHash'
+                else {'status': '0x1', 'gasUsed': hex(40000 + int(request['params'][0], 16))}
+            )}
+            for request in payload
+        ]
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.w3),
+                        mock.patch.object(BlockchainInterface, 'contract', mock.Mock(address=self.CONTRACT_ADDRESS)),
+                        mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_receipts_are_fetched_in_configured_batches(self):
+        call_command('calibrate_gas', stdout=mock.Mock())
+        payloads = [call.args[0] for call in self.w3.provider.make_batch_request.call_args_list]
+        self.assertEqual([len(payload) for payload in payloads], [4, 4, 2])
+        queried = {request['params'][0] for payload in payloads for request in payload}
+        self.assertEqual(queried, set(self.tx_hashes))
+        self.assertEqual(GasEstimateCache.get(self.CALLDATA), GasEstimateCache.with_margin(40005))
+
+
+class CalldataEncoderTests(SimpleTestCase):
+    """离线编码器只依赖 contract_abi 加载的 ABI (无需 RENTAL_PLATFORM_CONTRACT_ABI)，输出与 web3 合约对象一致。"""
+
+    def setUp(self):
+        contract_abi.clear_cache()
+        calldata.get_encoder.cache_clear()
+        self.addCleanup(contract_abi.clear_cache)
+        self.addCleanup(calldata.get_encoder.cache_clear)
+
+    def test_matches_web3_encoding_with_bundled_abi(self):
+        self.assertIsNone(getattr(settings, 'RENTAL_PLATFORM_CONTRACT_ABI', None))
+        contract = Web3().eth.contract(address='0x' + '33' * 20, abi=contract_abi.get_contract_abi())
+        cases = [
+            ('registerUser', ('房东', 'owner@example.com')),
+            ('registerProperty', ('海景公寓', '厦门', 10 ** 17)),
+            ('createBooking', (1, 1767225600, 1767398400)),
+            ('confirmBooking', (7,)),
+            ('completeBooking', (7,)),
+            ('submitReview', (7, 5, '不错')),
+        ]
+        for fn_name, args in cases:
+            with self.subTest(fn_name=fn_name):
+                self.assertEqual(calldata.encode_call(fn_name, *args), contract.encodeABI(fn_name=fn_name, args=args))
+
+
+class ContractAbiLoadingTests(SimpleTestCase):
+    """ABI 加载顺序: 显式配置 > Hardhat artifact > 内置 ABI；选择器和 topic 表与 eth_utils 的计算结果一致。"""
+
+    ARTIFACT_ABI = [{'type': 'function', 'name': 'ping', 'inputs': [], 'outputs': [], 'stateMutability': 'view'}]
+
+    def setUp(self):
+        contract_abi.clear_cache()
+        self.addCleanup(contract_abi.clear_cache)
+        artifact_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(artifact_dir.cleanup)
+        self.artifact_path = Path(artifact_dir.name) / 'RentalPlatform.json'
+        self.artifact_path.write_text(json.dumps({'contractName': 'RentalPlatform', 'abi': self.ARTIFACT_ABI}))
+
+    def load(self, **overrides):
+        contract_abi.clear_cache()
+        with self.settings(**overrides):
+            return contract_abi.get_contract_abi()
+
+    def test_load_order(self):
+        bundled = json.loads(contract_abi.BUNDLED_ABI_PATH.read_text(encoding='utf-8'))
+        self.assertEqual(self.load(RENTAL_PLATFORM_CONTRACT_ARTIFACT=str(self.artifact_path)), self.ARTIFACT_ABI)
+        self.assertEqual(self.load(RENTAL_PLATFORM_CONTRACT_ARTIFACT=str(self.artifact_path) + '.missing'), bundled)
+        configured = [{'type': 'function', 'name': 'pong', 'inputs': [], 'outputs': []}]
+        self.assertEqual(self.load(RENTAL_PLATFORM_CONTRACT_ABI=json.dumps(configured),
+                                   RENTAL_PLATFORM_CONTRACT_ARTIFACT=str(self.artifact_path)), configured)
+
+    def test_abi_is_loaded_once(self):
+        with mock.patch('builtins.open', wraps=open) as opened:
+            contract_abi.get_contract_abi()
+            contract_abi.get_contract_abi()
+        self.assertEqual(opened.call_count, 1)
+
+    def test_selector_and_topic_tables(self):
+        functions = [entry for entry in contract_abi.get_contract_abi() if entry.get('type') == 'function']
+        events = [entry for entry in contract_abi.get_contract_abi() if entry.get('type') == 'event']
+        self.assertEqual(contract_abi.function_selectors(),
+                         {'0x' + function_abi_to_4byte_selector(entry).hex(): entry for entry in functions})
+        self.assertEqual(contract_abi.event_topics(), {'0x' + event_abi_to_log_topic(entry).hex(): entry for entry in events})
+        self.assertEqual(contract_abi.function_abi('confirmBooking')['name'], 'confirmBooking')
+        with self.assertRaises(KeyError):
+            contract_abi.function_abi('withdraw')
+
+
+class BookingOverlapTests(TestCase):
+    """预订日期区间按 [入住, 退房) 判断重叠: 首尾相接不冲突，只有 pending/confirmed 预订占用日期。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20)
+        cls.renter = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        cls.prop = Property.objects.create(
+            owner=owner, title='海景公寓', description='描述', location='厦门', price_per_night=Decimal('100.00'),
+        )
+        cls.other_prop = Property.objects.create(
+            owner=owner, title='山景小屋', description='描述', location='武夷山', price_per_night=Decimal('80.00'),
+        )
+        cls.booking = cls.make_booking(cls.prop, datetime.date(2026, 5, 10), datetime.date(2026, 5, 15))
+        cls.make_booking(cls.prop, datetime.date(2026, 5, 1), datetime.date(2026, 5, 20), status='cancelled')
+
+    @classmethod
+    def make_booking(cls, prop, check_in, check_out, status='confirmed'):
+        return Booking.objects.create(
+            property=prop, renter=cls.renter, total_price=Decimal('500.00'), status=status,
+            check_in_date=check_in, check_out_date=check_out,
+        )
+
+    def test_overlapping_uses_half_open_ranges(self):
+        day = datetime.date
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).overlapping(day(2026, 5, 14), day(2026, 5, 16)).exists())
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).overlapping(day(2026, 5, 11), day(2026, 5, 12)).exists())
+        self.assertFalse(Booking.objects.filter(pk=self.booking.pk).overlapping(day(2026, 5, 15), day(2026, 5, 17)).exists())
+        self.assertFalse(Booking.objects.filter(pk=self.booking.pk).overlapping(day(2026, 5, 8), day(2026, 5, 10)).exists())
+
+    def test_conflicting_ignores_inactive_bookings_and_other_properties(self):
+        day = datetime.date
+        self.assertEqual(list(Booking.objects.conflicting(self.prop.pk, day(2026, 5, 1), day(2026, 5, 31))), [self.booking])
+        self.assertFalse(Booking.objects.conflicting(self.prop.pk, day(2026, 5, 2), day(2026, 5, 9)).exists())
+        self.assertFalse(Booking.objects.conflicting(self.other_prop.pk, day(2026, 5, 10), day(2026, 5, 15)).exists())
+
+    def test_clean_rejects_overlap(self):
+        booking = Booking(property=self.prop, renter=self.renter, total_price=Decimal('100.00'),
+                          check_in_date=datetime.date(2026, 5, 12), check_out_date=datetime.date(2026, 5, 13))
+        with self.assertRaisesMessage(ValidationError, '该房源在所选日期已被预订。'):
+            booking.clean()
+        booking.status = 'cancelled'
+        booking.clean()
+        booking.status = 'pending'
+        booking.check_in_date, booking.check_out_date = datetime.date(2026, 5, 15), datetime.date(2026, 5, 18)
+        booking.clean()
+
+    def test_clean_allows_saved_booking_and_rejects_inverted_dates(self):
+        self.booking.clean()
+        self.booking.check_out_date = self.booking.check_in_date
+        with self.assertRaisesMessage(ValidationError, '退房日期必须晚于入住日期。'):
+            self.booking.clean()
+
+
+@override_settings(BLOCKCHAIN_TX_BACKOFF_BASE=0, BLOCKCHAIN_CONFIRMATION_DEPTH=3)
+class TransactionTrackerTests(TestCase):
+    """批量回执查询: 每笔交易每轮只检查一次 (退避基数配置为 0 时也不会死循环)。"""
+
+    RECEIPTS = {
+        '0x' + '01' * 32: {'blockNumber': hex(90), 'status': '0x1'},
+        '0x' + '02' * 32: {'blockNumber': hex(99), 'status': '0x1'},
+        '0x' + '03' * 32: {'blockNumber': hex(80), 'status': '0x0'},
+    }
+
+    def setUp(self):
+        user = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        for tx_hash in [*self.RECEIPTS, '0x' + '04' * 32]:
+            BlockchainTransaction.objects.create(user=user, transaction_type='booking', transaction_hash=tx_hash)
+        self.w3 = mock.Mock()
+        self.w3.eth.block_number = 100
+        self.w3.provider.make_batch_request.side_effect = lambda payload: [
+            {'jsonrpc': '2.0', 'id': request['id'], 'result': self.RECEIPTS.get(request['params'][0])}
+            for request in payload
+        ]
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.w3),
+                        mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_run_once_checks_each_transaction_once(self):
+        stats = TransactionTracker(chunk_size=2).run_once()
+        self.assertEqual(stats, {'confirmed': 1, 'failed': 1, 'waiting': 1, 'not_found': 1})
+        self.assertEqual(self.w3.provider.make_batch_request.call_count, 2)
+        statuses = dict(BlockchainTransaction.objects.values_list('transaction_hash', 'status'))
+        self.assertEqual(statuses['0x' + '01' * 32], 'confirmed')
+        self.assertEqual(statuses['0x' + '03' * 32], 'failed')
+        self.assertEqual(statuses['0x' + '02' * 32], 'pending')
+        self.assertEqual(statuses['0x' + '04' * 32], 'pending')
+        self.assertFalse(TransactionTracker().due_transactions(timezone.now()).exists())
+
+    def test_relayer_rows_are_left_to_the_relayer(self):
+        relayed = BlockchainTransaction.objects.create(
+            user=User.objects.get(), transaction_type='booking', transaction_hash='0x' + '05' * 32, sender_address='0x' + '44' * 20,
+        )
+        due = TransactionTracker().due_transactions(timezone.now())
+        self.assertEqual(due.count(), 4)
+        self.assertNotIn(relayed, due)
+        self.assertEqual(list(TransactionTracker(sender_address='0x' + '44' * 20).due_transactions(timezone.now())), [relayed])
+
+    def test_backoff_is_clamped(self):
+        tracker = TransactionTracker()
+        self.assertEqual(tracker.backoff_seconds(1), TransactionTracker.MIN_BACKOFF_SECONDS)
+        self.assertEqual(tracker.backoff_seconds(3), 4 * TransactionTracker.MIN_BACKOFF_SECONDS)
+
+
+class RatingAggregateTests(TestCase):
+    """Review 的创建、修改评分、更换对象和删除都同步维护房源与用户的评分汇总。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20)
+        cls.other_owner = User.objects.create(username='owner2', blockchain_address='0x' + '33' * 20)
+        cls.renter = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        cls.bookings = []
+        for index, owner in enumerate((cls.owner, cls.other_owner)):
+            prop = Property.objects.create(
+                owner=owner, title=f'房源 {index}', description='描述', location='厦门', price_per_night=Decimal('100.00'),
+            )
+            cls.bookings.append(Booking.objects.create(
+                property=prop, renter=cls.renter, total_price=Decimal('200.00'), status='completed',
+                check_in_date=datetime.date(2026, 1, 1), check_out_date=datetime.date(2026, 1, 3),
+            ))
+
+    def aggregate(self, model, pk):
+        return model.objects.get(pk=pk).as_dict()
+
+    def assert_aggregate(self, model, pk, count, rating_sum, histogram):
+        aggregate = self.aggregate(model, pk)
+        self.assertEqual((aggregate['review_count'], aggregate['rating_sum']), (count, rating_sum))
+        self.assertEqual(aggregate['histogram'], {str(star): histogram.get(star, 0) for star in range(1, 6)})
+
+    def make_review(self, rating, booking=None, receiver=None):
+        return Review.objects.create(booking=booking or self.bookings[0], reviewer=self.renter,
+                                     receiver=receiver or self.owner, rating=rating, comment='不错')
+
+    def test_create_and_rating_update(self):
+        review = self.make_review(4)
+        self.make_review(5)
+        property_id = self.bookings[0].property_id
+        self.assert_aggregate(PropertyRatingAggregate, property_id, 2, 9, {4: 1, 5: 1})
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 2, 9, {4: 1, 5: 1})
+        self.assertEqual(self.aggregate(PropertyRatingAggregate, property_id)['average_rating'], 4.5)
+
+        review.rating = 2
+        review.save()
+        self.assert_aggregate(PropertyRatingAggregate, property_id, 2, 7, {2: 1, 5: 1})
+        review.save()
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 2, 7, {2: 1, 5: 1})
+
+    def test_target_change_moves_review(self):
+        review = self.make_review(3)
+        review.booking = self.bookings[1]
+        review.receiver = self.other_owner
+        review.save()
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[0].property_id, 0, 0, {})
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[1].property_id, 1, 3, {3: 1})
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 0, 0, {})
+        self.assert_aggregate(UserRatingAggregate, self.other_owner.pk, 1, 3, {3: 1})
+
+    def test_delete_removes_review(self):
+        review = self.make_review(5)
+        self.make_review(1)
+        review.delete()
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[0].property_id, 1, 1, {1: 1})
+        Review.objects.all().delete()
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 0, 0, {})
+
+    def test_out_of_range_rating_is_rejected(self):
+        for rating in (0, 6):
+            with self.subTest(rating=rating):
+                review = Review(booking=self.bookings[0], reviewer=self.renter, receiver=self.owner, rating=rating, comment='不错')
+                with self.assertRaises(ValidationError):
+                    review.full_clean()
+                with self.assertRaises(IntegrityError):
+                    review.save()
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(PropertyRatingAggregate.objects.exists())
+
+    def test_rebuild_from_reviews_repairs_drift(self):
+        self.make_review(4)
+        self.make_review(2, booking=self.bookings[1], receiver=self.other_owner)
+        # QuerySet.update() 绕过 Review.save()，汇总与评价表不再一致
+        Review.objects.filter(rating=4).update(rating=5)
+        self.assertEqual(rebuild_from_reviews(apply=False), {'properties': 2, 'users': 2, 'mismatched': 2})
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[0].property_id, 1, 4, {4: 1})
+        self.assertEqual(rebuild_from_reviews()['mismatched'], 2)
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[0].property_id, 1, 5, {5: 1})
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 1, 5, {5: 1})
+        self.assertEqual(rebuild_from_reviews(apply=False)['mismatched'], 0)
+
+    def test_rebuild_from_events_counts_unmatched(self):
+        Property.objects.filter(pk=self.bookings[0].property_id).update(blockchain_property_id='9')
+        for log_index, (property_id, rating) in enumerate(((9, 3), (9, 5), (404, 4))):
+            ContractEvent.objects.create(
+                event_type='ReviewSubmitted', block_number=10, log_index=log_index, transaction_hash='0x' + '0b' * 32,
+                block_timestamp=1767225600, args={'propertyId': property_id, 'rating': rating},
+            )
+        self.assertEqual(rebuild_from_events(), {'properties': 1, 'users': 1, 'mismatched': 2, 'unmatched': 1})
+        self.assert_aggregate(PropertyRatingAggregate, self.bookings[0].property_id, 2, 8, {3: 1, 5: 1})
+        self.assert_aggregate(UserRatingAggregate, self.owner.pk, 2, 8, {3: 1, 5: 1})
+
+
+class ChainReconcilerTests(TestCase):
+    """分块对账: 修正字段并推进检查点，整批失败时停在上一批，演练模式不写入也不改动检查点。"""
+
+    OWNER_ADDRESS = '0x' + '11' * 20
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address=cls.OWNER_ADDRESS)
+        cls.properties = [
+            Property.objects.create(
+                owner=owner, title=f'房源 {index}', description='描述', location='厦门',
+                price_per_night=Decimal('100.00'), blockchain_property_id=str(index + 1),
+            )
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        self.fetched = []
+        self.fail_after = None
+        patcher = mock.patch.object(BlockchainInterface, 'fetch_batches_concurrently', side_effect=self.fake_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_fetch(self, batch_fn, keys):
+        if self.fail_after is not None and len(self.fetched) >= self.fail_after:
+            return {"items": [], "error": "节点不可用"}
+        self.fetched.append(keys)
+        # 链上 ID 为偶数的房源不存在
+        return {"items": [{'owner': ZERO_ADDRESS if key % 2 == 0 else self.OWNER_ADDRESS} for key in keys], "error": None}
+
+    def verified_ids(self):
+        return sorted(int(pk) for pk in Property.objects.filter(is_verified=True).values_list('blockchain_property_id', flat=True))
+
+    def checkpoint(self):
+        return ReconcileCheckpoint.objects.filter(name='reconcile_chain:property').values_list('last_pk', flat=True).first()
+
+    def test_hooks_are_abstract(self):
+        with self.assertRaises(TypeError):
+            ChainReconciler()
+
+    def test_run_corrects_in_chunks_and_resets_checkpoint(self):
+        stats = PropertyReconciler(chunk_size=2).run()
+        self.assertEqual(stats, {'checked': 5, 'corrected': 3, 'skipped': 0, 'errors': 0})
+        self.assertEqual(self.fetched, [[1, 2], [3, 4], [5]])
+        self.assertEqual(self.verified_ids(), [1, 3, 5])
+        self.assertEqual(self.checkpoint(), 0)
+
+    def test_failed_chunk_keeps_checkpoint_and_resumes(self):
+        self.fail_after = 1
+        with self.assertRaises(RuntimeError):
+            PropertyReconciler(chunk_size=2).run()
+        self.assertEqual(self.checkpoint(), self.properties[1].pk)
+        hour_ago = timezone.now() - datetime.timedelta(hours=1)
+        ReconcileCheckpoint.objects.update(updated_at=hour_ago)
+        self.fail_after = None
+        PropertyReconciler(chunk_size=2).run()
+        self.assertEqual(self.fetched, [[1, 2], [3, 4], [5]])
+        self.assertEqual(self.verified_ids(), [1, 3, 5])
+        self.assertGreater(ReconcileCheckpoint.objects.get().updated_at, hour_ago)
+
+    def test_restart_dry_run_keeps_checkpoint(self):
+        ReconcileCheckpoint.objects.create(name='reconcile_chain:property', last_pk=self.properties[2].pk)
+        with mock.patch.object(BlockchainInterface, 'is_ready', return_value=True):
+            call_command('reconcile_chain', models='property', chunk_size=2, restart=True, dry_run=True, stdout=mock.Mock())
+        self.assertEqual(self.fetched, [[4, 5]])
+        self.assertEqual(self.verified_ids(), [])
+        self.assertEqual(self.checkpoint(), self.properties[2].pk)
+
+
+class PropertySearchTests(TestCase):
+    """中文搜索词按子串匹配标题、位置和描述 ("海景" 能搜到 "海景公寓")。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20, is_staff=True, is_superuser=True)
+        cls.owner = owner
+        cls.sea_view = Property.objects.create(
+            owner=owner, title='海景公寓', description='步行五分钟到沙滩', location='厦门', price_per_night=Decimal('300.00'),
+        )
+        cls.cabin = Property.objects.create(
+            owner=owner, title='山间小屋', description='推窗可见海景', location='福州', price_per_night=Decimal('150.00'),
+        )
+        Property.objects.create(
+            owner=owner, title='市中心公寓', description='近地铁', location='上海', price_per_night=Decimal('200.00'),
+        )
+
+    def test_queryset_search_matches_chinese_substrings(self):
+        self.assertEqual(set(Property.objects.search('海景')), {self.sea_view, self.cabin})
+        self.assertEqual(list(Property.objects.search('厦门')), [self.sea_view])
+        self.assertFalse(Property.objects.search('杭州').exists())
+
+    def test_search_api(self):
+        response = self.client.get(reverse('search_properties'), {'q': '海景', 'max_price': '200'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['data']['items']], [self.cabin.pk])
+
+    def test_admin_search(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('admin:blockchain_rental_property_changelist'), {'q': '海景'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({prop.pk for prop in response.context['cl'].result_list}, {self.sea_view.pk, self.cabin.pk})
+
+
+class TransactionAdminSearchTests(TestCase):
+    """交易 admin 搜索: 完整哈希精确匹配、哈希前缀和用户名前缀匹配，都不做 UPPER(...) LIKE 扫描。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        alice = User.objects.create(username='alice', blockchain_address='0x' + '22' * 20)
+        alina = User.objects.create(username='alina', blockchain_address='0x' + '33' * 20)
+        cls.alice_tx = BlockchainTransaction.objects.create(user=alice, transaction_type='booking', transaction_hash='0x' + 'ab' * 32)
+        cls.alina_tx = BlockchainTransaction.objects.create(user=alina, transaction_type='booking', transaction_hash='0x' + 'cd' * 32)
+
+    def search(self, term):
+        self.client.force_login(self.admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:blockchain_rental_blockchaintransaction_changelist'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if 'UPPER(' in query['sql'] or "LIKE '%" in query['sql']])
+        return {tx.pk for tx in response.context['cl'].result_list}
+
+    def test_full_hash_is_matched_case_insensitively(self):
+        self.assertEqual(self.search('0x' + 'AB' * 32), {self.alice_tx.pk})
+
+    def test_hash_prefix(self):
+        self.assertEqual(self.search('0xcdcd'), {self.alina_tx.pk})
+
+    def test_username_prefix(self):
+        self.assertEqual(self.search('ali'), {self.alice_tx.pk, self.alina_tx.pk})
+        self.assertEqual(self.search('alice'), {self.alice_tx.pk})
+        self.assertEqual(self.search('bob'), set())
+
+
+@override_settings(SERVER_TIMING_ENABLED=True)
+class RequestTimingMiddlewareTests(TestCase):
+    """同步 (Client) 和异步 (AsyncClient) 请求的 SQL 查询都计入 Server-Timing。"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20)
+        Property.objects.create(owner=owner, title='海景公寓', description='描述', location='厦门', price_per_night=Decimal('100.00'))
+
+    def db_timing(self, response):
+        self.assertEqual(response.status_code, 200)
+        return response['Server-Timing'].split(', ')[0]
+
+    def test_sync_request_counts_queries(self):
+        response = self.client.get(reverse('local-property-list'))
+        self.assertIn('desc="1 queries"', self.db_timing(response))
+
+    async def test_async_request_counts_queries(self):
+        response = await self.async_client.get(reverse('local-property-list'))
+        self.assertIn('desc="1 queries"', self.db_timing(response))
+
+
+@override_settings(BLOCKCHAIN_CACHE_ENABLED=True, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RPCMetricsTests(SimpleTestCase):
+    """observe_rpc 记录耗时、进行中调用数和按异常类型的错误数；/metrics 以 Prometheus 文本格式输出。"""
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_successful_call_is_timed(self):
+        before = self.sample('blockchain_rpc_duration_seconds_count', method='test:ok')
+        with observe_rpc('test:ok'):
+            self.assertEqual(self.sample('blockchain_rpc_in_flight', method='test:ok'), 1)
+        self.assertEqual(self.sample('blockchain_rpc_in_flight', method='test:ok'), 0)
+        self.assertEqual(self.sample('blockchain_rpc_duration_seconds_count', method='test:ok'), before + 1)
+        self.assertEqual(self.sample('blockchain_rpc_errors_total', method='test:ok', exception='TimeoutError'), 0)
+
+    def test_failed_call_counts_error_and_reraises(self):
+        before = self.sample('blockchain_rpc_errors_total', method='test:fail', exception='TimeoutError')
+        with self.assertRaises(TimeoutError), observe_rpc('test:fail'):
+            raise TimeoutError('节点超时')
+        self.assertEqual(self.sample('blockchain_rpc_errors_total', method='test:fail', exception='TimeoutError'), before + 1)
+        self.assertEqual(self.sample('blockchain_rpc_duration_seconds_count', method='test:fail'), 1)
+        self.assertEqual(self.sample('blockchain_rpc_in_flight', method='test:fail'), 0)
+
+    async def test_async_call_is_timed(self):
+        with observe_rpc('test:async'):
+            await asyncio.sleep(0.01)
+        self.assertGreaterEqual(self.sample('blockchain_rpc_duration_seconds_sum', method='test:async'), 0.01)
+
+    def test_metrics_endpoint(self):
+        with observe_rpc('test:view'):
+            pass
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('blockchain_rpc_duration_seconds_bucket{le="0.01",method="test:view"}', body)
+        self.assertIn('# TYPE blockchain_cache_lookups_total counter', body)
+
+
+class ChainReadCacheTests(TestCase):
+    """链上只读缓存: 同一区块内命中，链头前进或相关事件到达后失效；命中路径不写共享缓存，统计按进程导出。"""
+
+    def setUp(self):
+        cache.clear()
+        self.w3 = mock.Mock()
+        self.w3.eth.block_number = 100
+        self.fetches = []
+
+    def read_property(self, property_id, result=None):
+        def fetch():
+            self.fetches.append(property_id)
+            return result or {'title': f'房源 {property_id}', 'error': None}
+        return ChainReadCache.get_or_fetch(
+            'getPropertyInfo', [property_id], ChainReadCache.property_scopes(property_id), self.w3, fetch,
+        )
+
+    def lookups(self, result):
+        return REGISTRY.get_sample_value('blockchain_cache_lookups_total', {'function': 'getPropertyInfo', 'result': result}) or 0
+
+    def test_hits_within_block_and_misses_on_new_head(self):
+        hits = self.lookups('hit')
+        self.assertEqual(self.read_property(1), self.read_property(1))
+        self.assertEqual(self.fetches, [1])
+        self.assertEqual(self.lookups('hit'), hits + 1)
+        self.w3.eth.block_number = 101
+        cache.delete(f'{ChainReadCache.KEY_PREFIX}:head')  # 链头缓存过期
+        self.read_property(1)
+        self.assertEqual(self.fetches, [1, 1])
+
+    def test_hit_does_not_write_to_shared_cache(self):
+        self.read_property(1)
+        shared = ChainReadCache._cache()
+        with mock.patch.object(shared, 'set') as cache_set, mock.patch.object(shared, 'add') as cache_add, \
+                mock.patch.object(shared, 'incr') as cache_incr:
+            self.read_property(1)
+        self.assertEqual(self.fetches, [1])
+        for method in (cache_set, cache_add, cache_incr):
+            method.assert_not_called()
+
+    def test_errors_are_not_cached(self):
+        self.read_property(1, {'error': '节点不可用'})
+        self.read_property(1)
+        self.assertEqual(self.fetches, [1, 1])
+
+    def test_events_invalidate_affected_scopes(self):
+        self.read_property(1)
+        self.read_property(2)
+        ChainReadCache.invalidate_for_event('PropertyRegistered', {'propertyId': 1})
+        self.read_property(1)
+        self.read_property(2)
+        self.assertEqual(self.fetches, [1, 2, 1])
+
+    def test_booking_event_invalidates_owning_property(self):
+        ContractEvent.objects.create(
+            event_type='BookingCreated', block_number=10, log_index=0, transaction_hash='0x' + '0a' * 32,
+            block_timestamp=1767225600, args={'bookingId': 7, 'propertyId': 3, 'tenant': '0x' + '22' * 20},
+        )
+        self.read_property(3)
+        self.read_property(4)
+        ChainReadCache.invalidate_for_event('BookingConfirmed', {'bookingId': 7})
+        self.read_property(3)
+        self.read_property(4)
+        self.assertEqual(self.fetches, [3, 4, 3])
+
+    async def test_async_reads_share_entries(self):
+        await sync_to_async(self.read_property)(1)
+
+        async def fetch():
+            self.fetches.append('async')
+            return {'error': None}
+        cached = await ChainReadCache.aget_or_fetch(
+            'getPropertyInfo', [1], ChainReadCache.property_scopes(1), self.w3, fetch,
+        )
+        self.assertEqual(cached['title'], '房源 1')
+        self.assertEqual(self.fetches, [1])
+
+
+class CatalogueNode:
+    """批量读取测试用的替身节点: 按真实 ABI 编码 getPropertyInfo / getUserInfo 的返回值，记录每个批量请求的调用数。"""
+
+    ADDRESS = Web3.to_checksum_address('0x' + '33' * 20)
+
+    def __init__(self, test, count, reverted=()):
+        self.count = count
+        self.reverted = set(reverted)
+        self.batches = []
+        self.w3 = mock.Mock()
+        self.w3.codec = Web3().codec
+        self.w3.to_checksum_address = Web3.to_checksum_address
+        self.w3.provider.make_batch_request.side_effect = self.answer
+        contract = Web3().eth.contract(address=self.ADDRESS, abi=contract_abi.get_contract_abi())
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.w3),
+                        mock.patch.object(BlockchainInterface, 'contract', contract),
+                        mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            test.addCleanup(patcher.stop)
+
+    def answer(self, payload):
+        self.batches.append(len(payload))
+        return [{'jsonrpc': '2.0', 'id': request['id'], **self.call(request['params'][0]['data'])} for request in payload]
+
+    def call(self, data):
+        fn_abi = contract_abi.function_selectors()[data[:10]]
+        if fn_abi['name'] == 'getPropertyInfo':
+            property_id = int(data[10:], 16)
+            if property_id in self.reverted or not 1 <= property_id <= self.count:
+                return {'error': {'code': 3, 'message': 'execution reverted: Property does not exist'}}
+            value = ('0x' + '11' * 20, f'房源 {property_id}', '描述', 100 * property_id, True, [property_id, property_id + 100], 5)
+        else:
+            value = ('Alice', 'alice@example.com', True, 2, 5)
+        return {'result': '0x' + self.w3.codec.encode(get_abi_output_types(fn_abi), [value]).hex()}
+
+
+@override_settings(BLOCKCHAIN_RPC_BATCH_SIZE=3)
+class ChainBatchReadTests(SimpleTestCase):
+    """批量读取: 按 BLOCKCHAIN_RPC_BATCH_SIZE 切分批量请求，结果与输入顺序一致，单个调用失败只影响该项。"""
+
+    def test_batches_are_split_and_keep_order(self):
+        node = CatalogueNode(self, count=10)
+        result = BlockchainInterface.get_properties_batch([7, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(node.batches, [3, 3, 1])
+        self.assertIsNone(result['error'])
+        self.assertEqual([item['id'] for item in result['items']], [7, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(result['items'][0]['title'], '房源 7')
+        self.assertEqual((result['items'][1]['price'], result['items'][1]['bookingIds']), (100, [1, 101]))
+
+    def test_reverted_call_only_fails_its_item(self):
+        CatalogueNode(self, count=10, reverted={2})
+        items = BlockchainInterface.get_properties_batch([1, 2, 3])['items']
+        self.assertEqual([item['error'] for item in items], [None, 'execution reverted: Property does not exist', None])
+        self.assertEqual(items[2]['title'], '房源 3')
+
+    def test_rejected_batch_fails_every_item_in_it(self):
+        node = CatalogueNode(self, count=10)
+        node.w3.provider.make_batch_request.side_effect = lambda payload: {
+            'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': 'rate limited'},
+        }
+        items = BlockchainInterface.get_properties_batch([1, 2, 3])['items']
+        self.assertEqual([item['error'] for item in items], ['rate limited'] * 3)
+
+    def test_users_batch_skips_invalid_addresses(self):
+        node = CatalogueNode(self, count=0)
+        items = BlockchainInterface.get_users_batch(['not-an-address', '0x' + '22' * 20])['items']
+        self.assertEqual(node.batches, [1])
+        self.assertEqual(items[0], {'address': 'not-an-address', 'error': '无效的用户地址格式。'})
+        self.assertEqual((items[1]['address'], items[1]['error']), ('0x' + '22' * 20, None))
+
+    def test_ids_endpoint_reads_in_one_round_trip(self):
+        node = CatalogueNode(self, count=10, reverted={9})
+        response = self.client.get(reverse('get_properties_info'), {'ids': '1,9,3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['error'] is None for item in response.json()['data']], [True, False, True])
+        self.assertEqual(node.batches, [3])
+        self.assertEqual(self.client.get(reverse('get_properties_info'), {'ids': '1,x'}).status_code, 400)
+
+
+@override_settings(BLOCKCHAIN_RPC_BATCH_SIZE=3, BLOCKCHAIN_FETCH_WORKERS=2, BLOCKCHAIN_CACHE_ENABLED=False)
+class PropertyCatalogueTests(SimpleTestCase):
+    """分页房源目录: 只读一次 propertyCount，范围内的ID分批并发读取，默认只返回 bookingCount。"""
+
+    def setUp(self):
+        self.node = CatalogueNode(self, count=7)
+        patcher = mock.patch.object(BlockchainInterface, '_fetch_property_count', return_value={'count': 7, 'error': None})
+        self.fetch_count = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page(self, **params):
+        response = self.client.get(reverse('get_properties_info'), params)
+        return response.status_code, response.json()
+
+    def test_page_reads_the_requested_range(self):
+        status, body = self.page(offset=2, limit=3)
+        self.assertEqual(status, 200)
+        self.assertEqual((body['data']['total'], body['data']['offset'], body['data']['limit']), (7, 2, 3))
+        items = body['data']['items']
+        self.assertEqual([item['id'] for item in items], [3, 4, 5])
+        self.assertEqual(items[0]['bookingCount'], 2)
+        self.assertNotIn('bookingIds', items[0])
+        self.fetch_count.assert_called_once()
+
+    def test_range_is_split_across_workers_and_keeps_order(self):
+        status, body = self.page(offset=0, limit=50, include_booking_ids=1)
+        self.assertEqual([item['id'] for item in body['data']['items']], list(range(1, 8)))
+        self.assertEqual(body['data']['items'][6]['bookingIds'], [7, 107])
+        self.assertEqual(sorted(self.node.batches), [1, 3, 3])
+
+    def test_offset_past_the_end_reads_nothing(self):
+        status, body = self.page(offset=7, limit=10)
+        self.assertEqual((status, body['data']['items'], body['data']['total']), (200, [], 7))
+        self.assertEqual(self.node.batches, [])
+
+    def test_invalid_paging_parameters(self):
+        for params in ({'offset': -1}, {'limit': 0}, {'limit': 201}, {'offset': 'x'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.page(**params)[0], 400)
+        self.assertEqual(self.node.batches, [])
+
+    def test_count_failure_is_a_bad_gateway(self):
+        self.fetch_count.return_value = {'count': None, 'error': '节点不可用'}
+        status, body = self.page()
+        self.assertEqual((status, body['message']), (502, '节点不可用'))
+
+
+class MockChain:
+    """事件索引器测试用的替身链: 链头区块号可调，eth_getLogs 返回预置的日志，合约对象使用真实 ABI 解码事件。"""
+
+    ADDRESS = Web3.to_checksum_address('0x' + '33' * 20)
+
+    def __init__(self, test, head):
+        self.logs = []
+        self.w3 = mock.Mock()
+        self.w3.eth.block_number = head
+        self.w3.eth.get_logs.side_effect = lambda params: [
+            log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']
+        ]
+        self.w3.eth.get_block.side_effect = lambda block_number: {'timestamp': 1767225600 + block_number * 12}
+        contract = Web3().eth.contract(address=self.ADDRESS, abi=contract_abi.get_contract_abi())
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.w3),
+                        mock.patch.object(BlockchainInterface, 'contract', contract),
+                        mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            test.addCleanup(patcher.stop)
+
+    def add_booking_confirmed(self, block_number, booking_id):
+        topic0 = next(topic for topic, event in contract_abi.event_topics().items() if event['name'] == 'BookingConfirmed')
+        self.logs.append({
+            'address': self.ADDRESS, 'blockNumber': block_number, 'logIndex': 0, 'transactionIndex': 0,
+            'transactionHash': HexBytes(f'{block_number:064x}'), 'blockHash': HexBytes('ab' * 32),
+            'topics': [HexBytes(topic0), HexBytes(f'{booking_id:064x}')], 'data': HexBytes('0x'),
+        })
+
+
+class EventIndexerTests(TestCase):
+    """事件索引器: 每轮推进检查点的区块号和 updated_at，没有新区块时也刷新 updated_at。"""
+
+    def setUp(self):
+        self.chain = MockChain(self, head=20)
+        self.started = timezone.now()
+
+    def run_indexer_at(self, seconds_later):
+        with mock.patch('django.utils.timezone.now', return_value=self.started + datetime.timedelta(seconds=seconds_later)):
+            return EventIndexer(chunk_size=10, confirmations=5, start_block=0).run_once()
+
+    def test_run_advances_block_number_and_timestamp(self):
+        self.chain.add_booking_confirmed(12, booking_id=7)
+        self.assertEqual(self.run_indexer_at(0), 1)
+        created_at = IndexerCheckpoint.objects.get(name=EventIndexer.CHECKPOINT_NAME).updated_at
+
+        self.chain.w3.eth.block_number = 30
+        self.assertEqual(self.run_indexer_at(300), 0)
+        checkpoint = IndexerCheckpoint.objects.get(name=EventIndexer.CHECKPOINT_NAME)
+        self.assertEqual(checkpoint.block_number, 25)
+        self.assertEqual(checkpoint.updated_at - created_at, datetime.timedelta(seconds=300))
+        event = ContractEvent.objects.get()
+        self.assertEqual((event.event_type, event.block_number, event.args), ('BookingConfirmed', 12, {'bookingId': 7}))
+        self.assertEqual(self.chain.w3.eth.get_logs.call_count, 3)  # 0-9、10-15、16-25
+
+    def test_idle_round_refreshes_timestamp(self):
+        self.run_indexer_at(0)
+        self.run_indexer_at(300)
+        checkpoint = IndexerCheckpoint.objects.get(name=EventIndexer.CHECKPOINT_NAME)
+        self.assertEqual(checkpoint.block_number, 15)
+        self.assertEqual(checkpoint.updated_at, self.started + datetime.timedelta(seconds=300))
+        self.assertEqual(self.chain.w3.eth.get_logs.call_count, 2)
+
+
+class ChainReadConditionalTests(TestCase):
+    """链上只读接口的条件 GET: 验证器来自已索引的事件表，相关新事件使其失效，与进程内缓存无关。"""
+
+    def setUp(self):
+        IndexerCheckpoint.objects.create(name='contract_events', block_number=100)
+        self.add_event('PropertyRegistered', 10, {'propertyId': 1})
+        self.count = mock.patch.object(BlockchainInterface, 'get_property_count', return_value={'count': 1, 'error': None})
+        for patcher in (self.count, mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.url = reverse('get_property_count')
+
+    def add_event(self, event_type, block_number, args):
+        ContractEvent.objects.create(
+            event_type=event_type, block_number=block_number, log_index=0, transaction_hash='0x' + f'{block_number:064x}',
+            block_timestamp=1767225600 + block_number * 12, args=args,
+        )
+
+    def test_matching_etag_returns_304_without_calling_the_node(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'no-cache')
+        mock_count = BlockchainInterface.get_property_count
+        mock_count.reset_mock()
+
+        cache.clear()  # 验证器不依赖缓存中的状态
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        mock_count.assert_not_called()
+
+    def test_relevant_event_changes_validators(self):
+        first = self.client.get(self.url)
+        self.add_event('UserRegistered', 11, {'user': '0x' + '22' * 20})
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.add_event('PropertyRegistered', 12, {'propertyId': 2})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 200)
+
+    def test_stale_indexer_disables_validators(self):
+        IndexerCheckpoint.objects.filter(name='contract_events').update(updated_at=timezone.now() - datetime.timedelta(hours=1))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"anything"')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_running_indexer_keeps_validators_fresh(self):
+        IndexerCheckpoint.objects.all().delete()
+        chain = MockChain(self, head=20)
+        started = timezone.now()
+
+        def at(seconds):
+            return mock.patch('django.utils.timezone.now', return_value=started + datetime.timedelta(seconds=seconds))
+
+        with at(0):
+            EventIndexer(confirmations=5, start_block=0).run_once()
+            first = self.client.get(self.url)
+        self.assertTrue(first.has_header('ETag'))
+        # 超过 BLOCKCHAIN_CONDITIONAL_MAX_INDEXER_LAG 之后，只要索引器仍在推进，就继续返回 304
+        chain.w3.eth.block_number = 30
+        with at(300):
+            EventIndexer(confirmations=5, start_block=0).run_once()
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        with at(600):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_error_response_has_no_validators(self):
+        BlockchainInterface.get_property_count.return_value = {'error': '节点不可用'}
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(EVENT_STREAM_REPLAY_LIMIT=2, EVENT_STREAM_POLL_INTERVAL=0.05, EVENT_STREAM_HEARTBEAT=0.2)
+class EventStreamReplayTests(TransactionTestCase):
+    """SSE 补发超过单页上限的历史事件时分页补发到最新，不丢失中间的事件。"""
+
+    def setUp(self):
+        for block_number in range(1, 6):
+            ContractEvent.objects.create(
+                event_type='PropertyRegistered', block_number=block_number, log_index=0,
+                transaction_hash='0x' + f'{block_number:064x}', block_timestamp=1767225600 + block_number, args={},
+            )
+
+    async def stream(self, query_string: bytes, headers=(), expected_events=5):
+        event_ids = []
+        done = asyncio.Event()
+
+        async def receive():
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            event_ids.extend(line[4:] for line in message.get('body', b'').decode().splitlines() if line.startswith('id: '))
+            if len(event_ids) >= expected_events:
+                done.set()
+
+        scope = {'type': 'http', 'method': 'GET', 'query_string': query_string, 'headers': list(headers)}
+        await asyncio.wait_for(event_stream_app(scope, receive, send), timeout=5)
+        # 等待广播任务在最后一个订阅者离开后退出
+        while EventBroadcaster._task is not None:
+            await asyncio.sleep(0.01)
+        return event_ids
+
+    async def test_replay_pages_past_the_limit(self):
+        self.assertEqual(await self.stream(b'from_block=1'), ['1-0', '2-0', '3-0', '4-0', '5-0'])
+
+    async def test_last_event_id_resumes_after_position(self):
+        self.assertEqual(await self.stream(b'', headers=[(b'last-event-id', b'2-0')], expected_events=3), ['3-0', '4-0', '5-0'])
+
+    async def test_failed_start_position_read_is_retried(self):
+        await sync_to_async(ContractEvent.objects.create)(
+            event_type='PropertyRegistered', block_number=6, log_index=0,
+            transaction_hash='0x' + f'{6:064x}', block_timestamp=1767225606, args={},
+        )
+        latest = mock.patch('blockchain_rental.event_stream._latest_position', side_effect=[OperationalError('数据库不可用'), (5, 0)])
+        with latest:
+            self.assertEqual(await self.stream(b'', expected_events=1), ['6-0'])
+
+
+@override_settings(
+    RENTAL_PLATFORM_CONTRACT_ADDRESS='0x' + '33' * 20, BLOCKCHAIN_GAS_SAFETY_MARGIN=1.2, BLOCKCHAIN_GAS_ESTIMATE_MODE='live',
+    RELAYER_BUMP_AFTER=60, RELAYER_FEE_BUMP_PERCENT=12.5, RELAYER_MAX_FEE_GWEI=200,
+)
+class RelayerTests(TestCase):
+    """后端代发: 只代发不限制调用者的函数，gas 上限带安全余量，重试按市场重新定价，nonce 被占用的交易标记失败。"""
+
+    PRIVATE_KEY = '0x' + '4c' * 32
+    GWEI = 10 ** 9
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create(username='owner', blockchain_address='0x' + '11' * 20)
+        cls.renter = User.objects.create(username='renter', blockchain_address='0x' + '22' * 20)
+        prop = Property.objects.create(owner=owner, title='海景公寓', description='描述', location='厦门', price_per_night=Decimal('100.00'))
+        today = timezone.localdate()
+        cls.bookings = {}
+        for name, status, contract_status, check_out in [
+            ('due', 'confirmed', 'confirmed', today - datetime.timedelta(days=1)),
+            ('not_ended', 'confirmed', 'confirmed', today + datetime.timedelta(days=2)),
+            ('unconfirmed_on_chain', 'confirmed', 'pending', today - datetime.timedelta(days=1)),
+            ('completed', 'completed', 'completed', today - datetime.timedelta(days=3)),
+        ]:
+            cls.bookings[name] = Booking.objects.create(
+                property=prop, renter=cls.renter, total_price=Decimal('200.00'), status=status, contract_status=contract_status,
+                check_in_date=check_out - datetime.timedelta(days=2), check_out_date=check_out,
+                blockchain_contract_id=str(len(cls.bookings) + 1),
+            )
+
+    def setUp(self):
+        self.w3 = mock.Mock()
+        self.w3.to_checksum_address = Web3.to_checksum_address
+        self.w3.eth.chain_id = 31337
+        self.w3.eth.get_block.return_value = {'baseFeePerGas': 10 * self.GWEI}
+        self.w3.eth.max_priority_fee = 2 * self.GWEI
+        self.w3.eth.estimate_gas.return_value = 50000
+        self.w3.eth.get_transaction_count.return_value = 5
+        self.receipts = {}
+        self.w3.provider.make_request.side_effect = lambda method, params: {'result': self.receipts.get(params[0])}
+        self.w3.eth.block_number = 100
+        # 批量请求: eth_sendRawTransaction 返回交易哈希，eth_getTransactionReceipt (确认跟踪) 查 self.receipts
+        self.w3.provider.make_batch_request.side_effect = lambda payload: [
+            {'id': request['id'], 'result': self.receipts.get(request['params'][0])
+             if request['method'] == 'eth_getTransactionReceipt' else Web3.keccak(hexstr=request['params'][0]).hex()}
+            for request in payload
+        ]
+        for patcher in (mock.patch.object(BlockchainInterface, 'w3', self.w3),
+                        mock.patch.object(BlockchainInterface, 'is_ready', return_value=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.relayer = Relayer(self.PRIVATE_KEY)
+
+    def queue_completion(self):
+        return Relayer.enqueue(self.renter, 'booking', 'completeBooking', (1,), related_object_id=self.bookings['due'].pk,
+                               related_object_type='booking')
+
+    def test_only_unrestricted_functions_can_be_queued(self):
+        with self.assertRaises(ValueError):
+            Relayer.enqueue(self.renter, 'booking', 'confirmBooking', (1,))
+        self.assertFalse(BlockchainTransaction.objects.exists())
+
+    def test_enqueue_due_completions_once(self):
+        self.assertEqual(Relayer.enqueue_due_completions(), 1)
+        self.assertEqual(Relayer.enqueue_due_completions(), 0)
+        tx = BlockchainTransaction.objects.get()
+        self.assertEqual((tx.status, tx.related_object_id), ('queued', self.bookings['due'].pk))
+        self.assertEqual(tx.calldata, calldata.encode_call('completeBooking', 1))
+
+    def test_submit_applies_gas_margin_and_allocates_nonces(self):
+        first, second = self.queue_completion(), self.queue_completion()
+        stats = self.relayer.run_once()
+        self.assertEqual(stats['submitted'], 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.nonce, second.nonce), (5, 6))
+        self.assertEqual(first.gas_limit, 60000)
+        self.assertEqual((int(first.max_fee_per_gas), int(first.max_priority_fee_per_gas)), (22 * self.GWEI, 2 * self.GWEI))
+        self.assertEqual(first.status, 'pending')
+        self.assertEqual(self.w3.provider.make_batch_request.call_count, 1)
+
+    @override_settings(BLOCKCHAIN_GAS_ESTIMATE_MODE='cached', CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cached_gas_mode_still_simulates_before_nonce(self):
+        tx = self.queue_completion()
+        GasEstimateCache._cache().clear()
+        GasEstimateCache.record_estimate(tx.calldata, 50000)
+        self.w3.eth.estimate_gas.side_effect = ContractLogicError('execution reverted: Booking not ended')
+        stats = self.relayer.run_once()
+        self.assertEqual((stats['rejected'], stats['submitted']), (1, 0))
+        tx.refresh_from_db()
+        self.assertEqual((tx.status, tx.nonce), ('failed', None))
+        self.assertIn('Booking not ended', tx.last_error)
+        self.w3.provider.make_batch_request.assert_not_called()
+
+    def test_retry_is_repriced_at_market(self):
+        tx = self.queue_completion()
+        BlockchainTransaction.objects.filter(pk=tx.pk).update(
+            sender_address=self.relayer.address, nonce=5, gas_limit=60000, max_fee_per_gas=5 * self.GWEI, max_priority_fee_per_gas=self.GWEI,
+        )
+        self.relayer.run_once()
+        tx.refresh_from_db()
+        self.assertEqual((tx.status, tx.nonce), ('pending', 5))
+        self.assertEqual((int(tx.max_fee_per_gas), int(tx.max_priority_fee_per_gas)), (22 * self.GWEI, 2 * self.GWEI))
+
+    def make_stuck(self, nonce):
+        tx = self.queue_completion()
+        BlockchainTransaction.objects.filter(pk=tx.pk).update(
+            status='pending', sender_address=self.relayer.address, nonce=nonce, gas_limit=60000, transaction_hash='0x' + 'aa' * 32,
+            replaced_hashes=['0x' + 'bb' * 32], max_fee_per_gas=22 * self.GWEI, max_priority_fee_per_gas=2 * self.GWEI,
+            submitted_at=timezone.now() - datetime.timedelta(minutes=5),
+        )
+        return tx
+
+    def test_stuck_transaction_is_bumped(self):
+        tx = self.make_stuck(nonce=5)
+        self.assertEqual(self.relayer.run_once()['bumped'], 1)
+        tx.refresh_from_db()
+        self.assertEqual(tx.replaced_hashes, ['0x' + 'bb' * 32, '0x' + 'aa' * 32])
+        self.assertEqual(int(tx.max_fee_per_gas), math.ceil(22 * self.GWEI * 1.125))
+
+    def test_mined_nonce_switches_to_mined_hash(self):
+        tx = self.make_stuck(nonce=4)
+        self.receipts['0x' + 'bb' * 32] = {'blockNumber': '0x10'}
+        self.assertEqual(self.relayer.run_once()['replaced_mined'], 1)
+        tx.refresh_from_db()
+        self.assertEqual((tx.status, tx.transaction_hash), ('pending', '0x' + 'bb' * 32))
+
+    def test_mined_nonce_without_receipt_fails(self):
+        tx = self.make_stuck(nonce=4)
+        self.assertEqual(self.relayer.run_once()['nonce_taken'], 1)
+        tx.refresh_from_db()
+        self.assertEqual(tx.status, 'failed')
+        self.assertIn('nonce 4', tx.last_error)
+
+    def test_relayer_confirms_its_own_transactions(self):
+        tx = self.make_stuck(nonce=4)
+        self.receipts['0x' + 'aa' * 32] = {'blockNumber': hex(90), 'status': '0x1'}
+        stats = self.relayer.run_once()
+        self.assertEqual((stats['confirmed'], stats['bumped']), (1, 0))
+        tx.refresh_from_db()
+        self.assertEqual((tx.status, tx.block_number), ('confirmed', 90))
+        self.assertFalse(TransactionTracker().due_transactions(timezone.now()).exists())
+
+    def test_unknown_receipt_state_keeps_transaction_pending(self):
+        tx = self.make_stuck(nonce=4)
+        self.w3.provider.make_request.side_effect = lambda method, params: {'error': {'message': 'timeout'}}
+        self.relayer.run_once()
+        tx.refresh_from_db()
+        self.assertEqual(tx.status, 'pending')
+
+
+class BenchmarkingTests(TestCase):
+    """基准测试公共部分: 分位数与汇总、计时循环的错误计数、编译产物检查、本地数据库镜像和接口覆盖检查。"""
+
+    OWNER, TENANT = '0x' + 'a1' * 20, '0x' + 'a2' * 20
+    START = 1767225600
+    SEEDED = {
+        'users': [OWNER, TENANT],
+        'properties': [
+            {'id': 1, 'owner': OWNER, 'title': '测试房源0'},
+            {'id': 2, 'owner': TENANT, 'title': '测试房源1'},
+            {'id': 3, 'owner': OWNER, 'title': '备用房源A'},
+            {'id': 4, 'owner': OWNER, 'title': '备用房源B'},
+        ],
+        'bookings': [
+            {'id': 1, 'property_id': 1, 'owner': OWNER, 'tenant': TENANT, 'start': START, 'end': START + 2 * DAY, 'status': 'completed'},
+            {'id': 2, 'property_id': 4, 'owner': OWNER, 'tenant': TENANT, 'start': START, 'end': START + DAY, 'status': 'confirmed'},
+            {'id': 3, 'property_id': 3, 'owner': OWNER, 'tenant': TENANT, 'start': START + 9 * DAY, 'end': START + 11 * DAY, 'status': 'pending'},
+        ],
+        'reviews': [{'booking_id': 1, 'rating': 4}],
+        'transactions': [('identity', '0x' + '01' * 32), ('property', '0x' + '02' * 32), ('review', '0x' + '03' * 32)],
+        'spare_available': 3, 'spare_occupied': 4, 'pending_booking': 3, 'ended_booking': 2,
+    }
+
+    def test_percentile_and_summary(self):
+        values = list(range(1, 11))
+        self.assertEqual([percentile(values, pct) for pct in (50, 90, 99, 100)], [5, 9, 10, 10])
+        self.assertIsNone(percentile([], 50))
+        summary = summarize([0.004, 0.001, 0.003, 0.002], errors=1, elapsed=2.0)
+        self.assertEqual((summary['requests'], summary['error_rate'], summary['throughput_rps']), (4, 0.25, 2.0))
+        self.assertEqual((summary['p50_ms'], summary['p99_ms'], summary['max_ms'], summary['mean_ms']), (2.0, 4.0, 4.0, 2.5))
+        self.assertEqual((summarize([], 0, 1.0)['error_rate'], summarize([], 0, 1.0)['p50_ms']), (None, None))
+
+    def test_measure_counts_false_results_and_exceptions(self):
+        outcomes = iter([RuntimeError('预热'), True, False, ValueError('失败'), True])
+        def fn():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        result = RunBenchmarksCommand.measure(fn, iterations=4, warmup=1)
+        self.assertEqual((result['requests'], result['errors']), (4, 2))
+
+    def test_load_contract_bytecode_requires_compiled_artifact(self):
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            artifact = Path(artifact_dir) / 'RentalPlatform.json'
+            with self.settings(RENTAL_PLATFORM_CONTRACT_ARTIFACT=str(artifact)):
+                with self.assertRaisesMessage(RuntimeError, '找不到合约编译产物'):
+                    load_contract_bytecode()
+                artifact.write_text(json.dumps({'abi': [], 'bytecode': '0x'}))
+                with self.assertRaisesMessage(RuntimeError, '没有部署字节码'):
+                    load_contract_bytecode()
+                artifact.write_text(json.dumps({'abi': [], 'bytecode': '0x6080'}))
+                self.assertEqual(load_contract_bytecode(), '0x6080')
+
+    def test_mirror_to_database(self):
+        samples = mirror_to_database(self.SEEDED)
+        self.assertEqual((User.objects.count(), Property.objects.count(), Booking.objects.count()), (2, 4, 3))
+        self.assertEqual(BlockchainTransaction.objects.filter(status='confirmed').count(), 3)
+        self.assertEqual(Property.objects.get(pk=samples['property']).blockchain_property_id, '1')
+        self.assertEqual(Property.objects.get(pk=samples['available_property']).title, '备用房源A')
+        self.assertEqual(samples['owner'], User.objects.get(blockchain_address=self.OWNER).pk)
+        self.assertEqual(PropertyRatingAggregate.objects.get(pk=samples['property']).as_dict()['average_rating'], 4.0)
+
+    def test_view_targets_cover_every_named_route(self):
+        stderr = StringIO()
+        command = RunBenchmarksCommand(stdout=StringIO(), stderr=stderr)
+        command.warn_uncovered_routes(RunBenchmarksCommand.view_targets(self.SEEDED, mirror_to_database(self.SEEDED)))
+        self.assertEqual(stderr.getvalue(), '')
+
+
+class StandInApp:
+    """压测用的替身应用实例: 读取接口返回固定数据，prepare 接口返回 500，异步读取接口按 delay 延迟响应。"""
+
+    OWNER = '0x' + '11' * 20
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        app = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def respond(self, status, data):
+                raw = json.dumps({'status': 'success' if status < 400 else 'error', 'data': data}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                if self.path.startswith('/api/async/'):
+                    time.sleep(app.delay)
+                if self.path.endswith('/count/'):
+                    self.respond(200, {'property_count': 3})
+                else:
+                    self.respond(200, {'owner': app.OWNER})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.respond(500, None)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LoadtestCommandTests(SimpleTestCase):
+    """压测命令: 请求比例解析、饱和点判断，以及计时阶段内发出的请求 (包括超时和计时结束后才完成的) 全部计入。"""
+
+    def setUp(self):
+        self.app = StandInApp(delay=0.4)
+        self.addCleanup(self.app.stop)
+        self.command = LoadtestCommand(stdout=StringIO(), stderr=StringIO())
+
+    def run_level(self, mix, concurrency=2, duration=0.2, timeout=5.0):
+        context = LoadtestCommand.discover(self.app.url)
+        options = {'warmup': 0, 'duration': duration, 'timeout': timeout}
+        return self.command.run_level(self.app.url, context, mix, concurrency, options)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('get_property_info=4, get_property_count'), {'get_property_info': 4.0, 'get_property_count': 1.0})
+        for value in ('withdraw=1', 'get_property_info=abc'):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                parse_mix(value)
+
+    def test_find_saturation(self):
+        levels = [{'concurrency': c, 'throughput_rps': rps} for c, rps in ((1, 100), (2, 180), (4, 190), (8, 200))]
+        self.assertEqual(LoadtestCommand.find_saturation(levels, 0.1), 2)
+        self.assertIsNone(LoadtestCommand.find_saturation(levels[:2], 0.1))
+
+    def test_discover_and_wait_for_exited_server(self):
+        self.assertEqual(LoadtestCommand.discover(self.app.url), {'property_count': 3, 'from_address': StandInApp.OWNER})
+        exited = mock.Mock(returncode=1, **{'poll.return_value': 1})
+        with self.assertRaisesMessage(CommandError, '退出码 1'):
+            LoadtestCommand.wait_until_ready('http://127.0.0.1:9', server=exited, server_log='server.log')
+
+    def test_errors_are_counted_per_operation(self):
+        result = self.run_level({'get_property_info': 1, 'prepare_property_registration': 1})
+        reads, prepares = result['operations']['get_property_info'], result['operations']['prepare_property_registration']
+        self.assertGreater(reads['requests'], 0)
+        self.assertGreater(prepares['requests'], 0)
+        self.assertEqual((reads['errors'], prepares['errors']), (0, prepares['requests']))
+        self.assertEqual(result['requests'], reads['requests'] + prepares['requests'])
+
+    def test_late_and_timed_out_requests_are_counted(self):
+        late = self.run_level({'async_get_property_info': 1})
+        self.assertEqual((late['requests'], late['errors']), (2, 0))
+        self.assertGreaterEqual(late['p50_ms'], 400)
+        timed_out = self.run_level({'async_get_property_info': 1}, timeout=0.25)
+        self.assertEqual((timed_out['requests'], timed_out['errors']), (2, 2))
+        self.assertIn('错误率 100.00%', LoadtestCommand.format_row(timed_out))
+
+
+class PrepareTransactionsBatchTests(SimpleTestCase):
+    """批量准备交易: 格式错误的项逐项报错且不访问节点，结果按请求顺序返回，createBooking 不接受 value。"""
+
+    FROM_ADDRESS = '0x' + '11' * 20
+
+    def setUp(self):
+        self.prepared = []
+        def prepare(fn_name, args, from_address, value_in_wei):
+            self.prepared.append((fn_name, args, from_address, value_in_wei))
+            return {'to': '0x' + '33' * 20, 'data': f'{fn_name}{args}', 'from': from_address, 'error': None}
+        for patcher in (mock.patch.object(BlockchainInterface, 'is_ready', return_value=True),
+                        mock.patch.object(BlockchainInterface, '_prepare_transaction_data', side_effect=prepare)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post(reverse('prepare_transactions_batch'), json.dumps(body), content_type='application/json')
+
+    def prepare_one(self, operation):
+        response = self.post({'operations': [operation]})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data'][0]
+
+    def test_unknown_function_is_rejected(self):
+        result = self.prepare_one({'function': 'withdraw', 'params': {}})
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('不支持的合约函数', result['message'])
+        self.assertEqual(self.prepared, [])
+
+    def test_unknown_params_are_rejected(self):
+        result = self.prepare_one({'function': 'confirmBooking', 'params': {'bookingId': 1, 'owner': 'x'}})
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('owner', result['message'])
+        self.assertEqual(self.prepared, [])
+
+    def test_bad_from_address_is_rejected(self):
+        result = self.prepare_one({'function': 'confirmBooking', 'params': {'bookingId': 1}, 'fromAddress': '0x1234'})
+        self.assertEqual((result['status'], result['message']), ('error', '无效的 fromAddress。'))
+        response = self.post({'fromAddress': 'not-an-address', 'operations': [{'function': 'confirmBooking', 'params': {'bookingId': 1}}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.prepared, [])
+
+    def test_bad_value_is_rejected(self):
+        booking = {'function': 'createBooking', 'params': {'propertyId': 1, 'startDate': 1, 'endDate': 2}}
+        for value in ('abc', 1.5, True, -1):
+            with self.subTest(value=value):
+                self.assertEqual(self.prepare_one({**booking, 'value': value})['status'], 'error')
+        self.assertEqual(self.prepared, [])
+
+    def test_non_payable_function_rejects_value(self):
+        booking = {'function': 'createBooking', 'params': {'propertyId': 1, 'startDate': 1, 'endDate': 2}}
+        result = self.prepare_one({**booking, 'value': '1000'})
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('payable', result['message'])
+        self.assertEqual(self.prepared, [])
+        self.assertEqual(self.prepare_one({**booking, 'value': 0})['status'], 'success')
+        self.assertEqual(self.prepared, [('createBooking', (1, 1, 2), None, 0)])
+
+    def test_interface_checks_param_names_against_the_shared_map(self):
+        result = BlockchainInterface.prepare_transactions_batch([
+            ('confirmBooking', {'booking_id': 1, 'owner': 'x'}, None, 0),
+            ('createBooking', {'property_id': 1}, None, 0),
+        ])
+        self.assertEqual([item['error'] for item in result['items']], [
+            'confirmBooking 的参数必须为: booking_id',
+            'createBooking 的参数必须为: end_date, property_id, start_date',
+        ])
+        self.assertEqual(self.prepared, [])
+
+    def test_validator_type_error_is_not_swallowed(self):
+        with mock.patch.object(BlockchainInterface, '_booking_id_args', side_effect=TypeError('bug')):
+            with self.assertRaises(TypeError):
+                BlockchainInterface.prepare_transactions_batch([('confirmBooking', {'booking_id': 1}, None, 0)])
+
+    @override_settings(BLOCKCHAIN_PREPARE_BATCH_MAX=2)
+    def test_batch_size_is_capped(self):
+        operation = {'function': 'confirmBooking', 'params': {'bookingId': 1}}
+        response = self.post({'operations': [operation] * 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.prepared, [])
+        self.assertEqual(self.post({'operations': [operation] * 2}).status_code, 200)
+
+    def test_mixed_items_keep_request_order(self):
+        operations = [
+            {'function': 'completeBooking', 'params': {'bookingId': 7}},
+            {'function': 'withdraw'},
+            {'function': 'submitReview', 'params': {'propertyId': 1, 'rating': 6}},
+            'not-an-object',
+            {'function': 'confirmBooking', 'params': {'bookingId': 3}, 'fromAddress': self.FROM_ADDRESS},
+        ]
+        response = self.post({'operations': operations})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual([(r['index'], r['function'], r['status']) for r in data], [
+            (0, 'completeBooking', 'success'),
+            (1, 'withdraw', 'error'),
+            (2, 'submitReview', 'error'),
+            (3, None, 'error'),
+            (4, 'confirmBooking', 'success'),
+        ])
+        self.assertEqual(data[0]['transaction_params']['data'], 'completeBooking(7,)')
+        self.assertEqual(data[4]['transaction_params']['from'], self.FROM_ADDRESS)
+        self.assertIn('1到5', data[2]['message'])
+        self.assertEqual(response.json()['message'].split(' ')[1], '2/5')
+
+
+class PrepareSingleTransactionTests(SimpleTestCase):
+    """单笔准备视图: 无效的 fromAddress 作为请求错误返回 400，而不是 500。"""
+
+    def setUp(self):
+        contract = mock.Mock(address=Web3.to_checksum_address('0x' + '33' * 20))
+        for target, name, value in ((BlockchainInterface, 'is_ready', mock.Mock(return_value=True)),
+                                    (BlockchainInterface, 'w3', Web3()),
+                                    (BlockchainInterface, 'contract', contract),
+                                    (AsyncBlockchainInterface, 'is_ready', mock.AsyncMock(return_value=True)),
+                                    (AsyncBlockchainInterface, 'w3', AsyncWeb3()),
+                                    (AsyncBlockchainInterface, 'contract', contract)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_invalid_from_address_is_a_bad_request(self):
+        body = json.dumps({'name': 'Alice', 'email': 'alice@example.com', 'fromAddress': '0x1234'})
+        for url_name in ('prepare_user_registration', 'async_prepare_user_registration'):
+            with self.subTest(url_name=url_name):
+                response = self.client.post(reverse(url_name), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['status'], 'error')
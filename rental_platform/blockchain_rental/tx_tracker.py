@@ -0,0 +1,107 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+import logging
+
+from .blockchain_interface import BlockchainInterface
+from .models import BlockchainTransaction
+
+logger = logging.getLogger(__name__)
+
+class TransactionTracker:
+    """
+    交易确认跟踪器 - 批量更新 BlockchainTransaction 的确认状态。
+
+    每轮按 chunk_size 分批取出已到检查时间的 pending 交易，用一次 JSON-RPC 批量请求
+    查询这一批交易的回执，再用 bulk_update 一次写回:
+    - 回执所在区块已达到确认深度: 按回执 status 标记为 confirmed / failed，并记录 confirmed_at；
+    - 已打包但确认数不足: 记录区块号，一个退避基数后再检查 (期间若发生重组，下次检查会更新区块号)；
+    - 尚未查到回执: check_attempts 加一，按指数退避推迟下次检查，长时间未上链的交易只占用很少的 RPC 调用。
+
+    sender_address 为空 (默认，track_transactions) 时只跟踪用户钱包签名的交易；后端代发的交易可能被提高费用重发，
+    实际上链的可能是 replaced_hashes 中较早的哈希，由 Relayer 以自己的签名地址在同一进程内跟踪，两者不会并发写同一行。
+    """
+    UPDATE_FIELDS = ['status', 'confirmed_at', 'block_number', 'check_attempts', 'next_check_at']
+    MIN_BACKOFF_SECONDS = 1
+
+    def __init__(self, chunk_size=None, confirmations=None, sender_address=None):
+        self.chunk_size = chunk_size or getattr(settings, 'BLOCKCHAIN_TX_TRACKER_CHUNK_SIZE', 100)
+        self.confirmations = confirmations if confirmations is not None else getattr(settings, 'BLOCKCHAIN_CONFIRMATION_DEPTH', 3)
+        # 退避间隔至少 MIN_BACKOFF_SECONDS 秒: 否则处理后的交易 next_check_at 不晚于 now，会在本轮被反复取出
+        self.backoff_base = max(self.MIN_BACKOFF_SECONDS, getattr(settings, 'BLOCKCHAIN_TX_BACKOFF_BASE', 12))
+        self.backoff_max = max(self.backoff_base, getattr(settings, 'BLOCKCHAIN_TX_BACKOFF_MAX', 900))
+        self.sender_address = sender_address
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """第 attempts 次未查到回执后的等待秒数: base * 2^(attempts-1)，不超过 backoff_max。"""
+        return min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+
+    def due_transactions(self, now):
+        return BlockchainTransaction.objects.filter(
+            Q(next_check_at__isnull=True) | Q(next_check_at__lte=now),
+            status='pending',
+            sender_address=self.sender_address, # None 即 sender_address IS NULL
+        ).order_by(F('next_check_at').asc(nulls_first=True), 'id')
+
+    def run_once(self) -> dict:
+        """处理一轮所有已到检查时间的交易，返回各结果的计数。"""
+        if not BlockchainInterface.is_ready():
+            raise RuntimeError(BlockchainInterface.get_error_message() or "区块链接口未初始化。")
+
+        now = timezone.now()
+        head = BlockchainInterface.w3.eth.block_number
+        stats = {'confirmed': 0, 'failed': 0, 'waiting': 0, 'not_found': 0}
+        # 每批处理后的交易要么离开 pending 状态，要么 next_check_at 被推迟到 now 之后，
+        # 因此重复执行同一查询即可依次取到下一批
+        while True:
+            chunk = list(self.due_transactions(now)[:self.chunk_size])
+            if not chunk:
+                break
+            for outcome, count in self._process_chunk(chunk, head, now).items():
+                stats[outcome] += count
+            if len(chunk) < self.chunk_size:
+                break
+        return stats
+
+    def _fetch_receipts(self, tx_hashes: list) -> list:
+        """ (辅助方法) 一次批量请求查询多笔交易回执，返回与输入顺序一致的回执 (未找到或出错为 None)"""
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": "eth_getTransactionReceipt", "params": [tx_hash]}
+            for request_id, tx_hash in enumerate(tx_hashes)
+        ]
+        responses = BlockchainInterface.w3.provider.make_batch_request(payload)
+        if isinstance(responses, dict):
+            raise RuntimeError(f"批量查询回执失败: {responses.get('error', responses)}")
+        responses_by_id = {response.get('id'): response for response in responses}
+        receipts = []
+        for request_id, tx_hash in enumerate(tx_hashes):
+            response = responses_by_id.get(request_id) or {}
+            if response.get('error'):
+                logger.warning(f"查询交易回执失败 ({tx_hash}): {response['error']}")
+            receipts.append(response.get('result'))
+        return receipts
+
+    def _process_chunk(self, chunk: list, head: int, now) -> dict:
+        """ (辅助方法) 查询一批交易的回执并用 bulk_update 写回 """
+        counts = {'confirmed': 0, 'failed': 0, 'waiting': 0, 'not_found': 0}
+        receipts = self._fetch_receipts([tx.transaction_hash for tx in chunk])
+        for tx, receipt in zip(chunk, receipts):
+            if not receipt or receipt.get('blockNumber') is None:
+                tx.block_number = None
+                tx.check_attempts += 1
+                tx.next_check_at = now + timedelta(seconds=self.backoff_seconds(tx.check_attempts))
+                counts['not_found'] += 1
+                continue
+            tx.block_number = int(receipt['blockNumber'], 16)
+            if head - tx.block_number + 1 < self.confirmations:
+                tx.next_check_at = now + timedelta(seconds=self.backoff_base)
+                counts['waiting'] += 1
+                continue
+            tx.status = 'confirmed' if int(receipt.get('status', '0x0'), 16) == 1 else 'failed'
+            tx.confirmed_at = now
+            tx.next_check_at = None
+            counts[tx.status] += 1
+        BlockchainTransaction.objects.bulk_update(chunk, self.UPDATE_FIELDS)
+        logger.info(f"已检查 {len(chunk)} 笔待确认交易: {counts}")
+        return counts
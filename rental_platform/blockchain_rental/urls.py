@@ -1,5 +1,14 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from . import api, views
+
+# 本地数据库模型的只读 REST API (键集游标分页)
+router = DefaultRouter()
+router.register('properties', api.PropertyViewSet, basename='local-property')
+router.register('bookings', api.BookingViewSet, basename='local-booking')
+router.register('reviews', api.ReviewViewSet, basename='local-review')
+router.register('transactions', api.BlockchainTransactionViewSet, basename='local-transaction')
 
 urlpatterns = [
     # 区块链浏览器页面
@@ -7,13 +16,41 @@ urlpatterns = [
     
     # 首页 - 重定向到浏览器页面
     path('', views.explorer_view, name='home'),
+
+    # Prometheus 指标
+    path('metrics', views.metrics_view, name='metrics'),
     
     # API - 准备交易数据
     path('api/prepare/user-registration/', views.prepare_user_registration_tx, name='prepare_user_registration'),
     path('api/prepare/property-registration/', views.prepare_property_registration_tx, name='prepare_property_registration'),
+    path('api/prepare/batch/', views.prepare_transactions_batch, name='prepare_transactions_batch'),
     
     # API - 读取链上数据
     path('api/user/<str:user_address>/', views.get_user_blockchain_info, name='get_user_info'),
     path('api/property/<int:property_id>/', views.get_property_blockchain_info, name='get_property_info'),
     path('api/property/count/', views.get_total_property_count, name='get_property_count'),
-] 
\ No newline at end of file
+    path('api/properties/', views.get_properties_blockchain_info, name='get_properties_info'),
+
+    # API - 异步版本 (需通过 config/asgi.py 以 ASGI 方式部署才能发挥作用)
+    path('api/async/prepare/user-registration/', views.async_prepare_user_registration_tx, name='async_prepare_user_registration'),
+    path('api/async/prepare/property-registration/', views.async_prepare_property_registration_tx, name='async_prepare_property_registration'),
+    path('api/async/user/<str:user_address>/', views.async_get_user_blockchain_info, name='async_get_user_info'),
+    path('api/async/property/<int:property_id>/', views.async_get_property_blockchain_info, name='async_get_property_info'),
+    path('api/async/property/count/', views.async_get_total_property_count, name='async_get_property_count'),
+
+    # API - 已索引的链上事件
+    path('api/events/', views.list_contract_events, name='list_contract_events'),
+
+    # 房源可用性查询 (本地数据库)
+    path('api/availability/<int:property_pk>/', views.get_property_availability, name='get_property_availability'),
+
+    # 房源全文搜索 (本地数据库)
+    path('api/search/properties/', views.search_properties, name='search_properties'),
+
+    # 评分汇总 (本地数据库)
+    path('api/reputation/property/<int:property_pk>/', views.get_property_rating, name='get_property_rating'),
+    path('api/reputation/user/<int:user_pk>/', views.get_user_reputation, name='get_user_reputation'),
+
+    # 本地数据库模型列表/详情 API
+    path('api/local/', include(router.urls)),
+]
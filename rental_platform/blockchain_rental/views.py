@@ -1,12 +1,23 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, HttpResponseNotAllowed
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt # 生产环境中请谨慎使用或正确配置CSRF
 import json
+from decimal import Decimal, InvalidOperation
+from functools import wraps
 from web3 import Web3 # 需要导入 Web3 用于 is_address 校验
 from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from .blockchain_interface import BlockchainInterface # 导入我们更新后的接口
+from .async_blockchain_interface import AsyncBlockchainInterface
+from .chain_cache import ChainReadCache
+from .conditional import chain_read_conditional
+from .contract_abi import function_abi
+from .metrics import render_metrics
+from .models import Booking, ContractEvent, Property, PropertyRatingAggregate, User, UserRatingAggregate
 
 # Create your views here.
 
@@ -17,11 +28,187 @@ def explorer_view(request):
     区块链浏览器页面视图，用于展示合约交互历史。
     """
     context = {
-        'contract_address': settings.RENTAL_PLATFORM_CONTRACT_ADDRESS
+        'contract_address': settings.RENTAL_PLATFORM_CONTRACT_ADDRESS,
+        'events_stream_url': settings.EVENT_STREAM_PATH,
     }
     return render(request, 'blockchain_rental/explorer.html', context)
 
 
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Prometheus 抓取端点: 链上 RPC 耗时直方图、错误计数、进行中调用数和只读缓存命中情况。
+    多 worker 部署时需设置 PROMETHEUS_MULTIPROC_DIR，任意一个 worker 都会返回所有 worker 的汇总数据。
+    """
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+EVENTS_PAGE_SIZE_DEFAULT = 50
+EVENTS_PAGE_SIZE_MAX = 200
+
+@require_http_methods(["GET"])
+def list_contract_events(request):
+    """
+    分页返回已索引的合约事件 (最新的在前)。
+    查询参数:
+    - type: 可选，逗号分隔的事件类型，例如 BookingCreated,BookingConfirmed
+    - cursor: 可选，上一页返回的 next_cursor (格式 "区块号-日志序号")
+    - limit: 可选，每页条数，默认 50，最大 200
+    数据由 index_events 管理命令从链上同步，此视图只做一次索引查询，不访问区块链节点。
+    """
+    try:
+        limit = int(request.GET.get('limit', EVENTS_PAGE_SIZE_DEFAULT))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'limit 必须是整数。'}, status=400)
+    limit = max(1, min(limit, EVENTS_PAGE_SIZE_MAX))
+
+    events = ContractEvent.objects.all()
+
+    event_types = [t for t in request.GET.get('type', '').split(',') if t]
+    if event_types:
+        valid_types = dict(ContractEvent.EVENT_TYPES)
+        unknown_types = [t for t in event_types if t not in valid_types]
+        if unknown_types:
+            return JsonResponse({'status': 'error', 'message': f"未知的事件类型: {', '.join(unknown_types)}"}, status=400)
+        events = events.filter(event_type__in=event_types)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor_block, cursor_log_index = (int(part) for part in cursor.split('-'))
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': '无效的 cursor。'}, status=400)
+        events = events.filter(
+            Q(block_number__lt=cursor_block) |
+            Q(block_number=cursor_block, log_index__lt=cursor_log_index)
+        )
+
+    # 多取一条用于判断是否还有下一页
+    page = list(events.order_by('-block_number', '-log_index')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    return JsonResponse({
+        'status': 'success',
+        'data': [event.as_dict() for event in page],
+        'next_cursor': page[-1].position if has_more else None,
+    })
+
+
+@require_http_methods(["GET"])
+def get_property_availability(request, property_pk):
+    """
+    查询房源 (本地数据库ID) 在指定日期区间是否可预订。
+    查询参数 check_in / check_out 为 YYYY-MM-DD 格式，区间为 [check_in, check_out)。
+    在 PostgreSQL 上冲突查询由预订表的 GiST 排他约束索引支持。
+    """
+    try:
+        check_in_date = parse_date(request.GET.get('check_in', ''))
+        check_out_date = parse_date(request.GET.get('check_out', ''))
+    except ValueError:
+        check_in_date = check_out_date = None
+    if not check_in_date or not check_out_date:
+        return JsonResponse({'status': 'error', 'message': '必须提供有效的 check_in 和 check_out 日期 (YYYY-MM-DD)。'}, status=400)
+    if check_out_date <= check_in_date:
+        return JsonResponse({'status': 'error', 'message': '退房日期必须晚于入住日期。'}, status=400)
+    if not Property.objects.filter(pk=property_pk).exists():
+        return JsonResponse({'status': 'error', 'message': '房源不存在。'}, status=404)
+
+    conflicts = list(
+        Booking.objects.conflicting(property_pk, check_in_date, check_out_date)
+        .order_by('check_in_date')
+        .values('check_in_date', 'check_out_date', 'status')
+    )
+    return JsonResponse({'status': 'success', 'data': {
+        'property_id': property_pk,
+        'check_in': check_in_date.isoformat(),
+        'check_out': check_out_date.isoformat(),
+        'available': not conflicts,
+        'conflicts': [
+            {
+                'check_in': conflict['check_in_date'].isoformat(),
+                'check_out': conflict['check_out_date'].isoformat(),
+                'status': conflict['status'],
+            }
+            for conflict in conflicts
+        ],
+    }})
+
+
+def _rating_aggregate_response(aggregate_model, target_model, target_field: str, pk: int):
+    """ (辅助函数) 读取一行评分汇总；对象存在但尚无评价时返回零值 """
+    aggregate = aggregate_model.objects.filter(**{target_field: pk}).first()
+    if aggregate is None:
+        if not target_model.objects.filter(pk=pk).exists():
+            return JsonResponse({'status': 'error', 'message': '对象不存在。'}, status=404)
+        aggregate = aggregate_model(**{target_field: pk})
+    return JsonResponse({'status': 'success', 'data': {'id': pk, **aggregate.as_dict()}})
+
+
+@require_http_methods(["GET"])
+def get_property_rating(request, property_pk):
+    """返回房源 (本地数据库ID) 的评价数、平均分和星级分布，直接读取汇总表。"""
+    return _rating_aggregate_response(PropertyRatingAggregate, Property, 'property_id', property_pk)
+
+
+@require_http_methods(["GET"])
+def get_user_reputation(request, user_pk):
+    """返回用户 (本地数据库ID，作为评价接收者) 的评价数、平均分和星级分布，直接读取汇总表。"""
+    return _rating_aggregate_response(UserRatingAggregate, User, 'user_id', user_pk)
+
+
+PROPERTY_SEARCH_PAGE_SIZE_DEFAULT = 20
+PROPERTY_SEARCH_PAGE_SIZE_MAX = 100
+
+@require_http_methods(["GET"])
+def search_properties(request):
+    """
+    全文搜索本地房源，按相关度排序。
+    查询参数:
+    - q: 搜索词 (必填，支持 websearch 语法，例如 "海景 -合租")
+    - min_price / max_price: 可选，每晚价格范围
+    - verified: 可选，1/true 只返回已验证房源，0/false 只返回未验证房源
+    - offset / limit: 可选，分页，limit 默认 20，最大 100
+    PostgreSQL 上由 search_vector 的 GIN 索引和各字段的三元组 GIN 索引 (中文子串匹配) 支持。
+    """
+    term = request.GET.get('q', '').strip()
+    if not term:
+        return JsonResponse({'status': 'error', 'message': '必须提供搜索词 q。'}, status=400)
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+        limit = max(1, min(int(request.GET.get('limit', PROPERTY_SEARCH_PAGE_SIZE_DEFAULT)), PROPERTY_SEARCH_PAGE_SIZE_MAX))
+        min_price = Decimal(request.GET['min_price']) if request.GET.get('min_price') else None
+        max_price = Decimal(request.GET['max_price']) if request.GET.get('max_price') else None
+    except (ValueError, InvalidOperation):
+        return JsonResponse({'status': 'error', 'message': 'offset、limit、min_price、max_price 必须是数字。'}, status=400)
+
+    properties = Property.objects.search(term)
+    if min_price is not None:
+        properties = properties.filter(price_per_night__gte=min_price)
+    if max_price is not None:
+        properties = properties.filter(price_per_night__lte=max_price)
+    verified = request.GET.get('verified', '').lower()
+    if verified in ('1', 'true'):
+        properties = properties.filter(is_verified=True)
+    elif verified in ('0', 'false'):
+        properties = properties.filter(is_verified=False)
+
+    # 多取一条用于判断是否还有下一页
+    page = list(properties.values(
+        'id', 'title', 'location', 'price_per_night', 'is_verified', 'rank'
+    )[offset:offset + limit + 1])
+    has_more = len(page) > limit
+    return JsonResponse({'status': 'success', 'data': {
+        'items': [
+            {**item, 'price_per_night': str(item['price_per_night'])}
+            for item in page[:limit]
+        ],
+        'offset': offset,
+        'limit': limit,
+        'has_more': has_more,
+    }})
+
+
 # --- 视图：准备交易数据 (供前端签名) ---
 
 @csrf_exempt # 注意CSRF处理
@@ -117,20 +304,102 @@ def prepare_property_registration_tx(request):
         'transaction_params': blockchain_response['tx_data']
     })
 
-# 您可以为 create_booking, confirm_booking, complete_booking, submit_review 添加类似的准备交易视图
-# 例如:
-# @csrf_exempt
-# @require_http_methods(["POST"])
-# def prepare_create_booking_tx_view(request):
-#     # ... (实现逻辑，从 request.body 获取 property_id, start_date, end_date, value_in_wei (可选))
-#     # ... (调用 BlockchainInterface.create_booking_contract 或 prepare_create_booking_tx)
-#     # ... (返回 transaction_params)
-#     pass
+def _parse_prepare_operation(operation, default_from_address):
+    """ (辅助函数) 把批量请求中的一项转换为 (函数名, 参数, fromAddress, value)，格式错误时返回错误信息 """
+    if not isinstance(operation, dict):
+        return None, "每一项必须是 JSON 对象。"
+    fn_name = operation.get('function')
+    if fn_name not in BlockchainInterface.PREPARE_FUNCTIONS:
+        return None, f"不支持的合约函数: {fn_name} (可选: {', '.join(BlockchainInterface.PREPARE_FUNCTIONS)})"
+    fields = BlockchainInterface.PREPARE_FUNCTIONS[fn_name][1]
+    params = operation.get('params') or {}
+    if not isinstance(params, dict):
+        return None, "params 必须是 JSON 对象。"
+    unknown = set(params) - set(fields)
+    if unknown:
+        return None, f"{fn_name} 不接受参数: {', '.join(sorted(unknown))}"
+    kwargs = {name: params.get(field) for field, name in fields.items()}
+    if fn_name == 'submitReview' and kwargs['comment'] is None:
+        kwargs['comment'] = ''
+    from_address = operation.get('fromAddress') or default_from_address
+    if from_address is not None and not Web3.is_address(from_address):
+        return None, "无效的 fromAddress。"
+    value_in_wei = operation.get('value', 0)
+    if isinstance(value_in_wei, bool) or not isinstance(value_in_wei, (int, str)):
+        return None, "value 必须是以 wei 为单位的整数。"
+    try:
+        value_in_wei = int(value_in_wei)
+    except ValueError:
+        return None, "value 必须是以 wei 为单位的整数。"
+    if value_in_wei < 0:
+        return None, "value 不能为负数。"
+    # 非 payable 函数附带 ETH 时交易必然回滚，直接拒绝而不是等 gas 估算失败
+    if value_in_wei and function_abi(fn_name).get('stateMutability') != 'payable':
+        return None, f"{fn_name} 不是 payable 函数，value 必须为 0。"
+    return (fn_name, kwargs, from_address, value_in_wei), None
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def prepare_transactions_batch(request):
+    """
+    批量准备多笔合约写入交易 (registerUser、registerProperty、createBooking、confirmBooking、completeBooking、submitReview)。
+    请求体: {"fromAddress": 可选的默认地址, "operations": [{"function": "confirmBooking", "params": {"bookingId": 1}, "fromAddress": 可选}, ...]}
+    各项在服务端并发估算 gas，一次响应按顺序返回每项的 transaction_params 或错误信息；单项失败不影响其他项。
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': '无效的JSON请求体。'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'status': 'error', 'message': '请求体必须是 JSON 对象。'}, status=400)
+
+    operations = data.get('operations')
+    max_operations = getattr(settings, 'BLOCKCHAIN_PREPARE_BATCH_MAX', 50)
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'status': 'error', 'message': 'operations 必须是非空数组。'}, status=400)
+    if len(operations) > max_operations:
+        return JsonResponse({'status': 'error', 'message': f'单次最多准备 {max_operations} 笔交易。'}, status=400)
+    default_from_address = data.get('fromAddress')
+    if default_from_address is not None and not Web3.is_address(default_from_address):
+        return JsonResponse({'status': 'error', 'message': '无效的 fromAddress。'}, status=400)
+
+    if not BlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': BlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    results = [None] * len(operations)
+    valid_indexes = []
+    valid_operations = []
+    for index, operation in enumerate(operations):
+        parsed, error = _parse_prepare_operation(operation, default_from_address)
+        if error:
+            results[index] = {'status': 'error', 'message': error}
+        else:
+            valid_indexes.append(index)
+            valid_operations.append(parsed)
+
+    batch_info = BlockchainInterface.prepare_transactions_batch(valid_operations)
+    if batch_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': f"准备交易失败: {batch_info['error']}"}, status=503)
+    for index, tx_data in zip(valid_indexes, batch_info['items']):
+        if tx_data.get('error'):
+            results[index] = {'status': 'error', 'message': f"准备交易失败: {tx_data['error']}"}
+        else:
+            results[index] = {'status': 'success', 'transaction_params': {k: v for k, v in tx_data.items() if k != 'error'}}
+
+    for index, operation in enumerate(operations):
+        results[index] = {'index': index, 'function': operation.get('function') if isinstance(operation, dict) else None, **results[index]}
+    return JsonResponse({
+        'status': 'success',
+        'message': f"已准备 {sum(1 for r in results if r['status'] == 'success')}/{len(results)} 笔交易数据。请使用钱包逐笔签名并发送。",
+        'data': results,
+    })
 
 
 # --- 视图：读取链上数据 ---
 
 @require_http_methods(["GET"])
+@chain_read_conditional(lambda user_address: ChainReadCache.user_scopes(user_address) if Web3.is_address(user_address) else None)
 def get_user_blockchain_info(request, user_address: str):
     """
     从区块链获取特定用户的信息。
@@ -154,6 +423,7 @@ def get_user_blockchain_info(request, user_address: str):
 
 
 @require_http_methods(["GET"])
+@chain_read_conditional(lambda property_id: ChainReadCache.property_scopes(property_id))
 def get_property_blockchain_info(request, property_id: int):
     """
     从区块链获取特定房源的信息。
@@ -176,7 +446,71 @@ def get_property_blockchain_info(request, property_id: int):
     return JsonResponse({'status': 'success', 'data': property_info})
 
 
+PROPERTIES_BATCH_MAX_IDS = 200
+PROPERTIES_PAGE_DEFAULT_LIMIT = 50
+
 @require_http_methods(["GET"])
+def get_properties_blockchain_info(request):
+    """
+    批量从区块链获取多个房源的信息。支持两种查询方式:
+    - /api/properties/?ids=1,2,3: 按指定ID读取，所有读取通过一次 JSON-RPC 批量请求完成；
+    - /api/properties/?offset=0&limit=50: 分页浏览房源目录，只读取一次 propertyCount，
+      范围内的房源由有界线程池并发批量读取。bookingIds 默认只返回数量 (bookingCount)，
+      传入 include_booking_ids=1 时返回完整列表。
+    单个房源读取失败只体现在该项的 error 字段中。
+    """
+    if 'ids' not in request.GET:
+        return _get_properties_page(request)
+
+    try:
+        property_ids = [int(part) for part in request.GET.get('ids', '').split(',') if part.strip()]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'ids 必须是逗号分隔的整数。'}, status=400)
+    if not property_ids:
+        return JsonResponse({'status': 'error', 'message': '必须提供 ids 参数。'}, status=400)
+    if len(property_ids) > PROPERTIES_BATCH_MAX_IDS:
+        return JsonResponse({'status': 'error', 'message': f'单次最多查询 {PROPERTIES_BATCH_MAX_IDS} 个房源。'}, status=400)
+
+    if not BlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': BlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    batch_info = BlockchainInterface.get_properties_batch(property_ids)
+
+    if batch_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': batch_info['error']}, status=502)
+
+    return JsonResponse({'status': 'success', 'data': batch_info['items']})
+
+
+def _get_properties_page(request):
+    """ (辅助函数) 处理 offset/limit 分页的房源目录查询 """
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = int(request.GET.get('limit', PROPERTIES_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'offset 和 limit 必须是整数。'}, status=400)
+    if offset < 0 or not 1 <= limit <= PROPERTIES_BATCH_MAX_IDS:
+        return JsonResponse({'status': 'error', 'message': f'offset 不能为负数，limit 必须在 1 到 {PROPERTIES_BATCH_MAX_IDS} 之间。'}, status=400)
+    include_booking_ids = request.GET.get('include_booking_ids', '').lower() in ('1', 'true')
+
+    if not BlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': BlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    page_info = BlockchainInterface.get_properties_range(offset, limit, include_booking_ids=include_booking_ids)
+
+    if page_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': page_info['error']}, status=502)
+
+    return JsonResponse({'status': 'success', 'data': {
+        'total': page_info['total'],
+        'offset': offset,
+        'limit': limit,
+        'items': page_info['items'],
+    }})
+
+
+@require_http_methods(["GET"])
+@chain_read_conditional(lambda: ChainReadCache.PROPERTY_COUNT_SCOPES)
 def get_total_property_count(request):
     """
     从区块链获取已注册的房源总数。
@@ -190,3 +524,131 @@ def get_total_property_count(request):
         return JsonResponse({'status': 'error', 'message': count_info['error']}, status=500)
         
     return JsonResponse({'status': 'success', 'data': {'property_count': count_info.get('count')}})
+
+
+# --- 异步视图 (通过 config/asgi.py 部署时，等待节点响应不会阻塞 worker 线程) ---
+
+def async_require_http_methods(request_method_list, csrf_exempt=False):
+    """
+    require_http_methods 的异步版本。
+    Django 4.2 的 require_http_methods / csrf_exempt 装饰器会把 async 视图包装成同步函数，
+    因此异步视图使用此装饰器完成请求方法检查和 CSRF 豁免标记。
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                return HttpResponseNotAllowed(request_method_list)
+            return await view_func(request, *args, **kwargs)
+        inner.csrf_exempt = csrf_exempt
+        return inner
+    return decorator
+
+
+@async_require_http_methods(["POST"], csrf_exempt=True)
+async def async_prepare_user_registration_tx(request):
+    """prepare_user_registration_tx 的异步版本。"""
+    try:
+        data = json.loads(request.body)
+        name = data.get('name')
+        email = data.get('email')
+        from_address_for_gas = data.get('fromAddress')
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': '无效的JSON请求体。'}, status=400)
+
+    if not name or not email:
+        return JsonResponse({'status': 'error', 'message': '必须提供姓名和邮箱。'}, status=400)
+
+    if not await AsyncBlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': AsyncBlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    tx_data = await AsyncBlockchainInterface.prepare_register_user_tx(name, email, from_address_for_gas)
+
+    if tx_data.get('error'):
+        return JsonResponse({'status': 'error', 'message': f"准备交易失败: {tx_data['error']}"}, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'message': '用户注册交易数据准备成功。请使用钱包签名并发送。',
+        'transaction_params': tx_data
+    })
+
+
+@async_require_http_methods(["POST"], csrf_exempt=True)
+async def async_prepare_property_registration_tx(request):
+    """prepare_property_registration_tx 的异步版本。"""
+    try:
+        data = json.loads(request.body)
+        title = data.get('title')
+        description = data.get('description')
+        price_str = data.get('price')
+        from_address_for_gas = data.get('fromAddress')
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': '无效的JSON请求体。'}, status=400)
+
+    if not all([title, description, price_str is not None]):
+        return JsonResponse({'status': 'error', 'message': '必须提供标题、描述和价格。'}, status=400)
+
+    try:
+        price = int(price_str)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': '价格必须是有效的整数。'}, status=400)
+
+    if not await AsyncBlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': AsyncBlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    tx_data = await AsyncBlockchainInterface.prepare_register_property_tx(title, description, price, from_address_for_gas)
+
+    if tx_data.get('error'):
+        return JsonResponse({'status': 'error', 'message': f"准备交易失败: {tx_data['error']}"}, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'message': '房源注册交易数据准备成功。请使用钱包签名并发送。',
+        'transaction_params': tx_data
+    })
+
+
+@async_require_http_methods(["GET"])
+async def async_get_user_blockchain_info(request, user_address: str):
+    """get_user_blockchain_info 的异步版本。"""
+    if not await AsyncBlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': AsyncBlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    if not Web3.is_address(user_address):
+        return JsonResponse({'status': 'error', 'message': '无效的用户地址格式。'}, status=400)
+
+    user_info = await AsyncBlockchainInterface.get_user_info(user_address)
+
+    if user_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': user_info['error']}, status=404)
+
+    return JsonResponse({'status': 'success', 'data': user_info})
+
+
+@async_require_http_methods(["GET"])
+async def async_get_property_blockchain_info(request, property_id: int):
+    """get_property_blockchain_info 的异步版本。"""
+    if not await AsyncBlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': AsyncBlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    property_info = await AsyncBlockchainInterface.get_property_info(int(property_id))
+
+    if property_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': property_info['error']}, status=404)
+
+    return JsonResponse({'status': 'success', 'data': property_info})
+
+
+@async_require_http_methods(["GET"])
+async def async_get_total_property_count(request):
+    """get_total_property_count 的异步版本。"""
+    if not await AsyncBlockchainInterface.is_ready():
+        return JsonResponse({'status': 'error', 'message': AsyncBlockchainInterface.get_error_message() or "区块链接口未初始化。"}, status=503)
+
+    count_info = await AsyncBlockchainInterface.get_property_count()
+
+    if count_info.get('error'):
+        return JsonResponse({'status': 'error', 'message': count_info['error']}, status=500)
+
+    return JsonResponse({'status': 'success', 'data': {'property_count': count_info.get('count')}})
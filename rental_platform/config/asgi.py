@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+使用 ASGI 服务器部署以启用 /api/async/ 下的异步视图和合约事件实时推送 (EVENT_STREAM_PATH)，例如:
+    uvicorn config.asgi:application --workers 4
 """
 
 import os
@@ -13,4 +16,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# 须在 Django 初始化之后导入
+from django.conf import settings  # noqa: E402
+from blockchain_rental.event_stream import event_stream_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """事件流是长连接，直接由原生 ASGI 应用处理；其余请求交给 Django。"""
+    if scope['type'] == 'http' and scope['path'] == settings.EVENT_STREAM_PATH:
+        await event_stream_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
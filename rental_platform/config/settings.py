@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'blockchain_rental',
     'rest_framework',
     'corsheaders',
@@ -56,8 +57,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blockchain_rental.middleware.RequestTimingMiddleware',  # 请求耗时统计 (SQL/RPC)、Server-Timing 响应头和慢请求日志
 ]
 
+# 请求耗时统计配置
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', str(DEBUG)) == 'True'  # 是否输出 Server-Timing 响应头 (会暴露内部耗时，默认仅开发环境)
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', '1000'))  # 超过该耗时 (毫秒) 的请求写入 blockchain_rental.slow_requests 日志
+SLOW_REQUEST_TOP_QUERIES = int(os.getenv('SLOW_REQUEST_TOP_QUERIES', '5'))  # 慢请求日志中保留的最慢 SQL 条数
+
 # CORS配置
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # 开发环境允许所有源，生产环境应限制
 CORS_ALLOWED_ORIGINS = [
@@ -101,6 +108,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 生产环境请使用共享缓存 (例如 CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://127.0.0.1:6379/1)，使多个 worker 进程共享链上读取缓存
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -149,6 +169,78 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # 配置自定义用户模型
 AUTH_USER_MODEL = 'blockchain_rental.User'
 
+# 房源全文搜索使用的 PostgreSQL 文本搜索配置 (默认 simple: 不做词干化，适用于中文等无内置词典的语言)
+PROPERTY_SEARCH_CONFIG = os.getenv('PROPERTY_SEARCH_CONFIG', 'simple')
+
 # 区块链配置
 SEPOLIA_RPC_URL = os.getenv('SEPOLIA_RPC_URL', 'https://eth-sepolia.g.alchemy.com/v2/9LXOdanO569UkCCU0ZvCh-4aQsdibYpE')
+# 可选: 逗号分隔的多个 RPC 节点地址，配置后 BlockchainInterface 在这些节点间按延迟路由并故障切换 (优先于 SEPOLIA_RPC_URL)
+SEPOLIA_RPC_URLS = [url.strip() for url in os.getenv('SEPOLIA_RPC_URLS', '').split(',') if url.strip()]
 RENTAL_PLATFORM_CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '0x179ca0718d26B693dC58245FcecFd1d70a22ad90')
+# 合约 ABI 来源: Hardhat 编译产物 (不存在时使用 blockchain_rental/abi/RentalPlatform.json)，首次使用时加载
+RENTAL_PLATFORM_CONTRACT_ARTIFACT = os.getenv(
+    'RENTAL_PLATFORM_CONTRACT_ARTIFACT',
+    str(BASE_DIR.parent / 'artifacts' / 'rental_platform' / 'rental_platform' / 'smart_contracts' / 'RentalPlatform.sol' / 'RentalPlatform.json')
+)
+
+# 合约事件索引器配置 (python manage.py index_events)
+BLOCKCHAIN_INDEXER_START_BLOCK = int(os.getenv('BLOCKCHAIN_INDEXER_START_BLOCK', '0'))  # 通常设置为合约部署所在区块
+BLOCKCHAIN_INDEXER_CHUNK_SIZE = int(os.getenv('BLOCKCHAIN_INDEXER_CHUNK_SIZE', '2000'))  # 每次 eth_getLogs 查询的区块跨度
+BLOCKCHAIN_INDEXER_CONFIRMATIONS = int(os.getenv('BLOCKCHAIN_INDEXER_CONFIRMATIONS', '5'))  # 只索引已有足够确认数的区块
+
+# 合约事件实时推送 (SSE，仅在 ASGI 部署下可用，见 config/asgi.py)
+EVENT_STREAM_PATH = os.getenv('EVENT_STREAM_PATH', '/api/events/stream/')
+EVENT_STREAM_POLL_INTERVAL = float(os.getenv('EVENT_STREAM_POLL_INTERVAL', '2'))  # 每个进程轮询事件表的间隔秒数
+EVENT_STREAM_HEARTBEAT = float(os.getenv('EVENT_STREAM_HEARTBEAT', '15'))  # 空闲连接的心跳间隔秒数，防止被代理断开
+EVENT_STREAM_REPLAY_LIMIT = int(os.getenv('EVENT_STREAM_REPLAY_LIMIT', '1000'))  # 重连/from_block 补发历史事件时每次查询的事件数 (分页补发直到追上最新事件)
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv('EVENT_STREAM_QUEUE_SIZE', '1000'))  # 每个连接的待发送事件上限，超出时断开让客户端重连补发
+
+# 批量读取配置: 单个 JSON-RPC 批量请求中最多包含的 eth_call 数量
+BLOCKCHAIN_RPC_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_RPC_BATCH_SIZE', '100'))
+# 分页读取房源目录时并发发送批量请求的线程数 (进程内共享)
+BLOCKCHAIN_FETCH_WORKERS = int(os.getenv('BLOCKCHAIN_FETCH_WORKERS', '4'))
+# /api/prepare/batch/ 单次请求最多准备的交易数 (各项共用上面的线程池并发估算 gas)
+BLOCKCHAIN_PREPARE_BATCH_MAX = int(os.getenv('BLOCKCHAIN_PREPARE_BATCH_MAX', '50'))
+
+# 链上只读调用缓存配置
+BLOCKCHAIN_CACHE_ENABLED = os.getenv('BLOCKCHAIN_CACHE_ENABLED', 'True') == 'True'
+BLOCKCHAIN_CACHE_TTL = int(os.getenv('BLOCKCHAIN_CACHE_TTL', '300'))  # 缓存条目的最长存活秒数
+BLOCKCHAIN_CACHE_HEAD_SECONDS = int(os.getenv('BLOCKCHAIN_CACHE_HEAD_SECONDS', '12'))  # 链头区块号缓存秒数 (约一个出块间隔)
+# 链上读取接口的条件请求 (ETag/304) 依赖事件索引器递增的作用域版本号，索引器检查点超过该秒数未推进时不再返回 304
+BLOCKCHAIN_CONDITIONAL_MAX_INDEXER_LAG = int(os.getenv('BLOCKCHAIN_CONDITIONAL_MAX_INDEXER_LAG', '120'))
+
+# RPC 传输配置: 连接池大小、单次调用超时、有限次抖动退避重试、后台健康探测间隔
+BLOCKCHAIN_RPC_POOL_SIZE = int(os.getenv('BLOCKCHAIN_RPC_POOL_SIZE', '20'))
+BLOCKCHAIN_RPC_TIMEOUT = float(os.getenv('BLOCKCHAIN_RPC_TIMEOUT', '10'))
+BLOCKCHAIN_RPC_MAX_RETRIES = int(os.getenv('BLOCKCHAIN_RPC_MAX_RETRIES', '2'))
+BLOCKCHAIN_RPC_BACKOFF_BASE = float(os.getenv('BLOCKCHAIN_RPC_BACKOFF_BASE', '0.2'))
+BLOCKCHAIN_RPC_BACKOFF_MAX = float(os.getenv('BLOCKCHAIN_RPC_BACKOFF_MAX', '2.0'))
+BLOCKCHAIN_RPC_HEALTH_INTERVAL = float(os.getenv('BLOCKCHAIN_RPC_HEALTH_INTERVAL', '15'))
+BLOCKCHAIN_RPC_HEALTH_FAILURES = int(os.getenv('BLOCKCHAIN_RPC_HEALTH_FAILURES', '2'))  # 连续探测失败该次数才标记节点不可用
+BLOCKCHAIN_RPC_HEALTH_RETRY_INTERVAL = float(os.getenv('BLOCKCHAIN_RPC_HEALTH_RETRY_INTERVAL', '2'))  # 探测失败后重新探测的间隔秒数
+# 多节点 (SEPOLIA_RPC_URLS) 路由与熔断: 延迟/错误率的 EWMA 平滑系数、连续失败次数或错误率达到阈值时熔断、熔断后的冷却秒数
+BLOCKCHAIN_RPC_EWMA_ALPHA = float(os.getenv('BLOCKCHAIN_RPC_EWMA_ALPHA', '0.2'))
+BLOCKCHAIN_RPC_CIRCUIT_FAILURES = int(os.getenv('BLOCKCHAIN_RPC_CIRCUIT_FAILURES', '3'))
+BLOCKCHAIN_RPC_CIRCUIT_ERROR_RATE = float(os.getenv('BLOCKCHAIN_RPC_CIRCUIT_ERROR_RATE', '0.5'))
+BLOCKCHAIN_RPC_CIRCUIT_COOLDOWN = float(os.getenv('BLOCKCHAIN_RPC_CIRCUIT_COOLDOWN', '30'))
+BLOCKCHAIN_RPC_MAX_BLOCK_LAG = int(os.getenv('BLOCKCHAIN_RPC_MAX_BLOCK_LAG', '5'))  # 健康探测时链头落后最高链头超过该区块数的节点暂不参与路由
+
+# 交易确认跟踪配置 (python manage.py track_transactions)
+BLOCKCHAIN_CONFIRMATION_DEPTH = int(os.getenv('BLOCKCHAIN_CONFIRMATION_DEPTH', '3'))  # 回执所在区块 (含) 之后的区块数达到该值才视为已确认
+BLOCKCHAIN_TX_TRACKER_CHUNK_SIZE = int(os.getenv('BLOCKCHAIN_TX_TRACKER_CHUNK_SIZE', '100'))  # 每个批量请求查询的回执数量
+BLOCKCHAIN_TX_BACKOFF_BASE = float(os.getenv('BLOCKCHAIN_TX_BACKOFF_BASE', '12'))  # 未查到回执时的首次重试间隔秒数，之后逐次翻倍
+BLOCKCHAIN_TX_BACKOFF_MAX = float(os.getenv('BLOCKCHAIN_TX_BACKOFF_MAX', '900'))  # 重试间隔上限秒数
+
+# 后端代发 (python manage.py run_relayer): 签名账户私钥只从环境变量读取，不要写入代码或配置文件
+BACKEND_SIGNER_PRIVATE_KEY = os.getenv('BACKEND_SIGNER_PRIVATE_KEY') or None
+RELAYER_MAX_IN_FLIGHT = int(os.getenv('RELAYER_MAX_IN_FLIGHT', '16'))  # 已广播未上链的代发交易数上限
+RELAYER_BUMP_AFTER = float(os.getenv('RELAYER_BUMP_AFTER', '60'))  # 广播后超过该秒数仍未上链时提高费用重发
+RELAYER_FEE_BUMP_PERCENT = float(os.getenv('RELAYER_FEE_BUMP_PERCENT', '12.5'))  # 每次重发提高费用的百分比 (节点要求至少 10%)
+RELAYER_MAX_FEE_GWEI = float(os.getenv('RELAYER_MAX_FEE_GWEI', '200'))  # maxFeePerGas 上限
+RELAYER_PRIORITY_FEE_GWEI = float(os.getenv('RELAYER_PRIORITY_FEE_GWEI', '1.5'))  # 节点不支持 eth_maxPriorityFeePerGas 时使用的小费
+
+# Gas 估算缓存配置
+# live: 每次都调用 estimate_gas (结果同时写入缓存); cached: 优先使用缓存估算值，不访问节点，未命中时才实时估算
+BLOCKCHAIN_GAS_ESTIMATE_MODE = os.getenv('BLOCKCHAIN_GAS_ESTIMATE_MODE', 'live')
+BLOCKCHAIN_GAS_SAFETY_MARGIN = float(os.getenv('BLOCKCHAIN_GAS_SAFETY_MARGIN', '1.2'))  # 返回给前端/代发的 gas 估算值 (缓存或实时) 乘以的安全系数
+BLOCKCHAIN_GAS_CACHE_TTL = int(os.getenv('BLOCKCHAIN_GAS_CACHE_TTL', '86400'))  # 估算值缓存秒数，过期后重新实时估算